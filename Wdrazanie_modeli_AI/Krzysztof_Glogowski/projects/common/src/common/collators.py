@@ -26,6 +26,13 @@ def collate_fn(
 def predict_collate_fn(
     batch: list[list[torch.Tensor]],
 ) -> tuple[torch.Tensor, torch.Tensor]:
+    items, items_lengths, _ = predict_collate_with_indices_fn(batch)
+    return items, items_lengths
+
+
+def predict_collate_with_indices_fn(
+    batch: list[list[torch.Tensor]],
+) -> tuple[torch.Tensor, torch.Tensor, np.ndarray]:
     items_lengths = np.array([len(items) for items in batch])
     sorted_indices = np.argsort(-items_lengths)  # sort in descending order
 
@@ -35,4 +42,8 @@ def predict_collate_fn(
         items = batch[idx]
         items_batch += [*items]
 
-    return torch.stack(items_batch), torch.LongTensor(items_lengths[sorted_indices])
+    return (
+        torch.stack(items_batch),
+        torch.LongTensor(items_lengths[sorted_indices]),
+        sorted_indices,
+    )
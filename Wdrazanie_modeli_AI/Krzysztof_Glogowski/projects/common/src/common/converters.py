@@ -1,25 +1,71 @@
-import os
-
+import numpy as np
 import pymupdf
 import torch
 from PIL import Image
 
 from common.collators import predict_collate_fn
-from common.image_transformers import transform
+from common.image_transformers import (
+    batch_transform,
+    cached_transform,
+    get_image_size,
+    has_augmentations,
+)
 from common.torch_utils import get_device
 
 
 def pdf_to_model_input(
-    filepath: str, transformer_config: dict | None = None
+    document: bytes,
+    transformer_config: dict | None = None,
+    render_at_model_size: bool = False,
+    grayscale: bool = False,
+) -> tuple[torch.Tensor, torch.Tensor]:
+    pixmaps = render_pages(document, transformer_config, render_at_model_size, grayscale)
+    return pixmaps_to_model_input(pixmaps, transformer_config)
+
+
+def render_pages(
+    document: bytes,
+    transformer_config: dict | None = None,
+    render_at_model_size: bool = False,
+    grayscale: bool = False,
+) -> list[pymupdf.Pixmap]:
+    image_size = get_image_size(transformer_config) if render_at_model_size else None
+    with pymupdf.open(stream=document, filetype="pdf") as pdf:
+        return [render_page(page, image_size, grayscale) for page in pdf]
+
+
+def pixmaps_to_model_input(
+    pixmaps: list[pymupdf.Pixmap], transformer_config: dict | None = None
 ) -> tuple[torch.Tensor, torch.Tensor]:
-    images = []
-    with pymupdf.open(filepath) as pdf:
-        for i in range(len(pdf)):
-            page = pdf.load_page(i)
-            pix = page.get_pixmap()
-            image = Image.frombytes("RGB", (pix.width, pix.height), pix.samples)
-            images.append(transform(transformer_config)(image).to(get_device()))
+    if has_augmentations(transformer_config):
+        image_transform = cached_transform(transformer_config)
+        images = [image_transform(pixmap_to_image(pix)).to(get_device()) for pix in pixmaps]
+        return predict_collate_fn([images])
+
+    pages = [pixmap_to_array(pix) for pix in pixmaps]
+    images = batch_transform(transformer_config)(pages, get_device())
+    return images, torch.LongTensor([len(pages)])
+
+
+def render_page(
+    page: pymupdf.Page, image_size: dict[str, int] | None = None, grayscale: bool = False
+) -> pymupdf.Pixmap:
+    colorspace = pymupdf.csGRAY if grayscale else pymupdf.csRGB
+    if image_size is None:
+        return page.get_pixmap(colorspace=colorspace)
+    # scale the page straight to the requested size instead of rendering it at 72 dpi and resizing
+    matrix = pymupdf.Matrix(
+        image_size["width"] / page.rect.width, image_size["height"] / page.rect.height
+    )
+    return page.get_pixmap(matrix=matrix, colorspace=colorspace)
+
+
+def pixmap_to_array(pix: pymupdf.Pixmap) -> np.ndarray:
+    # view on the pixmap samples, no copy is made until the pages are stacked
+    return np.frombuffer(pix.samples_mv, dtype=np.uint8).reshape(pix.height, pix.width, pix.n)
 
-    os.remove(filepath)
 
-    return predict_collate_fn([images])
+def pixmap_to_image(pix: pymupdf.Pixmap) -> Image.Image:
+    if pix.n == 1:
+        return Image.frombytes("L", (pix.width, pix.height), pix.samples).convert("RGB")
+    return Image.frombytes("RGB", (pix.width, pix.height), pix.samples)
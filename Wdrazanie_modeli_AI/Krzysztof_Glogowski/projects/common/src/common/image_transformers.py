@@ -1,9 +1,12 @@
+import json
 from copy import deepcopy
+from functools import lru_cache
 from typing import Any, Callable
 
 import albumentations as A
 import numpy as np
 import torch
+import torch.nn.functional as F
 from PIL import Image
 
 default_transformation_config = {
@@ -18,11 +21,7 @@ default_transformation_config = {
 def transform(
     config: dict[str, Any] | None, seed: int | None = None
 ) -> Callable[[Image.Image], torch.Tensor]:
-    if config is not None:
-        for key, value in default_transformation_config.items():
-            config.setdefault(key, value)
-    if config is None:
-        config = deepcopy(default_transformation_config)
+    config = _with_defaults(config)
 
     base_transform = A.Compose(
         [
@@ -40,3 +39,68 @@ def transform(
     )
 
     return lambda img: base_transform(image=np.array(img))["image"]
+
+
+def cached_transform(config: dict[str, Any] | None) -> Callable[[Image.Image], torch.Tensor]:
+    """Shares the pipeline between equal configs, unless it augments.
+
+    Augmenting pipelines carry random state, so every caller gets its own one.
+    """
+    if has_augmentations(config):
+        return transform(config)
+    return _deterministic_transform(json.dumps(_with_defaults(config), sort_keys=True))
+
+
+@lru_cache(maxsize=16)
+def _deterministic_transform(config_key: str) -> Callable[[Image.Image], torch.Tensor]:
+    return transform(json.loads(config_key))
+
+
+def batch_transform(
+    config: dict[str, Any] | None,
+) -> Callable[[list[np.ndarray], torch.device], torch.Tensor]:
+    """Resizes and normalizes a stack of HWC uint8 pages without augmentations."""
+    config = _with_defaults(config)
+    height, width = config["image_size"]["height"], config["image_size"]["width"]
+    mean = torch.tensor(config["normalization"]["mean"]).view(1, -1, 1, 1)
+    std = torch.tensor(config["normalization"]["std"]).view(1, -1, 1, 1)
+
+    def _transform(pages: list[np.ndarray], device: torch.device) -> torch.Tensor:
+        resized = torch.empty((len(pages), mean.size(1), height, width), dtype=torch.uint8)
+        for indices in _group_by_shape(pages).values():
+            # NHWC buffer viewed as NCHW (channels last), so no copy is made before resizing
+            stack = torch.from_numpy(np.stack([pages[i] for i in indices])).permute(0, 3, 1, 2)
+            if stack.shape[-2:] != (height, width):
+                stack = F.interpolate(
+                    stack, size=(height, width), mode="bilinear", align_corners=False
+                )
+            resized[indices] = stack
+        images = resized.to(device).float().div_(255)
+        return images.sub_(mean.to(device)).div_(std.to(device))
+
+    return _transform
+
+
+def get_image_size(config: dict[str, Any] | None) -> dict[str, int]:
+    return _with_defaults(config)["image_size"]
+
+
+def has_augmentations(config: dict[str, Any] | None) -> bool:
+    config = _with_defaults(config)
+    return any(
+        config[key] > 0
+        for key in ("gaussian_blur_proba", "random_brightness_contrast_proba", "to_gray_proba")
+    )
+
+
+def _group_by_shape(pages: list[np.ndarray]) -> dict[tuple[int, ...], list[int]]:
+    groups: dict[tuple[int, ...], list[int]] = {}
+    for i, page in enumerate(pages):
+        groups.setdefault(page.shape, []).append(i)
+    return groups
+
+
+def _with_defaults(config: dict[str, Any] | None) -> dict[str, Any]:
+    if config is None:
+        return deepcopy(default_transformation_config)
+    return {**deepcopy(default_transformation_config), **config}
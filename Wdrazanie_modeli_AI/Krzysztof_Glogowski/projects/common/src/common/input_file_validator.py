@@ -1,36 +1,66 @@
+import queue
+from contextlib import contextmanager
 from io import BufferedIOBase
+from typing import Iterator
 
 from magic import Magic
 
+PDF_HEADER = b"%PDF-"
+
+
+class MagicPool:
+    """Thread-safe pool of preloaded libmagic handles, loading the database once per handle."""
 
-class InputFileValidator:
     def __init__(self):
+        self._handles: queue.SimpleQueue[Magic] = queue.SimpleQueue()
+
+    @contextmanager
+    def handle(self) -> Iterator[Magic]:
+        try:
+            magic = self._handles.get_nowait()
+        except queue.Empty:
+            magic = Magic(mime=True)
+        try:
+            yield magic
+        finally:
+            self._handles.put(magic)
+
+
+_magic_pool = MagicPool()
+
+
+class InputFileValidator:
+    def __init__(self, magic_pool: MagicPool = _magic_pool):
+        self.magic_pool = magic_pool
         self.supported_content_types = [
             "application/pdf",
         ]
         self.max_file_size = 2 * 1024 * 1024  # 2 MB
+        self.sample_size = 2048
 
     def validate(self, file_obj: BufferedIOBase) -> list[str]:
-        errors: list[str] = []
-        self._validate_content_type(file_obj, errors)
-        self._validate_size(file_obj, errors)
-        return errors
-
-    def _validate_content_type(self, file_obj: BufferedIOBase, error_collector: list[str]) -> None:
-        sample = file_obj.read(2048)
-        file_obj.seek(0)
-        mime = Magic(mime=True)
-        content_type = mime.from_buffer(sample)
-        if content_type not in self.supported_content_types:
-            error_collector.append(f"Unsupported content type: {content_type}")
-
-    def _validate_size(self, file_obj, error_collector: list[str]):
+        sample = file_obj.read(self.sample_size)
         file_obj.seek(0, 2)
         size = file_obj.tell()
         file_obj.seek(0)
+        return self.validate_content_type(sample) + self.validate_size(size)
+
+    def validate_content_type(self, sample: bytes) -> list[str]:
+        content_type = self.detect_content_type(sample)
+        if content_type not in self.supported_content_types:
+            return [f"Unsupported content type: {content_type}"]
+        return []
+
+    def validate_size(self, size: int) -> list[str]:
         if size <= 0:
-            error_collector.append("File size must be greater than 0")
+            return ["File size must be greater than 0"]
         elif size > self.max_file_size:
-            error_collector.append(
-                f"File size exceeds the maximum limit of {self.max_file_size} bytes"
-            )
+            return [f"File size exceeds the maximum limit of {self.max_file_size} bytes"]
+        return []
+
+    def detect_content_type(self, sample: bytes) -> str:
+        # libmagic reports application/pdf for this header as well, skip loading it
+        if sample.startswith(PDF_HEADER):
+            return "application/pdf"
+        with self.magic_pool.handle() as magic:
+            return magic.from_buffer(sample)
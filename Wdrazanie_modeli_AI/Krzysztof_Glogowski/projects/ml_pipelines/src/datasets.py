@@ -1,5 +1,6 @@
 import ast
 import io
+from dataclasses import dataclass
 from typing import Any, Callable
 
 import albumentations as A
@@ -8,12 +9,21 @@ import pandas as pd
 import torch
 from fsspec import AbstractFileSystem
 from kedro.io import AbstractDataset, DatasetError
+from kedro.io.core import get_protocol_and_path
 from kedro_datasets.pickle import PickleDataset
 from PIL import Image
 from torch import nn, ScriptModule
 from torch.utils.data import Dataset
 
 from ml_pipelines.file_system_utils import get_filesystem
+from ml_pipelines.logger import logger
+from ml_pipelines.model_export import (
+    export_model,
+    export_onnx,
+    is_onnx_exportable,
+    load_exported_model,
+    ModelVariant,
+)
 
 
 class ImageSequencesDataset(Dataset, AbstractDataset[pd.DataFrame, "ImageSequencesDataset"]):
@@ -87,6 +97,70 @@ class ImageSequencesDataset(Dataset, AbstractDataset[pd.DataFrame, "ImageSequenc
         return self
 
 
+@dataclass
+class PageEmbeddings:
+    embeddings: np.ndarray
+    lengths: np.ndarray
+    labels: np.ndarray
+
+
+class PageEmbeddingsDataset(Dataset, AbstractDataset[PageEmbeddings, "PageEmbeddingsDataset"]):
+    """Backbone embeddings of every page, memory-mapped and indexed by document."""
+
+    def __init__(
+        self,
+        filepath: str,
+        fs_args: dict | None = None,
+        credentials: dict | None = None,
+    ):
+        super().__init__()
+        self.directory_path = filepath.rstrip("/")
+        self.embeddings: np.ndarray | None = None
+        self.offsets: np.ndarray | None = None
+        self.labels: np.ndarray | None = None
+        self._protocol, _ = get_protocol_and_path(self.directory_path)
+        self._fs: AbstractFileSystem = get_filesystem(self.directory_path, fs_args, credentials)
+
+    # Kedro Dataset methods
+    def load(self) -> "PageEmbeddingsDataset":
+        self.embeddings = self._load_array("embeddings.npy", mmap_mode="r")
+        lengths = self._load_array("lengths.npy")
+        self.offsets = np.concatenate([[0], np.cumsum(lengths)])
+        self.labels = self._load_array("labels.npy")
+        return self
+
+    def save(self, data: PageEmbeddings) -> None:
+        for name, array in [
+            ("embeddings.npy", data.embeddings),
+            ("lengths.npy", data.lengths),
+            ("labels.npy", data.labels),
+        ]:
+            with self._fs.open(f"{self.directory_path}/{name}", "wb") as f:
+                np.save(f, array)
+
+    def _describe(self) -> dict[str, Any]:
+        return {"type": "PageEmbeddingsDataset", "directory_path": str(self.directory_path)}
+
+    # PyTorch Dataset methods
+    def __len__(self) -> int:
+        return 0 if self.labels is None else len(self.labels)
+
+    def __getitem__(self, idx: int) -> tuple[torch.Tensor, int]:
+        if self.embeddings is None:
+            raise DatasetError("Dataset is not loaded. Call load() first.")
+        start, end = self.offsets[idx], self.offsets[idx + 1]
+        # copied out of the memory map, only the pages of this document are read
+        return torch.from_numpy(np.array(self.embeddings[start:end])), int(self.labels[idx])
+
+    # helpers
+    def _load_array(self, name: str, mmap_mode: str | None = None) -> np.ndarray:
+        path = f"{self.directory_path}/{name}"
+        if self._protocol == "file":
+            return np.load(path, mmap_mode=mmap_mode)
+        with self._fs.open(path, "rb") as f:
+            return np.load(io.BytesIO(f.read()))
+
+
 class OptionalPickleDataset(PickleDataset):
     def _load(self):
         try:
@@ -102,19 +176,20 @@ class PyTorchJitDataset(AbstractDataset[nn.Module, ScriptModule]):
         fs_args: dict | None = None,
         credentials: dict | None = None,
         transform: Callable[[Image.Image], torch.Tensor] | None = None,
+        variant: ModelVariant = "fp32",
     ):
         super().__init__()
         self.model_path = filepath
         self.transform_fn = transform
+        self.variant = variant
         self._fs: AbstractFileSystem = get_filesystem(self.model_path, fs_args, credentials)
 
     def load(self) -> ScriptModule:
         with self._fs.open(self.model_path, "rb") as f:
-            buffer = io.BytesIO(f.read())
-        return torch.jit.load(buffer)
+            return load_exported_model(f.read(), self.variant)
 
     def save(self, data: nn.Module) -> None:
-        scripted_model = torch.jit.script(data)
+        scripted_model = export_model(data, self.variant)
         buffer = io.BytesIO()
         torch.jit.save(scripted_model, buffer)
         buffer.seek(0)
@@ -122,4 +197,43 @@ class PyTorchJitDataset(AbstractDataset[nn.Module, ScriptModule]):
             f.write(buffer.read())
 
     def _describe(self) -> dict[str, Any]:
-        return {"type": "PyTorchJitDataset", "model_path": str(self.model_path)}
+        return {
+            "type": "PyTorchJitDataset",
+            "model_path": str(self.model_path),
+            "variant": self.variant,
+        }
+
+
+class OnnxModelDataset(AbstractDataset[nn.Module, bytes]):
+    def __init__(
+        self,
+        filepath: str,
+        fs_args: dict | None = None,
+        credentials: dict | None = None,
+        opset_version: int = 17,
+    ):
+        super().__init__()
+        self.model_path = filepath
+        self.opset_version = opset_version
+        self._fs: AbstractFileSystem = get_filesystem(self.model_path, fs_args, credentials)
+
+    def load(self) -> bytes:
+        with self._fs.open(self.model_path, "rb") as f:
+            return f.read()
+
+    def save(self, data: nn.Module) -> None:
+        if not is_onnx_exportable(data):
+            logger.warning(
+                f"Skipping the ONNX export to {self.model_path}, the model needs the avg encoder."
+            )
+            return
+        content = export_onnx(data, opset_version=self.opset_version)
+        with self._fs.open(self.model_path, "wb") as f:
+            f.write(content)
+
+    def _describe(self) -> dict[str, Any]:
+        return {
+            "type": "OnnxModelDataset",
+            "model_path": str(self.model_path),
+            "opset_version": self.opset_version,
+        }
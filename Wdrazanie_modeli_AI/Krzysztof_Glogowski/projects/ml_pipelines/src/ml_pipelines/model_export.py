@@ -0,0 +1,93 @@
+import io
+from typing import Literal
+
+import torch
+from torch import nn, ScriptModule
+from torch.ao.quantization import quantize_dynamic
+
+from ml_pipelines.models import AvgImageEncoder, DocumentClassifier
+
+# fp32 is the plain scripted model, frozen is additionally frozen, int8 also quantizes Linear
+# layers dynamically; the training pipeline saves and compares every variant
+ModelVariant = Literal["fp32", "frozen", "int8"]
+MODEL_VARIANTS: tuple[ModelVariant, ...] = ("fp32", "frozen", "int8")
+
+# exported methods used by web_app, freezing drops everything else
+PRESERVED_METHODS = ["predict_proba", "embed_pages", "classify_page_embeddings"]
+
+
+def export_model(model: nn.Module, variant: ModelVariant = "fp32") -> ScriptModule:
+    if variant not in MODEL_VARIANTS:
+        raise ValueError(f"Unknown model variant {variant}, expected one of {MODEL_VARIANTS}.")
+    if variant == "fp32":
+        return torch.jit.script(model)
+
+    model = model.cpu().eval()
+    if variant == "int8":
+        # ViT backbone and MLP head are dominated by Linear layers
+        model = quantize_dynamic(model, {nn.Linear}, dtype=torch.qint8)
+    scripted_model = torch.jit.script(model)
+    # optimized only after loading, see load_exported_model, a saved optimize_for_inference graph
+    # of a ViT fails to load with "required keyword attribute 'value' is undefined"
+    return torch.jit.freeze(scripted_model, preserved_attrs=PRESERVED_METHODS)
+
+
+def load_exported_model(content: bytes, variant: ModelVariant = "fp32") -> ScriptModule:
+    """Loads a model saved by export_model the way web_app does, frozen variants are optimized
+    for inference once loaded."""
+    model = torch.jit.load(io.BytesIO(content))
+    if variant == "fp32":
+        return model
+    return torch.jit.optimize_for_inference(model, other_methods=PRESERVED_METHODS)
+
+
+def is_onnx_exportable(model: nn.Module) -> bool:
+    return isinstance(getattr(model, "encoder", None), AvgImageEncoder)
+
+
+class OnnxExportableClassifier(nn.Module):
+    """Computes the per document mean of AvgImageEncoder with a page mask instead of a split,
+    so the variable number of pages per document traces into a static ONNX graph."""
+
+    def __init__(self, model: DocumentClassifier):
+        super().__init__()
+        if not is_onnx_exportable(model):
+            raise ValueError("Only models with the avg encoder can be exported to ONNX.")
+        self.backbone = model.encoder.backbone
+        self.classification_head = model.classification_head
+
+    def forward(self, x: torch.Tensor, lengths: torch.Tensor) -> torch.Tensor:
+        embeddings = self.backbone(x)
+        ends = torch.cumsum(lengths, dim=0)
+        starts = ends - lengths
+        pages = torch.arange(x.size(0), device=x.device).unsqueeze(0)
+        mask = (pages >= starts.unsqueeze(1)) & (pages < ends.unsqueeze(1))
+        document_embeddings = (mask.to(embeddings.dtype) @ embeddings) / lengths.unsqueeze(1).to(
+            embeddings.dtype
+        )
+        return self.classification_head(document_embeddings)
+
+
+def export_onnx(
+    model: DocumentClassifier, image_size: tuple[int, int] = (224, 224), opset_version: int = 17
+) -> bytes:
+    exportable_model = OnnxExportableClassifier(model).cpu().eval()
+    # two single page documents, so neither axis gets specialized to a size of 1
+    images = torch.zeros((2, 3, *image_size))
+    lengths = torch.tensor([1, 1])
+    buffer = io.BytesIO()
+    torch.onnx.export(
+        exportable_model,
+        (images, lengths),
+        buffer,
+        input_names=["images", "lengths"],
+        output_names=["logits"],
+        dynamic_axes={
+            "images": {0: "pages"},
+            "lengths": {0: "documents"},
+            "logits": {0: "documents"},
+        },
+        opset_version=opset_version,
+        dynamo=False,
+    )
+    return buffer.getvalue()
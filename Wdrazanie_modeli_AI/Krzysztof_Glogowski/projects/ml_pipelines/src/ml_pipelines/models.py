@@ -14,9 +14,11 @@ class AvgImageEncoder(nn.Module):
         self.output_size = backbone.num_features
 
     def forward(self, x: torch.Tensor, lengths: torch.Tensor) -> torch.Tensor:
-        output = self.backbone(x)
-        lengths: list[int] = lengths.tolist()
-        sequences = torch.split(output, lengths, dim=0)
+        return self.pool(self.backbone(x), lengths)
+
+    def pool(self, embeddings: torch.Tensor, lengths: torch.Tensor) -> torch.Tensor:
+        lengths_list: list[int] = lengths.tolist()
+        sequences = torch.split(embeddings, lengths_list, dim=0)
         batch_output = torch.stack([torch.mean(sec, dim=0) for sec in sequences])
 
         return batch_output
@@ -49,12 +51,14 @@ class RecursiveImageEncoder(nn.Module):
         self.output_size = hidden_size
 
     def forward(self, x: torch.Tensor, lengths: torch.Tensor):
+        return self.pool(self.backbone(x), lengths)
+
+    def pool(self, embeddings: torch.Tensor, lengths: torch.Tensor) -> torch.Tensor:
+        lengths_list: list[int] = lengths.tolist()
         positional_embeddings = self._get_positional_embeddings(
-            max(lengths), self.embedding_dim, x.device
+            max(lengths_list), self.embedding_dim, embeddings.device
         )
-        output = self.backbone(x)
-        lengths_list: list[int] = lengths.tolist()
-        sequences = torch.split(output, lengths_list, dim=0)
+        sequences = torch.split(embeddings, lengths_list, dim=0)
         padded_sequences = pad_sequence(list(sequences), batch_first=True)
         padded_sequences += positional_embeddings
         packed_seqs = pack_padded_sequence(
@@ -136,6 +140,32 @@ class DocumentClassifier(nn.Module):
         output = self.forward(x, lengths).squeeze(0)
         return softmax(output, dim=0).cpu()
 
+    @torch.jit.export
+    def embed_pages(self, x: torch.Tensor) -> torch.Tensor:
+        return self.encoder.backbone(x)
+
+    @torch.jit.export
+    def classify_page_embeddings(
+        self, embeddings: torch.Tensor, lengths: torch.Tensor
+    ) -> torch.Tensor:
+        output = self.encoder.pool(embeddings, lengths)
+        return self.classification_head(output)
+
+
+class PageEmbeddingsClassifier(nn.Module):
+    """Trains the head of a DocumentClassifier on precomputed embeddings of its frozen backbone."""
+
+    def __init__(self, model: DocumentClassifier):
+        super().__init__()
+        self.model = model
+
+    @property
+    def encoder(self) -> AvgImageEncoder | RecursiveImageEncoder:
+        return self.model.encoder
+
+    def forward(self, embeddings: torch.Tensor, lengths: torch.Tensor) -> torch.Tensor:
+        return self.model.classify_page_embeddings(embeddings, lengths)
+
 
 @dataclass
 class ModelState:
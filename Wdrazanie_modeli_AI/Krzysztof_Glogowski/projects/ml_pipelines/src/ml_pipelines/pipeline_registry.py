@@ -5,7 +5,9 @@ from kedro.pipeline import Pipeline
 from ml_pipelines.pipelines.data_preprocessing.pipeline import (
     create_data_preprocessing_pipeline,
 )
+from ml_pipelines.pipelines.nn_head_training import create_nn_head_training_pipeline
 from ml_pipelines.pipelines.nn_model_inference import create_nn_model_inference_pipeline
+from ml_pipelines.pipelines.nn_model_onnx_export import create_nn_model_onnx_export_pipeline
 from ml_pipelines.pipelines.nn_model_training import create_nn_model_training_pipeline
 
 
@@ -20,5 +22,7 @@ def register_pipelines() -> dict[str, Pipeline]:
     pipelines["__default__"] = create_nn_model_training_pipeline()
     pipelines["data_preprocessing"] = create_data_preprocessing_pipeline()
     pipelines["nn_model_training"] = create_nn_model_training_pipeline()
+    pipelines["nn_head_training"] = create_nn_head_training_pipeline()
     pipelines["nn_model_inference"] = create_nn_model_inference_pipeline()
+    pipelines["nn_model_onnx_export"] = create_nn_model_onnx_export_pipeline()
     return pipelines
@@ -6,11 +6,11 @@ from io import BytesIO
 from pathlib import Path
 
 import pandas as pd
-from PIL import Image
 from fsspec import AbstractFileSystem
 from pymupdf import Page, pymupdf
 from sklearn.model_selection import train_test_split
 
+from common.converters import pixmap_to_image, render_page
 from common.input_file_validator import InputFileValidator
 from ml_pipelines.file_system_utils import get_filesystem
 from ml_pipelines.logger import logger
@@ -21,7 +21,9 @@ def convert_pdf_jpgs(
     output_dir: str,
     fs_args: dict,
     credentials: dict,
+    render: dict | None = None,
 ) -> pd.DataFrame:
+    render = render or {}
     _fs: AbstractFileSystem = get_filesystem(output_dir, fs_args, credentials)
 
     output: dict = {}
@@ -40,7 +42,9 @@ def convert_pdf_jpgs(
             with pymupdf.open(stream=file, filetype="pdf") as pdf:
                 for i in range(len(pdf)):
                     page = pdf.load_page(i)
-                    img_buffer = __convert_pdf_page_to_img_buffer(page)
+                    img_buffer = __convert_pdf_page_to_img_buffer(
+                        page, render.get("image_size"), render.get("grayscale", False)
+                    )
                     image_path = f"{output_dir}/{jpgs_dir_name}/{jpgs_dir_name}_{i}.jpg"
                     image_paths.append(image_path)
 
@@ -73,9 +77,11 @@ def __convert_pdf_name_to_dir_name(pdf_path: str) -> str:
     return pdf_stem.replace(" ", "_").lower()
 
 
-def __convert_pdf_page_to_img_buffer(page: Page) -> BytesIO:
-    pix = page.get_pixmap()
-    image = Image.frombytes("RGB", (pix.width, pix.height), pix.samples)
+def __convert_pdf_page_to_img_buffer(
+    page: Page, image_size: dict[str, int] | None = None, grayscale: bool = False
+) -> BytesIO:
+    pix = render_page(page, image_size, grayscale)
+    image = pixmap_to_image(pix)
     img_buffer = BytesIO()
     image.save(img_buffer, format="JPEG")
     img_buffer.seek(0)
@@ -21,6 +21,7 @@ def create_data_preprocessing_pipeline() -> Pipeline:
                     "params:jpgs_dir",
                     "params:fs_args",
                     "params:credentials",
+                    "params:render",
                 ],
                 outputs="dpp_all_jpgs",
                 func=convert_pdf_jpgs,
@@ -0,0 +1,10 @@
+"""
+This is a pipeline 'nn_head_training'
+training only the classification head on precomputed page embeddings
+"""
+
+from .pipeline import create_nn_head_training_pipeline
+
+__all__ = ["create_nn_head_training_pipeline"]
+
+__version__ = "0.1"
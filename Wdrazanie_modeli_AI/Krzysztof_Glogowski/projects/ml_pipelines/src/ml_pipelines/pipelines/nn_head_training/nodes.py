@@ -0,0 +1,73 @@
+"""
+This is a pipeline 'nn_head_training'
+training only the classification head on precomputed page embeddings
+"""
+
+from typing import Any, Callable
+
+import numpy as np
+import torch
+from PIL import Image
+from torch import nn
+from torch.utils.data import DataLoader
+from tqdm import tqdm
+
+from datasets import ImageSequencesDataset, PageEmbeddings, PageEmbeddingsDataset
+from common.collators import collate_fn
+from common.torch_utils import get_device, get_model_device
+from ml_pipelines.logger import logger
+from ml_pipelines.models import DocumentClassifier, PageEmbeddingsClassifier
+from ml_pipelines.pipelines.nn_model_training.nodes import evaluate_on_test, train
+
+
+def extract_page_embeddings(
+    model: DocumentClassifier,
+    dataset: ImageSequencesDataset,
+    image_transformer: Callable[[Image.Image], torch.Tensor],
+    batch_size: int,
+) -> PageEmbeddings:
+    dataloader = DataLoader(
+        dataset.with_transform(image_transformer), batch_size=batch_size, collate_fn=collate_fn
+    )
+    model.to(get_device())
+    model.eval()
+    model_device = get_model_device(model)
+    embeddings, lengths, labels = [], [], []
+    with torch.no_grad():
+        for items, items_lengths, items_labels in tqdm(dataloader):
+            embeddings.append(model.embed_pages(items.to(model_device)).cpu().numpy())
+            lengths.append(items_lengths.numpy())
+            labels.append(items_labels.numpy())
+    page_embeddings = PageEmbeddings(
+        embeddings=np.concatenate(embeddings).astype(np.float32),
+        lengths=np.concatenate(lengths),
+        labels=np.concatenate(labels),
+    )
+    logger.info(
+        f"Extracted {len(page_embeddings.embeddings)} page embeddings "
+        f"of {len(page_embeddings.labels)} documents."
+    )
+    return page_embeddings
+
+
+def build_page_embeddings_dataloader(
+    dataset: PageEmbeddingsDataset, batch_size: int, shuffle: bool = False
+) -> DataLoader:
+    return DataLoader(dataset, batch_size=batch_size, shuffle=shuffle, collate_fn=collate_fn)
+
+
+def train_head(
+    model: DocumentClassifier,
+    train_dataloader: DataLoader,
+    valid_dataloader: DataLoader,
+    criterion: nn.Module,
+    config: dict[str, Any],
+) -> DocumentClassifier:
+    head = train(
+        PageEmbeddingsClassifier(model), train_dataloader, valid_dataloader, criterion, config
+    )
+    return head.model
+
+
+def evaluate_head_on_test(model: DocumentClassifier, dataloader: DataLoader, criterion: nn.Module):
+    evaluate_on_test(PageEmbeddingsClassifier(model), dataloader, criterion)
@@ -0,0 +1,86 @@
+"""
+This is a pipeline 'nn_head_training'
+training only the classification head on precomputed page embeddings
+"""
+
+from functools import update_wrapper, partial
+
+from kedro.pipeline import node, Pipeline, pipeline  # noqa
+
+from ml_pipelines.pipelines.nn_head_training.nodes import (
+    build_page_embeddings_dataloader,
+    evaluate_head_on_test,
+    extract_page_embeddings,
+    train_head,
+)
+from ml_pipelines.pipelines.nn_model_training import create_nn_model_training_pipeline
+
+
+def create_nn_head_training_pipeline(**kwargs) -> Pipeline:
+    # model building, export and comparison are shared with the full training pipeline
+    shared_pipeline = create_nn_model_training_pipeline().only_nodes(
+        "build_model_node",
+        "build_evaluate_image_to_tensor_transformer_node",
+        "build_test_dataloader_node",
+        "build_criterion_node",
+        "compare_model_variants_node",
+        "save_trained_model_node",
+    )
+    extraction_nodes = [
+        node(
+            name=f"extract_{split_type}_page_embeddings_node",
+            inputs=[
+                "model",
+                f"nn_data_{split_type}",
+                "evaluate_image_to_tensor_transformer",
+                "params:batch_size",
+            ],
+            outputs=f"nn_features_{split_type}",
+            func=extract_page_embeddings,
+        )
+        for split_type in ["train", "val", "test"]
+    ]
+    return shared_pipeline + pipeline(
+        [
+            *extraction_nodes,
+            node(
+                name="build_train_features_dataloader_node",
+                inputs=["nn_features_train", "params:batch_size"],
+                outputs="train_features_loader",
+                func=update_wrapper(
+                    partial(build_page_embeddings_dataloader, shuffle=True),
+                    build_page_embeddings_dataloader,
+                ),
+            ),
+            node(
+                name="build_val_features_dataloader_node",
+                inputs=["nn_features_val", "params:batch_size"],
+                outputs="val_features_loader",
+                func=build_page_embeddings_dataloader,
+            ),
+            node(
+                name="build_test_features_dataloader_node",
+                inputs=["nn_features_test", "params:batch_size"],
+                outputs="test_features_loader",
+                func=build_page_embeddings_dataloader,
+            ),
+            node(
+                name="train_head_node",
+                inputs=[
+                    "model",
+                    "train_features_loader",
+                    "val_features_loader",
+                    "criterion",
+                    "params:train.hyperparameters",
+                ],
+                outputs="best_model",
+                func=train_head,
+            ),
+            node(
+                name="evaluate_head_node",
+                inputs=["best_model", "test_features_loader", "criterion"],
+                outputs=None,
+                func=evaluate_head_on_test,
+            ),
+        ]
+    )
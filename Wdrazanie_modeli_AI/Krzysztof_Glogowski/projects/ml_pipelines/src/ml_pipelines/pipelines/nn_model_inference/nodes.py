@@ -3,7 +3,7 @@ This is a boilerplate pipeline 'nn_model_inference'
 generated using Kedro 0.19.13
 """
 
-import time
+from io import BytesIO
 
 import numpy as np
 import timm
@@ -25,30 +25,25 @@ from ml_pipelines.file_system_utils import get_filesystem
 from ml_pipelines.logger import logger
 
 
-def download_file(filepath: str, fs_args: dict, credentials: dict) -> str:
-    local_path = f"projects/ml_pipelines/data/01_raw/inference/{int(time.time() * 1000)}.pdf"
+def download_file(filepath: str, fs_args: dict, credentials: dict) -> bytes:
     _fs: AbstractFileSystem = get_filesystem(filepath, fs_args, credentials)
 
     with _fs.open(filepath, mode="rb", credentials=credentials, fs_args=fs_args) as remote_file:
-        with open(local_path, "wb") as local_file:
-            local_file.write(remote_file.read())
+        return remote_file.read()
 
-    return local_path
 
-
-def validate_file(filepath: str) -> str:
-    with open(filepath, mode="rb") as file:
-        validator = InputFileValidator()
-        errors = validator.validate(file)
+def validate_file(document: bytes) -> bytes:
+    validator = InputFileValidator()
+    errors = validator.validate(BytesIO(document))
     if errors:
         raise ValueError(f"File validation failed: {errors}")
-    return filepath
+    return document
 
 
 def convert_pdf_to_model_input(
-    filepath: str, transformer_config: dict | None = None
+    document: bytes, transformer_config: dict | None = None
 ) -> tuple[torch.Tensor, torch.Tensor]:
-    return pdf_to_model_input(filepath, transformer_config)
+    return pdf_to_model_input(document, transformer_config)
 
 
 def build_model(model_state_dict: dict) -> torch.nn.Module:
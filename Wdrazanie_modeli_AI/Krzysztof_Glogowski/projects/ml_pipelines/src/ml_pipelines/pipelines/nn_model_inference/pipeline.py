@@ -21,18 +21,18 @@ def create_nn_model_inference_pipeline(**kwargs) -> Pipeline:
             node(
                 name="download_pdf_node",
                 inputs=["params:filepath", "params:fs_args", "params:credentials"],
-                outputs="local_path",
+                outputs="document",
                 func=download_file,
             ),
             node(
                 name="validate_pdf_node",
-                inputs=["local_path"],
-                outputs="validated_local_path",
+                inputs=["document"],
+                outputs="validated_document",
                 func=validate_file,
             ),
             node(
                 name="convert_pdf_to_model_input_node",
-                inputs=["validated_local_path"],
+                inputs=["validated_document"],
                 outputs="model_input",
                 func=convert_pdf_to_model_input,
             ),
@@ -0,0 +1,10 @@
+"""
+This is a pipeline 'nn_model_onnx_export'
+exporting the trained model to ONNX for the onnxruntime backend of web_app
+"""
+
+from .pipeline import create_nn_model_onnx_export_pipeline
+
+__all__ = ["create_nn_model_onnx_export_pipeline"]
+
+__version__ = "0.1"
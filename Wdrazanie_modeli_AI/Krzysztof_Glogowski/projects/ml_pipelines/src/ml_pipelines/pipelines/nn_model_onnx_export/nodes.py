@@ -0,0 +1,13 @@
+"""
+This is a pipeline 'nn_model_onnx_export'
+exporting the trained model to ONNX for the onnxruntime backend of web_app
+"""
+
+from ml_pipelines.models import DocumentClassifier
+from ml_pipelines.pipelines.nn_model_inference.nodes import build_model
+
+
+def build_trained_model(model_state_dict: dict) -> DocumentClassifier:
+    model = build_model(model_state_dict)
+    model.load_state_dict(model_state_dict["model_state_dict"])
+    return model.cpu().eval()
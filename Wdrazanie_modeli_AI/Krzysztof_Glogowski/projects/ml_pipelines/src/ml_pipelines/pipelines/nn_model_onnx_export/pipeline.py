@@ -0,0 +1,22 @@
+"""
+This is a pipeline 'nn_model_onnx_export'
+exporting the trained model to ONNX for the onnxruntime backend of web_app
+"""
+
+from kedro.pipeline import node, Pipeline, pipeline  # noqa
+
+from ml_pipelines.pipelines.nn_model_onnx_export.nodes import build_trained_model
+
+
+def create_nn_model_onnx_export_pipeline(**kwargs) -> Pipeline:
+    return pipeline(
+        [
+            node(
+                name="export_onnx_model_node",
+                inputs=["trained_model_state"],
+                # models with an encoder other than avg are skipped when the dataset is saved
+                outputs="trained_model_onnx",
+                func=build_trained_model,
+            ),
+        ]
+    )
@@ -3,6 +3,9 @@ This is a boilerplate pipeline 'nn_model_training'
 generated using Kedro 0.19.13
 """
 
+import copy
+import io
+import time
 from dataclasses import asdict
 from typing import Any, Callable, Literal
 
@@ -28,6 +31,7 @@ from ml_pipelines.models import (
 )
 from common.torch_utils import get_device, freez_model, get_model_device
 from ml_pipelines.logger import logger
+from ml_pipelines.model_export import MODEL_VARIANTS, export_model, load_exported_model
 
 
 def build_model(
@@ -231,6 +235,52 @@ def _log_metrics(
     mlflow.log_metric(f"{stage}_f1", f1, step=epoch)
 
 
+def compare_model_variants(model: DocumentClassifier, dataloader: DataLoader):
+    cpu_model = copy.deepcopy(model).cpu().eval()
+    classification_report = ClassificationReport(torch.device("cpu"))
+    comparison = {}
+    for variant in MODEL_VARIANTS:
+        buffer = io.BytesIO()
+        torch.jit.save(export_model(copy.deepcopy(cpu_model), variant), buffer)
+        # benchmarked as deployed, a variant that cannot be loaded fails the comparison
+        comparison[variant] = _benchmark_variant(
+            load_exported_model(buffer.getvalue(), variant),
+            buffer.getbuffer().nbytes,
+            dataloader,
+            classification_report,
+        )
+        logger.info(f"Model variant {variant}: {comparison[variant]}")
+        for metric, value in comparison[variant].items():
+            mlflow.log_metric(f"{variant}_{metric}", value)
+    mlflow.log_dict(comparison, "model_variants.json")
+
+
+def _benchmark_variant(
+    model: torch.jit.ScriptModule,
+    size: int,
+    dataloader: DataLoader,
+    classification_report: ClassificationReport,
+) -> dict[str, float]:
+    y_true = torch.empty(0)
+    y_pred = torch.empty(0)
+    inference_time = 0.0
+    with torch.no_grad():
+        for items, lengths, labels in tqdm(dataloader):
+            start = time.perf_counter()
+            output = model(items, lengths)
+            inference_time += time.perf_counter() - start
+            _, labels_pred = output.max(dim=1)
+            y_true = torch.cat((y_true, labels), dim=0)
+            y_pred = torch.cat((y_pred, labels_pred), dim=0)
+    accuracy, precision, recall, f1 = classification_report.generate(y_pred, y_true)
+    return {
+        "test_accuracy": accuracy,
+        "test_f1": f1,
+        "latency_ms_per_document": 1000 * inference_time / len(dataloader.dataset),
+        "size_mb": size / 2**20,
+    }
+
+
 def save_model(model: DocumentClassifier, config: dict[str, Any]):
     model.cpu()
     model_state = ModelState(
@@ -241,4 +291,5 @@ def save_model(model: DocumentClassifier, config: dict[str, Any]):
     model_state_dict = asdict(model_state)
     mlflow.log_dict(model_state_dict, "model_state.json")
 
-    return model_state_dict, model
+    # every catalog entry exports its own variant of the model, one per MODEL_VARIANTS
+    return model_state_dict, *[model for _ in MODEL_VARIANTS]
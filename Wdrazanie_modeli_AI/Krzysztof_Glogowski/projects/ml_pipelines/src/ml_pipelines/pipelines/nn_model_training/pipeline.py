@@ -8,12 +8,14 @@ from functools import update_wrapper, partial
 from kedro.pipeline import node, Pipeline, pipeline  # noqa
 
 from common.collators import collate_fn
+from ml_pipelines.model_export import MODEL_VARIANTS
 from ml_pipelines.pipelines.nn_model_training.nodes import (
     build_model,
     build_image_transformer,
     build_dataloader,
     train,
     build_criterion,
+    compare_model_variants,
     evaluate_on_test,
     save_model,
 )
@@ -101,10 +103,22 @@ def create_nn_model_training_pipeline(**kwargs) -> Pipeline:
                 outputs=None,
                 func=evaluate_on_test,
             ),
+            node(
+                name="compare_model_variants_node",
+                inputs=["best_model", "test_data_loader"],
+                outputs=None,
+                func=compare_model_variants,
+            ),
             node(
                 name="save_trained_model_node",
                 inputs=["best_model", "params:model"],
-                outputs=["trained_model_state", "trained_model"],
+                outputs=[
+                    "trained_model_state",
+                    *[
+                        "trained_model" if variant == "fp32" else f"trained_model_{variant}"
+                        for variant in MODEL_VARIANTS
+                    ],
+                ],
                 func=save_model,
             ),
         ]
@@ -0,0 +1,55 @@
+"""Per page preprocessing latency of rebuilt, cached and batched image pipelines.
+
+Run from projects/web_app/src:
+    PYTHONPATH=.:../../common/src python -m tests.benchmark.benchmark_image_transformers
+"""
+
+import timeit
+from pathlib import Path
+
+import pymupdf
+import torch
+from PIL import Image
+
+from common.converters import pixmap_to_array
+from common.image_transformers import batch_transform, cached_transform, transform
+
+RESOURCES_DIR = Path(__file__).parents[1] / "resources"
+REPEATS = 200
+
+
+def load_pixmaps(path: Path) -> list[pymupdf.Pixmap]:
+    with pymupdf.open(path) as pdf:
+        return [page.get_pixmap() for page in pdf]
+
+
+def main() -> None:
+    pixmaps = load_pixmaps(RESOURCES_DIR / "test_2_pages.pdf")
+    config = {"image_size": {"height": 224, "width": 224}}
+    device = torch.device("cpu")
+
+    def rebuilt_per_page() -> None:
+        for pix in pixmaps:
+            page = Image.frombytes("RGB", (pix.width, pix.height), pix.samples)
+            transform(config)(page)
+
+    def cached_per_page() -> None:
+        for pix in pixmaps:
+            page = Image.frombytes("RGB", (pix.width, pix.height), pix.samples)
+            cached_transform(config)(page)
+
+    def batched() -> None:
+        batch_transform(config)([pixmap_to_array(pix) for pix in pixmaps], device)
+
+    for name, fn in [
+        ("rebuilt per page", rebuilt_per_page),
+        ("cached", cached_per_page),
+        ("batched", batched),
+    ]:
+        fn()  # warm up
+        elapsed = timeit.timeit(fn, number=REPEATS)
+        print(f"{name: >20}: {elapsed / (REPEATS * len(pixmaps)) * 1000:.3f} ms/page")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+"""Per call content type detection latency with a fresh libmagic handle, pooled handles and the
+PDF header fast path.
+
+Run from projects/web_app/src:
+    PYTHONPATH=.:../../common/src python -m tests.benchmark.benchmark_input_file_validator
+"""
+
+import timeit
+from pathlib import Path
+
+from magic import Magic
+
+from common.input_file_validator import InputFileValidator, MagicPool
+
+RESOURCES_DIR = Path(__file__).parents[1] / "resources"
+REPEATS = 500
+
+
+def main() -> None:
+    validator = InputFileValidator(MagicPool())
+    sample = (RESOURCES_DIR / "test_2_pages.pdf").read_bytes()[: validator.sample_size]
+    # shifts the header so only libmagic recognises the document
+    sample_without_header = b"\n" + sample[:-1]
+
+    def fresh_handle() -> None:
+        Magic(mime=True).from_buffer(sample)
+
+    def pooled_handle() -> None:
+        validator.detect_content_type(sample_without_header)
+
+    def pdf_header() -> None:
+        validator.detect_content_type(sample)
+
+    for name, fn in [
+        ("fresh handle", fresh_handle),
+        ("pooled handle", pooled_handle),
+        ("pdf header", pdf_header),
+    ]:
+        fn()  # warm up
+        elapsed = timeit.timeit(fn, number=REPEATS)
+        print(f"{name: >20}: {elapsed / REPEATS * 1000:.4f} ms/call")
+
+
+if __name__ == "__main__":
+    main()
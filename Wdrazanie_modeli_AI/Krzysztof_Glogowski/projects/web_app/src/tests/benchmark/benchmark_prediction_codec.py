@@ -0,0 +1,51 @@
+"""Serialization cost and size of a cached prediction in the JSON formats used so far and in the
+packed binary record.
+
+Run from projects/web_app/src:
+    PYTHONPATH=.:../../common/src python -m tests.benchmark.benchmark_prediction_codec
+"""
+
+import json
+import timeit
+from dataclasses import asdict
+
+from web_app.database.valkey.codec import ValueCodec
+from web_app.model.prediction import PredictionRecord
+
+REPEATS = 100000
+RECORD = PredictionRecord(
+    probabilities=[
+        0.17330732941627502,
+        0.28573545813560486,
+        0.385702520608902,
+        0.15525461733341217,
+    ],
+    model_version="0123456789abcdef",
+)
+
+
+def main() -> None:
+    ranking = RECORD.render("v2")
+    float32_codec = ValueCodec("float32")
+    float16_codec = ValueCodec("float16")
+
+    formats = [
+        ("ranking json", lambda: json.dumps(ranking), lambda raw: json.loads(raw)),
+        ("record json", lambda: json.dumps(asdict(RECORD)), lambda raw: json.loads(raw)),
+        ("record float32", lambda: float32_codec.encode(RECORD), float32_codec.decode),
+        ("record float16", lambda: float16_codec.encode(RECORD), float16_codec.decode),
+    ]
+    for name, encode, decode in formats:
+        raw = encode()
+        raw = raw.encode() if isinstance(raw, str) else raw
+        encode_time = timeit.timeit(encode, number=REPEATS)
+        decode_time = timeit.timeit(lambda: decode(raw), number=REPEATS)
+        print(
+            f"{name: >20}: {len(raw): >4} bytes, "
+            f"encode {encode_time / REPEATS * 1e6:.2f} us/call, "
+            f"decode {decode_time / REPEATS * 1e6:.2f} us/call"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -6,3 +6,8 @@ import pytest
 @pytest.fixture(scope="session", autouse=True)
 def test_directory():
     os.chdir(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "web_app")))
+
+
+@pytest.fixture(scope="session")
+def anyio_backend():
+    return "asyncio"
@@ -1,4 +1,8 @@
+import asyncio
+import struct
+import time
 from io import BytesIO
+from unittest.mock import ANY
 
 import fakeredis
 import fsspec
@@ -6,20 +10,87 @@ import pytest
 import torch
 from torch import nn
 
+from web_app.model.prediction import PredictionRecord
 
-class ClamdNetworkSocketStub:
-    def __init__(self, return_malformed: bool = False, *args, **kwargs):
+
+class ClamdSessionStub:
+    def __init__(self, return_malformed: bool = False):
         self.return_malformed = return_malformed
+        self.last_used_at = time.monotonic()
+        self.bytes_sent = 0
+        self.is_closed = False
+        self.scanned: list[bytes] = []
+
+    async def command(self, command: str) -> str:
+        self.last_used_at = time.monotonic()
+        return {"PING": "PONG", "VERSION": "ClamAV 1.4.2/27541/Mon Jan  6 09:32:09 2025"}[command]
 
-    def ping(self):
+    async def instream(self, chunks, max_chunk_size: int = 65536) -> str:
+        self.last_used_at = time.monotonic()
+        self.scanned.append(b"".join([chunk async for chunk in chunks]))
+        return "stream: Eicar-Test-Signature FOUND" if self.return_malformed else "stream: OK"
+
+    async def close(self):
         pass
 
-    def instream(self, buff):
-        return (
-            {"stream": ("FOUND", "Eicar-Test-Signature")}
-            if self.return_malformed
-            else {"stream": ("OK", None)}
-        )
+
+class FakeClamdServer:
+    """Speaks enough of the clamd IDSESSION protocol to test the client against a real socket."""
+
+    def __init__(self, max_stream_length: int = 1024 * 1024):
+        self.max_stream_length = max_stream_length
+        self.connections = 0
+        self.chunk_sizes: list[int] = []
+        self.scanned: list[bytes] = []
+        self.port = 0
+        self._server: asyncio.Server | None = None
+        self._writers: list[asyncio.StreamWriter] = []
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        self._server.close()
+        await self._server.wait_closed()
+
+    async def drop_connections(self):
+        """Closes the open sessions like clamd after its IdleTimeout or a restart."""
+        while self._writers:
+            writer = self._writers.pop()
+            writer.close()
+            await writer.wait_closed()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.connections += 1
+        self._writers.append(writer)
+        try:
+            assert await reader.readuntil(b"\0") == b"zIDSESSION\0"
+            request_id = 0
+            while (command := (await reader.readuntil(b"\0"))[1:-1].decode()) != "END":
+                request_id += 1
+                reply = await self._reply(command, reader)
+                writer.write(f"{request_id}: {reply}\0".encode())
+                await writer.drain()
+                if reply.endswith("ERROR"):
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        writer.close()
+
+    async def _reply(self, command: str, reader: asyncio.StreamReader) -> str:
+        if command == "PING":
+            return "PONG"
+        if command == "VERSION":
+            return "ClamAV 1.4.2/27541/Mon Jan  6 09:32:09 2025"
+        data = bytearray()
+        while size := struct.unpack("!L", await reader.readexactly(4))[0]:
+            self.chunk_sizes.append(size)
+            data += await reader.readexactly(size)
+        if len(data) > self.max_stream_length:
+            return "INSTREAM size limit exceeded. ERROR"
+        self.scanned.append(bytes(data))
+        return "stream: Eicar-Test-Signature FOUND" if b"EICAR" in data else "stream: OK"
 
 
 class ClassifierStub(nn.Module):
@@ -27,7 +98,7 @@ class ClassifierStub(nn.Module):
         super().__init__()
 
     def forward(self, x, l):  # noqa: E741
-        return torch.tensor([0.1, 0.6, 0.9, -0.01])
+        return torch.tensor([[0.1, 0.6, 0.9, -0.01]]).repeat(l.size(0), 1)
 
     @torch.jit.export
     def predict_proba(self, x, l):  # noqa: E741
@@ -36,6 +107,29 @@ class ClassifierStub(nn.Module):
         )
 
 
+class PagedClassifierStub(nn.Module):
+    def __init__(self):
+        super().__init__()
+
+    def forward(self, x, lengths):
+        return self.classify_page_embeddings(self.embed_pages(x), lengths)
+
+    @torch.jit.export
+    def predict_proba(self, x, lengths):
+        return torch.softmax(self.forward(x, lengths).squeeze(0), dim=0)
+
+    @torch.jit.export
+    def embed_pages(self, x):
+        return x.mean(dim=(2, 3))
+
+    @torch.jit.export
+    def classify_page_embeddings(self, embeddings, lengths):
+        lengths_list: list[int] = lengths.tolist()
+        sequences = torch.split(embeddings, lengths_list, dim=0)
+        pooled = torch.stack([torch.mean(sequence, dim=0) for sequence in sequences])
+        return torch.cat([pooled, -pooled.sum(dim=1, keepdim=True)], dim=1)
+
+
 @pytest.fixture(scope="session")
 def one_page_document_content():
     with open("../tests/resources/test.pdf", "rb") as file:
@@ -59,6 +153,11 @@ def fake_script_model():
     return script_module
 
 
+@pytest.fixture(scope="session")
+def fake_paged_script_model():
+    return torch.jit.script(PagedClassifierStub())
+
+
 @pytest.fixture(scope="session")
 def model_in_in_memory_filesystem(fake_script_model):
     buffer = BytesIO()
@@ -69,6 +168,19 @@ def model_in_in_memory_filesystem(fake_script_model):
         f.write(buffer.read())
 
 
+@pytest.fixture(scope="session")
+def model_prediction_record():
+    return PredictionRecord(
+        probabilities=[
+            0.17330732941627502,
+            0.28573545813560486,
+            0.385702520608902,
+            0.15525461733341217,
+        ],
+        model_version=ANY,
+    )
+
+
 @pytest.fixture(scope="session")
 def model_prediction_v1():
     return {"label": 2}
@@ -91,7 +203,8 @@ def request_body(one_page_document_content):
 
 @pytest.fixture(scope="session")
 def invalid_request_body():
-    return {"document": ("test.pdf", bytes(10 * 1024 * 1024 + 10), "application/pdf")}
+    # over the file size limit, but within the request body limit of a single document
+    return {"document": ("test.pdf", bytes(2 * 1024 * 1024 + 10), "application/pdf")}
 
 
 @pytest.fixture(scope="session")
@@ -103,15 +216,28 @@ def request_headers():
 
 
 @pytest.fixture(scope="function")
-def fake_antivirus_socket_for_non_malformed_files():
-    return ClamdNetworkSocketStub()
+def fake_antivirus_session_for_non_malformed_files():
+    return ClamdSessionStub()
+
+
+@pytest.fixture(scope="function")
+def fake_antivirus_session_for_malformed_files():
+    return ClamdSessionStub(return_malformed=True)
 
 
 @pytest.fixture(scope="function")
-def fake_antivirus_socket_for_malformed_files():
-    return ClamdNetworkSocketStub(return_malformed=True)
+async def fake_clamd_server():
+    server = FakeClamdServer()
+    await server.start()
+    yield server
+    await server.stop()
+
+
+@pytest.fixture(scope="session")
+def clamav_signature_version():
+    return "27541"
 
 
 @pytest.fixture(scope="function")
 def fake_valkey():
-    return fakeredis.FakeRedis()
+    return fakeredis.FakeAsyncRedis()
@@ -12,15 +12,15 @@ from web_app.main import app
 def initialized_app(
     mocker,
     fake_valkey,
-    fake_antivirus_socket_for_non_malformed_files,
+    fake_antivirus_session_for_non_malformed_files,
     model_in_in_memory_filesystem,
     in_memory_model_path,
 ):
     mocker.patch.object(ValkeyConnector, "_create_connection", return_value=fake_valkey)
     mocker.patch.object(
         ClamavConnector,
-        "_create_socket",
-        return_value=fake_antivirus_socket_for_non_malformed_files,
+        "_open_session",
+        return_value=fake_antivirus_session_for_non_malformed_files,
     )
     with TestClient(app=app, raise_server_exceptions=False) as client:
         yield client
@@ -33,14 +33,15 @@ def in_memory_model_path():
     # Cleanup if needed
 
 
-@pytest.fixture(scope="session")
-def document_hash_v1():
-    return "v1_9e2e157be3cd927f16faac37bf9167b85cbdd81ea83264837e4802e04713239f"
+@pytest.fixture(scope="function")
+def document_prediction_key(initialized_app):
+    model_version = initialized_app.app.state.model_version
+    return f"prediction_{model_version}_9e2e157be3cd927f16faac37bf9167b85cbdd81ea83264837e4802e04713239f"
 
 
 @pytest.fixture(scope="session")
-def document_hash_v2():
-    return "v2_9e2e157be3cd927f16faac37bf9167b85cbdd81ea83264837e4802e04713239f"
+def verified_document_key():
+    return "verified_9e2e157be3cd927f16faac37bf9167b85cbdd81ea83264837e4802e04713239f"
 
 
 @pytest.fixture(scope="session")
@@ -0,0 +1,107 @@
+import asyncio
+import hashlib
+import time
+
+from starlette.testclient import TestClient
+
+from tests.fixture import (
+    fake_antivirus_session_for_non_malformed_files,
+    fake_valkey,
+    one_page_document_content,
+    fake_script_model,
+    model_prediction_v1,
+    request_body,
+    request_headers,
+    model_in_in_memory_filesystem,
+)
+from tests.integration.fixture import request_endpoint_v1, in_memory_model_path
+from tests.utils_test import assert_positive_response
+from web_app.antivirus.clamav.connector import ClamavConnector
+from web_app.database.valkey.connector import ValkeyConnector
+from web_app.main import app
+from web_app.model.document_classifier import DocumentClassifier
+from web_app.model.prediction import PredictionRecord
+
+# to prevent IDE from removing unused imports START
+fake_antivirus_session_for_non_malformed_files
+fake_valkey
+one_page_document_content
+fake_script_model
+model_in_in_memory_filesystem
+in_memory_model_path
+# to prevent IDE from removing unused imports END
+
+
+def wait_until_ready(client: TestClient, timeout: float = 10.0) -> None:
+    deadline = time.monotonic() + timeout
+    while client.get("/readiness").status_code != 200:
+        assert time.monotonic() < deadline
+        time.sleep(0.05)
+
+
+def test_most_requested_documents_scored_before_ready(
+    fake_valkey,
+    fake_antivirus_session_for_non_malformed_files,
+    model_in_in_memory_filesystem,
+    one_page_document_content,
+    request_body,
+    request_headers,
+    request_endpoint_v1,
+    model_prediction_v1,
+    mocker,
+):
+    # given
+    digest = hashlib.sha256(one_page_document_content).hexdigest()
+    today = int(time.time() // 86400)
+    asyncio.run(fake_valkey.zadd(f"popular_document_hits_{today}", {digest: 10}))
+    asyncio.run(fake_valkey.set(f"popular_document_{digest}", one_page_document_content))
+    mocker.patch.object(ValkeyConnector, "_create_connection", return_value=fake_valkey)
+    mocker.patch.object(
+        ClamavConnector,
+        "_open_session",
+        return_value=fake_antivirus_session_for_non_malformed_files,
+    )
+    predict_spy = mocker.spy(DocumentClassifier, "predict_proba_batch")
+
+    # when
+    with TestClient(app=app) as client:
+        wait_until_ready(client)
+        model_version = client.app.state.model_version
+        response = client.post(url=request_endpoint_v1, headers=request_headers, files=request_body)
+
+    # then
+    assert asyncio.run(fake_valkey.exists(f"prediction_{model_version}_{digest}")) == 1
+    assert predict_spy.call_count == 1
+    assert_positive_response(response, model_prediction_v1, from_cache=True)
+
+
+def test_predictions_of_previous_model_not_served(
+    fake_valkey,
+    fake_antivirus_session_for_non_malformed_files,
+    model_in_in_memory_filesystem,
+    one_page_document_content,
+    request_body,
+    request_headers,
+    request_endpoint_v1,
+    model_prediction_v1,
+    mocker,
+):
+    # given
+    digest = hashlib.sha256(one_page_document_content).hexdigest()
+    previous_record = PredictionRecord(probabilities=[1.0, 0.0, 0.0, 0.0], model_version="previous")
+    asyncio.run(fake_valkey.set(f"prediction_previous_{digest}", previous_record.to_bytes()))
+    mocker.patch.object(ValkeyConnector, "_create_connection", return_value=fake_valkey)
+    mocker.patch.object(
+        ClamavConnector,
+        "_open_session",
+        return_value=fake_antivirus_session_for_non_malformed_files,
+    )
+    predict_spy = mocker.spy(DocumentClassifier, "predict_proba_batch")
+
+    # when
+    with TestClient(app=app) as client:
+        response = client.post(url=request_endpoint_v1, headers=request_headers, files=request_body)
+
+    # then
+    assert predict_spy.call_count == 1
+    assert_positive_response(response, model_prediction_v1)
@@ -1,37 +1,49 @@
 import pytest
+from starlette.testclient import TestClient
 
 from tests.fixture import (
-    fake_antivirus_socket_for_non_malformed_files,
+    fake_antivirus_session_for_non_malformed_files,
     fake_valkey,
+    clamav_signature_version,
     one_page_document_content,
     fake_script_model,
     model_prediction_v1,
+    model_prediction_record,
     request_body,
     invalid_request_body,
     request_headers,
     model_in_in_memory_filesystem,
 )
 from tests.integration.fixture import (
-    document_hash_v1,
+    document_prediction_key,
+    verified_document_key,
     initialized_app,
     request_endpoint_v1,
     in_memory_model_path,
 )
 from tests.utils_test import assert_positive_response
+from web_app.antivirus.clamav.connector import ClamavConnector
 from web_app.antivirus.clamav.scanner import AntivirusScanner
+from web_app.database.memory.cache import MemoryCache
 from web_app.database.valkey.client import ValkeyClient
+from web_app.database.valkey.connector import ValkeyConnector
+from web_app.main import app
 from web_app.model.document_classifier import DocumentClassifier
+from web_app.model.executor import InferenceExecutor
 from web_app.service.validator.upload_file_validator import UploadFileValidator
-from web_app.utils.error import APIError
+from web_app.utils.error import APIError, InferenceQueueFullError
+from web_app.utils.metrics import REGISTRY
 
 # to prevent IDE from removing unused imports START
 one_page_document_content
 fake_valkey
-fake_antivirus_socket_for_non_malformed_files
+clamav_signature_version
+fake_antivirus_session_for_non_malformed_files
 fake_script_model
 model_in_in_memory_filesystem
 in_memory_model_path
 model_prediction_v1
+model_prediction_record
 # to prevent IDE from removing unused imports END
 
 
@@ -40,15 +52,19 @@ def test_document_classified_correctly(
     request_body,
     request_headers,
     request_endpoint_v1,
-    document_hash_v1,
+    document_prediction_key,
+    verified_document_key,
+    clamav_signature_version,
     model_prediction_v1,
+    model_prediction_record,
     mocker,
 ):
-    redis_read_spy = mocker.spy(ValkeyClient, "read")
-    redis_write_spy = mocker.spy(ValkeyClient, "write")
-    validator_spy = mocker.spy(UploadFileValidator, "validate")
+    redis_read_spy = mocker.spy(ValkeyClient, "read_many")
+    redis_write_spy = mocker.spy(ValkeyClient, "write_many")
+    memory_cache_get_spy = mocker.spy(MemoryCache, "get")
+    validator_spy = mocker.spy(UploadFileValidator, "read")
     antivirus_spy = mocker.spy(AntivirusScanner, "scan")
-    predict_spy = mocker.spy(DocumentClassifier, "classify")
+    predict_spy = mocker.spy(DocumentClassifier, "predict_proba_batch")
 
     # first request
     first_response = initialized_app.post(
@@ -58,13 +74,15 @@ def test_document_classified_correctly(
 
     assert redis_read_spy.called is True
     assert redis_read_spy.call_count == 1
-    assert redis_read_spy.call_args.args[1] == document_hash_v1
-    assert redis_read_spy.spy_return is None
+    assert redis_read_spy.call_args.args[1] == [verified_document_key, document_prediction_key]
+    assert redis_read_spy.spy_return == [None, None]
 
     assert redis_write_spy.called is True
     assert redis_write_spy.call_count == 1
-    assert redis_write_spy.call_args.args[1] == document_hash_v1
-    assert redis_write_spy.call_args.args[2] == model_prediction_v1
+    assert redis_write_spy.call_args.args[1] == {
+        verified_document_key: clamav_signature_version,
+        document_prediction_key: model_prediction_record,
+    }
 
     assert validator_spy.called is True
     assert validator_spy.call_count == 1
@@ -83,9 +101,37 @@ def test_document_classified_correctly(
 
     assert predict_spy.call_count == 1
     assert redis_write_spy.call_count == 1
-    assert redis_read_spy.call_count == 2
+    assert redis_read_spy.call_count == 1
+    assert memory_cache_get_spy.call_count == 4
+    assert memory_cache_get_spy.spy_return == model_prediction_record
     assert validator_spy.call_count == 2
+    assert antivirus_spy.call_count == 1
+
+
+def test_document_scanned_again_when_signature_database_changes(
+    initialized_app, request_body, request_headers, request_endpoint_v1, mocker
+):
+    # given
+    mocker.patch.object(AntivirusScanner, "signature_version", side_effect=["27541", "27542"])
+    validator_spy = mocker.spy(UploadFileValidator, "read")
+    antivirus_spy = mocker.spy(AntivirusScanner, "scan")
+    predict_spy = mocker.spy(DocumentClassifier, "predict_proba_batch")
+
+    # when
+    first_response = initialized_app.post(
+        url=request_endpoint_v1, headers=request_headers, files=request_body
+    )
+    second_response = initialized_app.post(
+        url=request_endpoint_v1, headers=request_headers, files=request_body
+    )
+
+    # then
+    assert first_response.status_code == 200
+    assert second_response.status_code == 200
+    assert second_response.headers["X-Readed-From-Cache"] == "true"
     assert antivirus_spy.call_count == 2
+    assert validator_spy.call_count == 2
+    assert predict_spy.call_count == 1
 
 
 @pytest.mark.parametrize("error", [Exception, APIError])
@@ -93,7 +139,7 @@ def test_receive_500_when_error_raised_in_api(
     initialized_app, request_body, request_headers, request_endpoint_v1, error, mocker
 ):
     # given
-    mocker.patch.object(DocumentClassifier, "classify", side_effect=error)
+    mocker.patch.object(DocumentClassifier, "predict_proba_batch", side_effect=error)
 
     # when
     response = initialized_app.post(
@@ -110,6 +156,24 @@ def test_receive_500_when_error_raised_in_api(
     assert response_json["message"] == "Internal server error"
 
 
+def test_receive_503_when_inference_queue_is_full(
+    initialized_app, request_body, request_headers, request_endpoint_v1, mocker
+):
+    # given
+    mocker.patch.object(InferenceExecutor, "reserve", side_effect=InferenceQueueFullError(1))
+
+    # when
+    response = initialized_app.post(
+        url=request_endpoint_v1, headers=request_headers, files=request_body
+    )
+
+    # then
+    assert response.status_code == 503
+    assert response.headers.get("content-type") == "application/json"
+    assert response.headers.get("Retry-After") == "1"
+    assert response.json()["message"] == "Service temporarily unavailable"
+
+
 def test_received_422_when_at_least_one_body_param_is_invalid(
     initialized_app,
     invalid_request_body,
@@ -124,3 +188,166 @@ def test_received_422_when_at_least_one_body_param_is_invalid(
     # then
     assert response.status_code == 422
     assert response.headers.get("content-type") == "application/json"
+
+
+def test_received_422_for_unsupported_content_type_without_scanning(
+    initialized_app, request_headers, request_endpoint_v1, mocker
+):
+    # given
+    antivirus_spy = mocker.spy(AntivirusScanner, "scan")
+    request_body = {"document": ("test.pdf", b"plain text " * 1024, "application/pdf")}
+
+    # when
+    response = initialized_app.post(
+        url=request_endpoint_v1, headers=request_headers, files=request_body
+    )
+
+    # then
+    assert response.status_code == 422
+    assert antivirus_spy.call_count == 0
+
+
+def test_received_413_for_oversized_upload_before_it_is_read(
+    initialized_app, one_page_document_content, request_headers, request_endpoint_v1, mocker
+):
+    # given
+    validator_spy = mocker.spy(UploadFileValidator, "read")
+    request_body = {
+        "document": (
+            "test.pdf",
+            one_page_document_content + bytes(3 * 1024 * 1024),
+            "application/pdf",
+        )
+    }
+
+    # when
+    response = initialized_app.post(
+        url=request_endpoint_v1, headers=request_headers, files=request_body
+    )
+
+    # then
+    assert response.status_code == 413
+    assert validator_spy.call_count == 0
+
+
+def test_preloaded_classifier_shared_instead_of_loaded(
+    fake_valkey,
+    fake_antivirus_session_for_non_malformed_files,
+    fake_script_model,
+    request_body,
+    request_headers,
+    request_endpoint_v1,
+    mocker,
+):
+    # given
+    mocker.patch.object(ValkeyConnector, "_create_connection", return_value=fake_valkey)
+    mocker.patch.object(
+        ClamavConnector,
+        "_open_session",
+        return_value=fake_antivirus_session_for_non_malformed_files,
+    )
+    preloaded_classifier = DocumentClassifier(fake_script_model)
+    mocker.patch.object(app.state, "preloaded_classifier", preloaded_classifier, create=True)
+    from_path_spy = mocker.spy(DocumentClassifier, "from_path")
+
+    # when
+    with TestClient(app=app) as client:
+        response = client.post(url=request_endpoint_v1, headers=request_headers, files=request_body)
+        executor_classifier = client.app.state.inference_executor.classifier
+
+    # then
+    assert response.status_code == 200
+    assert from_path_spy.call_count == 0
+    assert executor_classifier is preloaded_classifier
+
+
+def stage_count(stage: str) -> float:
+    return (
+        REGISTRY.get_sample_value(
+            "document_classification_stage_duration_seconds_count", {"stage": stage}
+        )
+        or 0
+    )
+
+
+def test_stage_metrics_exposed_after_prediction(
+    initialized_app, request_body, request_headers, request_endpoint_v1
+):
+    # given
+    stages = [
+        "upload",
+        "content_type",
+        "hashing",
+        "scan",
+        "rasterize",
+        "preprocess",
+        "forward",
+        "valkey_read",
+        "cache",
+    ]
+    counts_before = {stage: stage_count(stage) for stage in stages}
+
+    # when
+    prediction_response = initialized_app.post(
+        url=request_endpoint_v1, headers=request_headers, files=request_body
+    )
+    metrics_response = initialized_app.get("/metrics")
+
+    # then
+    assert prediction_response.status_code == 200
+    assert metrics_response.status_code == 200
+    assert metrics_response.headers["content-type"].startswith("text/plain; version=")
+    for stage in stages:
+        assert stage_count(stage) > counts_before[stage]
+        assert f'stage="{stage}"' in metrics_response.text
+    assert "document_classification_document_pages_count" in metrics_response.text
+    assert (
+        'document_classification_cache_lookups_total{kind="prediction",result="miss",tier="valkey"}'
+        in metrics_response.text
+    )
+    assert "document_classification_inference_queue_depth 0.0" in metrics_response.text
+
+
+def test_server_timing_lists_request_stages_when_enabled(
+    initialized_app, request_body, request_headers, request_endpoint_v1, mocker
+):
+    # given
+    mocker.patch.object(initialized_app.app.state, "server_timing", True)
+
+    # when
+    response = initialized_app.post(
+        url=request_endpoint_v1, headers=request_headers, files=request_body
+    )
+
+    # then
+    assert response.status_code == 200
+    server_timing = dict(
+        entry.split(";dur=") for entry in response.headers["Server-Timing"].split(", ")
+    )
+    # in order of completion, nested stages first
+    assert list(server_timing) == [
+        "content_type",
+        "hashing",
+        "upload",
+        "valkey_read",
+        "cache",
+        "scan",
+        "rasterize",
+        "preprocess",
+        "inference",
+        "total",
+    ]
+    assert all(float(duration) >= 0 for duration in server_timing.values())
+
+
+def test_server_timing_not_sent_when_disabled(
+    initialized_app, request_body, request_headers, request_endpoint_v1
+):
+    # when
+    response = initialized_app.post(
+        url=request_endpoint_v1, headers=request_headers, files=request_body
+    )
+
+    # then
+    assert response.status_code == 200
+    assert "Server-Timing" not in response.headers
@@ -1,24 +1,30 @@
 import pytest
 
 from tests.fixture import (
-    fake_antivirus_socket_for_non_malformed_files,
+    fake_antivirus_session_for_non_malformed_files,
     fake_valkey,
+    clamav_signature_version,
     one_page_document_content,
     fake_script_model,
+    model_prediction_v1,
     model_prediction_v2,
+    model_prediction_record,
     request_body,
     invalid_request_body,
     request_headers,
     model_in_in_memory_filesystem,
 )
 from tests.integration.fixture import (
-    document_hash_v2,
+    document_prediction_key,
+    verified_document_key,
     initialized_app,
+    request_endpoint_v1,
     request_endpoint_v2,
     in_memory_model_path,
 )
 from tests.utils_test import assert_positive_response
 from web_app.antivirus.clamav.scanner import AntivirusScanner
+from web_app.database.memory.cache import MemoryCache
 from web_app.database.valkey.client import ValkeyClient
 from web_app.model.document_classifier import DocumentClassifier
 from web_app.service.validator.upload_file_validator import UploadFileValidator
@@ -27,11 +33,14 @@ from web_app.utils.error import APIError
 # to prevent IDE from removing unused imports START
 one_page_document_content
 fake_valkey
-fake_antivirus_socket_for_non_malformed_files
+clamav_signature_version
+fake_antivirus_session_for_non_malformed_files
 fake_script_model
 model_in_in_memory_filesystem
 in_memory_model_path
+model_prediction_v1
 model_prediction_v2
+model_prediction_record
 # to prevent IDE from removing unused imports END
 
 
@@ -40,15 +49,19 @@ def test_document_classified_correctly(
     request_body,
     request_headers,
     request_endpoint_v2,
-    document_hash_v2,
+    document_prediction_key,
+    verified_document_key,
+    clamav_signature_version,
     model_prediction_v2,
+    model_prediction_record,
     mocker,
 ):
-    redis_read_spy = mocker.spy(ValkeyClient, "read")
-    redis_write_spy = mocker.spy(ValkeyClient, "write")
-    validator_spy = mocker.spy(UploadFileValidator, "validate")
+    redis_read_spy = mocker.spy(ValkeyClient, "read_many")
+    redis_write_spy = mocker.spy(ValkeyClient, "write_many")
+    memory_cache_get_spy = mocker.spy(MemoryCache, "get")
+    validator_spy = mocker.spy(UploadFileValidator, "read")
     antivirus_spy = mocker.spy(AntivirusScanner, "scan")
-    predict_spy = mocker.spy(DocumentClassifier, "classify_proba")
+    predict_spy = mocker.spy(DocumentClassifier, "predict_proba_batch")
 
     # first request
     first_response = initialized_app.post(
@@ -58,13 +71,15 @@ def test_document_classified_correctly(
 
     assert redis_read_spy.called is True
     assert redis_read_spy.call_count == 1
-    assert redis_read_spy.call_args.args[1] == document_hash_v2
-    assert redis_read_spy.spy_return is None
+    assert redis_read_spy.call_args.args[1] == [verified_document_key, document_prediction_key]
+    assert redis_read_spy.spy_return == [None, None]
 
     assert redis_write_spy.called is True
     assert redis_write_spy.call_count == 1
-    assert redis_write_spy.call_args.args[1] == document_hash_v2
-    assert redis_write_spy.call_args.args[2] == model_prediction_v2
+    assert redis_write_spy.call_args.args[1] == {
+        verified_document_key: clamav_signature_version,
+        document_prediction_key: model_prediction_record,
+    }
 
     assert validator_spy.called is True
     assert validator_spy.call_count == 1
@@ -83,9 +98,11 @@ def test_document_classified_correctly(
 
     assert predict_spy.call_count == 1
     assert redis_write_spy.call_count == 1
-    assert redis_read_spy.call_count == 2
+    assert redis_read_spy.call_count == 1
+    assert memory_cache_get_spy.call_count == 4
+    assert memory_cache_get_spy.spy_return == model_prediction_record
     assert validator_spy.call_count == 2
-    assert antivirus_spy.call_count == 2
+    assert antivirus_spy.call_count == 1
 
 
 @pytest.mark.parametrize("error", [Exception, APIError])
@@ -93,7 +110,7 @@ def test_receive_500_when_error_raised_in_api(
     initialized_app, request_body, request_headers, request_endpoint_v2, error, mocker
 ):
     # given
-    mocker.patch.object(DocumentClassifier, "classify_proba", side_effect=error)
+    mocker.patch.object(DocumentClassifier, "predict_proba_batch", side_effect=error)
 
     # when
     response = initialized_app.post(
@@ -124,3 +141,31 @@ def test_received_422_when_at_least_one_body_param_is_invalid(
     # then
     assert response.status_code == 422
     assert response.headers.get("content-type") == "application/json"
+
+
+def test_one_prediction_shared_by_both_api_versions(
+    initialized_app,
+    request_body,
+    request_headers,
+    request_endpoint_v1,
+    request_endpoint_v2,
+    model_prediction_v1,
+    model_prediction_v2,
+    mocker,
+):
+    # given
+    predict_spy = mocker.spy(DocumentClassifier, "predict_proba_batch")
+
+    # when
+    v1_response = initialized_app.post(
+        url=request_endpoint_v1, headers=request_headers, files=request_body
+    )
+    v2_response = initialized_app.post(
+        url=request_endpoint_v2, headers=request_headers, files=request_body
+    )
+
+    # then
+    assert_positive_response(v1_response, model_prediction_v1)
+    assert_positive_response(v2_response, model_prediction_v2, from_cache=True)
+    assert predict_spy.call_count == 1
+    assert len(initialized_app.app.state.memory_cache) == 2
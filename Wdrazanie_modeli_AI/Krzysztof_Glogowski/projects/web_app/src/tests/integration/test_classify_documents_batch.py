@@ -0,0 +1,94 @@
+import pytest
+
+from tests.fixture import (
+    fake_antivirus_session_for_non_malformed_files,
+    fake_valkey,
+    one_page_document_content,
+    two_pages_document_content,
+    fake_script_model,
+    model_prediction_v1,
+    model_prediction_v2,
+    model_in_in_memory_filesystem,
+)
+from tests.integration.fixture import initialized_app, in_memory_model_path
+from web_app.antivirus.clamav.scanner import AntivirusScanner
+from web_app.database.valkey.client import ValkeyClient
+from web_app.model.document_classifier import DocumentClassifier
+
+# to prevent IDE from removing unused imports START
+one_page_document_content
+two_pages_document_content
+fake_valkey
+fake_antivirus_session_for_non_malformed_files
+fake_script_model
+model_in_in_memory_filesystem
+in_memory_model_path
+initialized_app
+# to prevent IDE from removing unused imports END
+
+
+@pytest.fixture(scope="session")
+def batch_request_body(one_page_document_content, two_pages_document_content):
+    return [
+        ("documents", ("first.pdf", one_page_document_content, "application/pdf")),
+        ("documents", ("second.pdf", two_pages_document_content, "application/pdf")),
+        ("documents", ("first_again.pdf", one_page_document_content, "application/pdf")),
+    ]
+
+
+@pytest.mark.parametrize(
+    "endpoint, expected_prediction",
+    [("/v1/predict/batch", "model_prediction_v1"), ("/v2/predict/batch", "model_prediction_v2")],
+)
+def test_documents_classified_in_input_order(
+    initialized_app, batch_request_body, endpoint, expected_prediction, request, mocker
+):
+    # given
+    expected_prediction = request.getfixturevalue(expected_prediction)
+    antivirus_spy = mocker.spy(AntivirusScanner, "scan")
+    predict_spy = mocker.spy(DocumentClassifier, "predict_proba_batch")
+    redis_read_spy = mocker.spy(ValkeyClient, "read_many")
+    redis_write_spy = mocker.spy(ValkeyClient, "write_many")
+
+    # when
+    response = initialized_app.post(url=endpoint, files=batch_request_body)
+
+    # then
+    assert response.status_code == 200
+    assert response.json() == {"predictions": [expected_prediction] * 3}
+
+    assert antivirus_spy.call_count == 2
+    assert predict_spy.call_count == 1
+    assert predict_spy.call_args.args[2].tolist() == [2, 1]
+    assert redis_read_spy.call_count == 1
+    assert len(redis_read_spy.call_args.args[1]) == 4
+    assert redis_write_spy.call_count == 1
+    assert len(redis_write_spy.call_args.args[1]) == 4
+
+
+def test_cached_documents_not_predicted_again(initialized_app, batch_request_body, mocker):
+    # given
+    initialized_app.post(url="/v1/predict/batch", files=batch_request_body[:1])
+    antivirus_spy = mocker.spy(AntivirusScanner, "scan")
+    predict_spy = mocker.spy(DocumentClassifier, "predict_proba_batch")
+
+    # when
+    response = initialized_app.post(url="/v1/predict/batch", files=batch_request_body)
+
+    # then
+    assert response.status_code == 200
+    assert len(response.json()["predictions"]) == 3
+    assert antivirus_spy.call_count == 1
+    assert predict_spy.call_count == 1
+    assert predict_spy.call_args.args[2].tolist() == [2]
+
+
+def test_received_422_when_too_many_documents(initialized_app, batch_request_body, mocker):
+    # given
+    mocker.patch.object(initialized_app.app.state.settings, "PREDICT_BATCH_MAX_DOCUMENTS", 2)
+
+    # when
+    response = initialized_app.post(url="/v1/predict/batch", files=batch_request_body)
+
+    # then
+    assert response.status_code == 422
@@ -0,0 +1,95 @@
+from tests.fixture import (
+    fake_antivirus_session_for_non_malformed_files,
+    fake_valkey,
+    one_page_document_content,
+    two_pages_document_content,
+    fake_script_model,
+    model_prediction_v1,
+    model_in_in_memory_filesystem,
+)
+from tests.integration.fixture import initialized_app, in_memory_model_path
+from web_app.job.worker import JobWorker
+from web_app.model.executor import InferenceExecutor
+
+# to prevent IDE from removing unused imports START
+one_page_document_content
+two_pages_document_content
+fake_valkey
+fake_antivirus_session_for_non_malformed_files
+fake_script_model
+model_in_in_memory_filesystem
+in_memory_model_path
+initialized_app
+# to prevent IDE from removing unused imports END
+
+
+def test_job_submitted_processed_and_polled(
+    initialized_app, one_page_document_content, two_pages_document_content, model_prediction_v1
+):
+    # given
+    state = initialized_app.app.state
+    worker = JobWorker(
+        queue=state.job_queue,
+        classifier=state.inference_executor.classifier,
+        antivirus=state.antivirus,
+        consumer="consumer",
+        block_time=10,
+    )
+    initialized_app.portal.call(state.job_queue.ensure_group)
+    files = [
+        ("documents", ("first.pdf", one_page_document_content, "application/pdf")),
+        ("documents", ("second.pdf", two_pages_document_content, "application/pdf")),
+    ]
+
+    # when
+    submit_response = initialized_app.post(url="/v1/jobs", files=files)
+    job_id = submit_response.json()["job_id"]
+    pending_response = initialized_app.get(url=f"/v1/jobs/{job_id}")
+    initialized_app.portal.call(worker.run_once)
+    completed_response = initialized_app.get(url=f"/v1/jobs/{job_id}")
+
+    # then
+    assert submit_response.status_code == 202
+    assert pending_response.status_code == 200
+    assert pending_response.json()["status"] == "pending"
+    assert completed_response.json()["status"] == "completed"
+    assert completed_response.json()["predictions"] == [model_prediction_v1] * 2
+
+
+def test_cached_document_served_by_interactive_endpoint(
+    initialized_app, one_page_document_content, mocker
+):
+    # given
+    state = initialized_app.app.state
+    worker = JobWorker(
+        queue=state.job_queue,
+        classifier=state.inference_executor.classifier,
+        antivirus=state.antivirus,
+        consumer="consumer",
+        block_time=10,
+    )
+    initialized_app.portal.call(state.job_queue.ensure_group)
+    files = [("documents", ("first.pdf", one_page_document_content, "application/pdf"))]
+    initialized_app.post(url="/v1/jobs", files=files)
+    initialized_app.portal.call(worker.run_once)
+    predict_spy = mocker.spy(InferenceExecutor, "predict_proba_batch")
+
+    # when
+    response = initialized_app.post(
+        url="/v1/predict",
+        files={"document": ("first.pdf", one_page_document_content, "application/pdf")},
+    )
+
+    # then
+    assert response.status_code == 200
+    assert response.headers["X-Readed-From-Cache"] == "true"
+    assert predict_spy.call_count == 0
+
+
+def test_received_404_for_unknown_job(initialized_app):
+    # when
+    response = initialized_app.get(url="/v1/jobs/unknown")
+
+    # then
+    assert response.status_code == 404
+    assert response.json() == {"message": "Job not found"}
@@ -2,53 +2,75 @@ import pytest
 
 from web_app.antivirus.clamav.connector import ClamavConnector
 from web_app.antivirus.clamav.scanner import AntivirusScanner
-from tests.fixture import (
-    ClamdNetworkSocketStub,
-    fake_antivirus_socket_for_malformed_files,
-    fake_antivirus_socket_for_non_malformed_files,
-)
+from web_app.utils.error import ClamavScanError
+from tests.fixture import ClamdSessionStub, fake_clamd_server
 
 # to prevent IDE from removing unused imports START
-fake_antivirus_socket_for_non_malformed_files
-fake_antivirus_socket_for_malformed_files
+fake_clamd_server
 # to prevent IDE from removing unused imports END
 
 
-def test_scan_non_malformed_file(mocker, fake_antivirus_socket_for_non_malformed_files):
+@pytest.mark.anyio
+async def test_scan_non_malformed_file(fake_clamd_server):
     # given
-    mocker.patch.object(
-        ClamavConnector,
-        "_create_socket",
-        return_value=fake_antivirus_socket_for_non_malformed_files,
+    scanner = AntivirusScanner(
+        connector=ClamavConnector("127.0.0.1", fake_clamd_server.port), max_chunk_size=3
     )
-    scanner = AntivirusScanner(connector=ClamavConnector())
-    file_content = b"1234"
-
-    clamav_socket_spy = mocker.spy(ClamdNetworkSocketStub, "instream")
 
     # when
-    scanner.scan(file_content)
+    await scanner.scan(b"1234567")
 
     # then
-    assert clamav_socket_spy.call_count == 1
-    assert clamav_socket_spy.call_args.args[1].getvalue() == file_content
+    assert fake_clamd_server.scanned == [b"1234567"]
+    assert fake_clamd_server.chunk_sizes == [3, 3, 1]
+    await scanner.connector.close()
 
 
-def test_scan_malformed_file(mocker, fake_antivirus_socket_for_malformed_files):
+@pytest.mark.anyio
+async def test_scan_malformed_file(fake_clamd_server):
     # given
-    mocker.patch.object(
-        ClamavConnector,
-        "_create_socket",
-        return_value=fake_antivirus_socket_for_malformed_files,
-    )
-    scanner = AntivirusScanner(connector=ClamavConnector())
-    file_content = b"1234"
-
-    clamav_socket_spy = mocker.spy(ClamdNetworkSocketStub, "instream")
+    scanner = AntivirusScanner(connector=ClamavConnector("127.0.0.1", fake_clamd_server.port))
 
     # when # then
     with pytest.raises(ValueError, match="Virus detected: Eicar-Test-Signature"):
-        scanner.scan(file_content)
+        await scanner.scan(b"X5O!P%@APEICAR")
+
+    await scanner.connector.close()
+
+
+@pytest.mark.anyio
+async def test_session_dropped_after_scan_error(fake_clamd_server):
+    # given
+    fake_clamd_server.max_stream_length = 2
+    scanner = AntivirusScanner(connector=ClamavConnector("127.0.0.1", fake_clamd_server.port))
+
+    # when
+    with pytest.raises(ClamavScanError):
+        await scanner.scan(b"1234")
+    await scanner.scan(b"12")
 
-    assert clamav_socket_spy.call_count == 1
-    assert clamav_socket_spy.call_args.args[1].getvalue() == file_content
+    # then
+    assert fake_clamd_server.connections == 2
+    await scanner.connector.close()
+
+
+@pytest.mark.anyio
+async def test_signature_version_cached_until_ttl_expires(mocker):
+    # given
+    session = ClamdSessionStub()
+    mocker.patch.object(ClamavConnector, "_open_session", return_value=session)
+    command_spy = mocker.spy(session, "command")
+    now = [0.0]
+    scanner = AntivirusScanner(
+        connector=ClamavConnector(), signature_version_ttl=60, clock=lambda: now[0]
+    )
+
+    # when
+    first_version = await scanner.signature_version()
+    second_version = await scanner.signature_version()
+    now[0] = 60.0
+    third_version = await scanner.signature_version()
+
+    # then
+    assert first_version == second_version == third_version == "27541"
+    assert command_spy.call_count == 2
@@ -0,0 +1,87 @@
+import asyncio
+
+import pytest
+import torch
+
+from tests.fixture import fake_script_model
+from web_app.model.batcher import MicroBatcher
+from web_app.model.document_classifier import DocumentClassifier
+from web_app.model.executor import InferenceExecutor
+
+# to prevent IDE from removing unused imports START
+fake_script_model
+# to prevent IDE from removing unused imports END
+
+
+@pytest.mark.anyio
+async def test_concurrent_documents_merged_into_one_forward_pass(fake_script_model, mocker):
+    # given
+    classifier = DocumentClassifier(fake_script_model)
+    batcher = MicroBatcher(
+        InferenceExecutor.with_threads(classifier), max_batch_size=8, max_wait_time=0.05
+    )
+    predict_spy = mocker.spy(classifier, "predict_proba_batch")
+    one_page = (torch.ones((1, 3, 224, 224)), torch.tensor([1]))
+    two_pages = (torch.ones((2, 3, 224, 224)), torch.tensor([2]))
+
+    # when
+    batcher.start()
+    results = await asyncio.gather(
+        batcher.predict_proba(*one_page),
+        batcher.predict_proba(*two_pages),
+        batcher.predict_proba(*one_page),
+    )
+    await batcher.stop()
+
+    # then
+    assert predict_spy.call_count == 1
+    images, lengths = predict_spy.call_args.args
+    assert images.shape == (4, 3, 224, 224)
+    assert lengths.tolist() == [2, 1, 1]
+    assert len(results) == 3
+    for result in results:
+        assert result.shape == (4,)
+        assert DocumentClassifier.to_label(result) == {"label": 2}
+
+
+@pytest.mark.anyio
+async def test_batch_split_when_max_batch_size_reached(fake_script_model, mocker):
+    # given
+    classifier = DocumentClassifier(fake_script_model)
+    batcher = MicroBatcher(
+        InferenceExecutor.with_threads(classifier), max_batch_size=2, max_wait_time=0.05
+    )
+    predict_spy = mocker.spy(classifier, "predict_proba_batch")
+    document = (torch.ones((1, 3, 224, 224)), torch.tensor([1]))
+
+    # when
+    batcher.start()
+    await asyncio.gather(*[batcher.predict_proba(*document) for _ in range(3)])
+    await batcher.stop()
+
+    # then
+    assert predict_spy.call_count == 2
+    assert [call.args[1].tolist() for call in predict_spy.call_args_list] == [[1, 1], [1]]
+
+
+@pytest.mark.anyio
+async def test_error_propagated_to_all_documents_in_batch(fake_script_model, mocker):
+    # given
+    classifier = DocumentClassifier(fake_script_model)
+    batcher = MicroBatcher(
+        InferenceExecutor.with_threads(classifier), max_batch_size=8, max_wait_time=0.05
+    )
+    mocker.patch.object(classifier, "predict_proba_batch", side_effect=RuntimeError("failed"))
+    document = (torch.ones((1, 3, 224, 224)), torch.tensor([1]))
+
+    # when
+    batcher.start()
+    results = await asyncio.gather(
+        batcher.predict_proba(*document),
+        batcher.predict_proba(*document),
+        return_exceptions=True,
+    )
+    await batcher.stop()
+
+    # then
+    assert all(isinstance(result, RuntimeError) for result in results)
@@ -0,0 +1,101 @@
+from typing import Annotated
+
+import pytest
+from fastapi import FastAPI, File, UploadFile
+from starlette.testclient import TestClient
+
+from web_app.service.middleware.body_size_limit import BodySizeLimitMiddleware
+
+
+def create_app(max_body_sizes: dict[str, int]) -> FastAPI:
+    app = FastAPI()
+    app.state.max_body_sizes = max_body_sizes
+
+    @app.post("/v1/predict")
+    async def predict(document: Annotated[UploadFile, File()]) -> dict[str, int]:
+        return {"size": len(await document.read())}
+
+    return app
+
+
+def create_client(max_body_sizes: dict[str, int]) -> TestClient:
+    app = create_app(max_body_sizes)
+    app.add_middleware(BodySizeLimitMiddleware)
+    return TestClient(app)
+
+
+def multipart_body(content: bytes) -> bytes:
+    return (
+        b"--boundary\r\n"
+        b'Content-Disposition: form-data; name="document"; filename="test.pdf"\r\n'
+        b"Content-Type: application/pdf\r\n\r\n" + content + b"\r\n--boundary--\r\n"
+    )
+
+
+def test_body_within_limit_passed_through():
+    # given
+    client = create_client({"/predict": 1024})
+
+    # when
+    response = client.post("/v1/predict", files={"document": ("test.pdf", b"%PDF-" * 10)})
+
+    # then
+    assert response.status_code == 200
+    assert response.json() == {"size": 50}
+
+
+def test_declared_content_length_over_limit_rejected():
+    # given
+    client = create_client({"/predict": 1024})
+
+    # when
+    response = client.post("/v1/predict", files={"document": ("test.pdf", bytes(2048))})
+
+    # then
+    assert response.status_code == 413
+    assert response.json() == {"detail": "Request body too large"}
+
+
+@pytest.mark.anyio
+async def test_streamed_body_rejected_once_limit_exceeded():
+    # given
+    app = create_app({"/predict": 1024})
+    body = multipart_body(bytes(4096))
+    chunks = [body[start : start + 256] for start in range(0, len(body), 256)]
+    received_chunks = []
+    sent_messages = []
+
+    async def receive():
+        chunk = chunks[len(received_chunks)]
+        received_chunks.append(chunk)
+        return {"type": "http.request", "body": chunk, "more_body": True}
+
+    async def send(message):
+        sent_messages.append(message)
+
+    scope = {
+        "type": "http",
+        "method": "POST",
+        "path": "/v1/predict",
+        "headers": [(b"content-type", b"multipart/form-data; boundary=boundary")],
+        "query_string": b"",
+        "app": app,
+    }
+
+    # when
+    await BodySizeLimitMiddleware(app)(scope, receive, send)
+
+    # then
+    assert sent_messages[0]["status"] == 413
+    assert len(received_chunks) == 5
+
+
+def test_path_without_limit_passed_through():
+    # given
+    client = create_client({})
+
+    # when
+    response = client.post("/v1/predict", files={"document": ("test.pdf", bytes(2048))})
+
+    # then
+    assert response.status_code == 200
@@ -1,70 +1,189 @@
-import clamd
+import asyncio
+
 import pytest
-from clamd import ClamdNetworkSocket
 
 from web_app.antivirus.clamav.connector import ClamavConnector
+from web_app.antivirus.clamav.session import ClamdSession
 from web_app.utils.error import ClamavConnectionError, ClamavConnectionNotAliveError
-from tests.fixture import fake_antivirus_socket_for_non_malformed_files
+from tests.fixture import fake_clamd_server
 
 # to prevent IDE from removing unused imports START
-fake_antivirus_socket_for_non_malformed_files
+fake_clamd_server
 # to prevent IDE from removing unused imports END
 
 
-def test_create_connection(fake_antivirus_socket_for_non_malformed_files, mocker):
+async def closed_port() -> int:
+    server = await asyncio.start_server(lambda reader, writer: None, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    server.close()
+    await server.wait_closed()
+    return port
+
+
+async def wait_until_closed(session: ClamdSession) -> None:
+    async with asyncio.timeout(1):
+        while not session.is_closed:
+            await asyncio.sleep(0.01)
+
+
+@pytest.mark.anyio
+async def test_connect(fake_clamd_server):
     # given
-    mocker.patch(
-        "web_app.antivirus.clamav.connector.clamd.ClamdNetworkSocket",
-        return_value=fake_antivirus_socket_for_non_malformed_files,
-    )
-    ping_spy = mocker.spy(fake_antivirus_socket_for_non_malformed_files, "ping")
+    connector = ClamavConnector("127.0.0.1", fake_clamd_server.port)
+
     # when
-    socket = ClamavConnector._create_socket("0.0.0.0", 0)
+    await connector.connect()
 
     # then
-    assert socket is not None
-    assert type(socket) is fake_antivirus_socket_for_non_malformed_files.__class__
-    assert ping_spy.call_count == 1
+    assert fake_clamd_server.connections == 1
+    await connector.close()
 
 
-def test_create_connection_exception(mocker):
+@pytest.mark.anyio
+async def test_connect_exception():
     # given
-    ping_spy = mocker.spy(ClamdNetworkSocket, "ping")
+    connector = ClamavConnector("127.0.0.1", await closed_port())
 
     # when # then
     with pytest.raises(ClamavConnectionError):
-        ClamavConnector._create_socket("0.0.0.0", 0)
+        await connector.connect()
 
-    assert ping_spy.call_count == 1
 
+@pytest.mark.anyio
+async def test_is_alive(fake_clamd_server):
+    # given
+    connector = ClamavConnector("127.0.0.1", fake_clamd_server.port)
+    await connector.connect()
 
-def test_is_alive(fake_antivirus_socket_for_non_malformed_files, mocker):
+    # when
+    await connector.is_alive()
+
+    # then
+    assert fake_clamd_server.connections == 1
+    await connector.close()
+
+
+@pytest.mark.anyio
+async def test_is_alive_exception():
     # given
-    mocker.patch(
-        "web_app.antivirus.clamav.connector.clamd.ClamdNetworkSocket",
-        return_value=fake_antivirus_socket_for_non_malformed_files,
-    )
-    ping_spy = mocker.spy(fake_antivirus_socket_for_non_malformed_files, "ping")
-    connector = ClamavConnector("0.0.0.0", 0)
+    connector = ClamavConnector("127.0.0.1", await closed_port())
+
+    # when # then
+    with pytest.raises(ClamavConnectionNotAliveError):
+        await connector.is_alive()
+
+
+@pytest.mark.anyio
+async def test_signature_version(fake_clamd_server):
+    # given
+    connector = ClamavConnector("127.0.0.1", fake_clamd_server.port)
 
     # when
-    connector.is_alive()
+    version = await connector.signature_version()
 
     # then
-    assert ping_spy.call_count == 2
+    assert version == "27541"
+    await connector.close()
 
 
-def test_is_alive_exception(mocker):
+@pytest.mark.anyio
+async def test_signature_version_exception():
     # given
-    mocker.patch(
-        "web_app.antivirus.clamav.connector.clamd.ClamdNetworkSocket.ping",
-        side_effect=[None, clamd.ConnectionError()],
-    )
-    ping_spy = mocker.spy(ClamdNetworkSocket, "ping")
-    connector = ClamavConnector("0.0.0.0", 0)
+    connector = ClamavConnector("127.0.0.1", await closed_port())
 
     # when # then
     with pytest.raises(ClamavConnectionNotAliveError):
-        connector.is_alive()
+        await connector.signature_version()
+
+
+@pytest.mark.anyio
+async def test_sessions_limited_and_reused(fake_clamd_server):
+    # given
+    connector = ClamavConnector("127.0.0.1", fake_clamd_server.port, max_sessions=2)
+
+    # when
+    replies = await asyncio.gather(*[connector.command("PING") for _ in range(6)])
+    await connector.command("PING")
+
+    # then
+    assert replies == ["PONG"] * 6
+    assert fake_clamd_server.connections == 2
+    await connector.close()
+
+
+@pytest.mark.anyio
+async def test_idle_session_replaced(fake_clamd_server):
+    # given
+    connector = ClamavConnector("127.0.0.1", fake_clamd_server.port, session_idle_timeout=0)
+
+    # when
+    await connector.command("PING")
+    await connector.command("PING")
+
+    # then
+    assert fake_clamd_server.connections == 2
+    await connector.close()
+
+
+@pytest.mark.anyio
+async def test_session_closed_by_clamd_not_reused(fake_clamd_server):
+    # given
+    connector = ClamavConnector("127.0.0.1", fake_clamd_server.port)
+    await connector.command("PING")
+    await fake_clamd_server.drop_connections()
+    await wait_until_closed(connector._idle_sessions[0])
+
+    # when
+    reply = await connector.command("PING")
+
+    # then
+    assert reply == "PONG"
+    assert fake_clamd_server.connections == 2
+    await connector.close()
+
+
+@pytest.mark.anyio
+async def test_pooled_session_failed_before_sending_retried_on_new_session(
+    fake_clamd_server, mocker
+):
+    # given
+    connector = ClamavConnector("127.0.0.1", fake_clamd_server.port)
+    await connector.command("PING")
+    mocker.patch.object(connector._idle_sessions[0], "_send", side_effect=BrokenPipeError())
+
+    # when
+    reply = await connector.command("PING")
+
+    # then
+    assert reply == "PONG"
+    assert fake_clamd_server.connections == 2
+    await connector.close()
+
+
+@pytest.mark.anyio
+async def test_pooled_session_failed_after_sending_not_retried(fake_clamd_server, mocker):
+    # given
+    connector = ClamavConnector("127.0.0.1", fake_clamd_server.port)
+    await connector.command("PING")
+    mocker.patch.object(connector._idle_sessions[0], "_read_reply", side_effect=TimeoutError())
+
+    # when # then
+    with pytest.raises(TimeoutError):
+        await connector.command("PING")
+
+    assert fake_clamd_server.connections == 1
+    assert connector._idle_sessions == []
+
+
+@pytest.mark.anyio
+async def test_failed_new_session_not_retried(fake_clamd_server, mocker):
+    # given
+    connector = ClamavConnector("127.0.0.1", fake_clamd_server.port)
+    operation = mocker.AsyncMock(side_effect=ConnectionResetError())
+
+    # when # then
+    with pytest.raises(ConnectionResetError):
+        await connector.run(operation)
 
-    assert ping_spy.call_count == 2
+    assert operation.call_count == 1
+    assert fake_clamd_server.connections == 1
@@ -0,0 +1,67 @@
+import torch
+
+from common import converters, image_transformers
+from common.converters import pdf_to_model_input
+from tests.fixture import two_pages_document_content
+
+# to prevent IDE from removing unused imports START
+two_pages_document_content
+# to prevent IDE from removing unused imports END
+
+
+def test_batched_preprocessing_matches_per_page_transform(two_pages_document_content, mocker):
+    # given
+    mocker.patch.object(converters, "has_augmentations", return_value=True)
+    expected_images, expected_lengths = pdf_to_model_input(two_pages_document_content)
+    mocker.stopall()
+
+    # when
+    images, lengths = pdf_to_model_input(two_pages_document_content)
+
+    # then
+    assert images.shape == expected_images.shape == (2, 3, 224, 224)
+    assert lengths.equal(expected_lengths)
+    assert torch.allclose(images, expected_images, atol=0.02)
+
+
+def test_per_page_transform_used_for_augmentations(two_pages_document_content, mocker):
+    # given
+    config = {"to_gray_proba": 1}
+    per_page_transform_spy = mocker.spy(converters, "cached_transform")
+    batch_transform_spy = mocker.spy(converters, "batch_transform")
+
+    # when
+    images, lengths = pdf_to_model_input(two_pages_document_content, config)
+
+    # then
+    assert per_page_transform_spy.call_count == 1
+    assert batch_transform_spy.call_count == 0
+    assert images.shape == (2, 3, 224, 224)
+    assert lengths.item() == 2
+
+
+def test_pages_rendered_at_model_size_skip_resize(two_pages_document_content, mocker):
+    # given
+    interpolate_spy = mocker.spy(image_transformers.F, "interpolate")
+    render_spy = mocker.spy(converters, "render_page")
+
+    # when
+    images, lengths = pdf_to_model_input(two_pages_document_content, render_at_model_size=True)
+
+    # then
+    assert images.shape == (2, 3, 224, 224)
+    assert lengths.item() == 2
+    assert interpolate_spy.call_count == 0
+    assert [(pix.width, pix.height) for pix in render_spy.spy_return_list] == [(224, 224)] * 2
+
+
+def test_pages_rendered_in_grayscale(two_pages_document_content):
+    # when
+    images, lengths = pdf_to_model_input(
+        two_pages_document_content, render_at_model_size=True, grayscale=True
+    )
+
+    # then
+    assert images.shape == (2, 3, 224, 224)
+    assert torch.equal(images[:, 0], images[:, 1])
+    assert torch.equal(images[:, 1], images[:, 2])
@@ -1,6 +1,9 @@
+import io
 import os
 import tempfile
 
+import fsspec
+import pytest
 import torch
 from torch.jit import ScriptModule
 
@@ -10,7 +13,7 @@ from tests.fixture import (
     model_prediction_v2,
     model_in_in_memory_filesystem,
 )
-from web_app.model.document_classifier import DocumentClassifier
+from web_app.model.document_classifier import DocumentClassifier, get_model_path
 
 # to prevent IDE from removing unused imports START
 fake_script_model
@@ -75,3 +78,59 @@ def test_classify_proba(model_in_in_memory_filesystem, model_prediction_v2, mock
     assert predict_proba_spy.call_count == 1
     assert predict_proba_spy.call_args.args[0].equal(image)
     assert predict_proba_spy.call_args.args[1].equal(length)
+
+
+def test_predict_proba_batch(model_in_in_memory_filesystem, model_prediction_v1, mocker):
+    # given
+    images = torch.ones((3, 3, 224, 224))
+    lengths = torch.tensor([2, 1])
+
+    # when
+    classifier = DocumentClassifier.from_path("memory://model.pt")
+    predict_spy = mocker.spy(classifier.model, "forward")
+    predicted_proba = classifier.predict_proba_batch(images, lengths)
+
+    # then
+    assert predicted_proba.shape == (2, 4)
+    assert torch.allclose(predicted_proba.sum(dim=1), torch.ones(2))
+    assert predict_spy.call_count == 1
+    for document_proba in predicted_proba:
+        assert DocumentClassifier.to_label(document_proba) == model_prediction_v1
+
+
+def test_model_path_resolved_for_variant():
+    # when
+    fp32_path = get_model_path("gs://bucket/model.pt", "fp32")
+    int8_path = get_model_path("gs://bucket/model.pt", "int8")
+
+    # then
+    assert fp32_path == "gs://bucket/model.pt"
+    assert int8_path == "gs://bucket/model_int8.pt"
+
+
+def test_unknown_model_variant_rejected():
+    # when
+    with pytest.raises(ValueError):
+        get_model_path("resources/model.pt", "fp16")
+
+
+def test_frozen_model_variant_predicts_like_fp32(fake_script_model, model_prediction_v2):
+    # given
+    images = torch.ones((3, 3, 224, 224))
+    lengths = torch.tensor([2, 1])
+    frozen_model = torch.jit.freeze(fake_script_model.eval(), preserved_attrs=["predict_proba"])
+    buffer = io.BytesIO()
+    torch.jit.save(frozen_model, buffer)
+    buffer.seek(0)
+    fs = fsspec.filesystem("memory")
+    with fs.open("memory://model_frozen.pt", "wb") as f:
+        f.write(buffer.read())
+
+    # when
+    classifier = DocumentClassifier.from_path(get_model_path("memory://model.pt", "frozen"))
+    predicted_proba = classifier.predict_proba_batch(images, lengths)
+    prediction = classifier.classify_proba(images[:1], lengths[:1])
+
+    # then
+    assert predicted_proba.shape == (2, 4)
+    assert prediction == model_prediction_v2
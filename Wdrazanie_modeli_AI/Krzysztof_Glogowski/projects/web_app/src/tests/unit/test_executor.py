@@ -0,0 +1,94 @@
+import pytest
+import torch
+
+from tests.fixture import fake_script_model
+from web_app.model.document_classifier import DocumentClassifier
+from web_app.model.executor import InferenceExecutor, get_torch_threads
+from web_app.utils.error import InferenceQueueFullError
+
+# to prevent IDE from removing unused imports START
+fake_script_model
+# to prevent IDE from removing unused imports END
+
+
+@pytest.mark.anyio
+async def test_predict_proba_batch_runs_outside_event_loop_thread(fake_script_model, mocker):
+    # given
+    classifier = DocumentClassifier(fake_script_model)
+    executor = InferenceExecutor.with_threads(classifier, workers=1, torch_threads=1)
+    predict_spy = mocker.spy(classifier, "predict_proba_batch")
+    images = torch.ones((1, 3, 224, 224))
+    lengths = torch.tensor([1])
+
+    # when
+    predicted_proba = await executor.predict_proba_batch(images, lengths)
+    executor.shutdown()
+
+    # then
+    assert predicted_proba.shape == (1, 4)
+    assert predict_spy.call_count == 1
+
+
+@pytest.mark.anyio
+async def test_run_returns_function_result(fake_script_model):
+    # given
+    executor = InferenceExecutor.with_threads(DocumentClassifier(fake_script_model))
+
+    # when
+    result = await executor.run(sum, [1, 2, 3])
+    executor.shutdown()
+
+    # then
+    assert result == 6
+
+
+def test_reserve_raises_when_queue_is_full(fake_script_model):
+    # given
+    executor = InferenceExecutor.with_threads(
+        DocumentClassifier(fake_script_model), max_queue_size=1
+    )
+
+    # when # then
+    with executor.reserve():
+        with pytest.raises(InferenceQueueFullError):
+            with executor.reserve():
+                pass
+
+    with executor.reserve():
+        pass
+    executor.shutdown()
+
+
+def test_reserve_weighted_by_number_of_documents(fake_script_model):
+    # given
+    executor = InferenceExecutor.with_threads(
+        DocumentClassifier(fake_script_model), max_queue_size=4
+    )
+
+    # when # then
+    with executor.reserve(3):
+        assert executor.pending_requests == 3
+        with pytest.raises(InferenceQueueFullError):
+            with executor.reserve(2):
+                pass
+        with executor.reserve():
+            assert executor.pending_requests == 4
+
+    with executor.reserve(64):
+        assert executor.pending_requests == 4
+        with pytest.raises(InferenceQueueFullError):
+            with executor.reserve():
+                pass
+
+    assert executor.pending_requests == 0
+    executor.shutdown()
+
+
+def test_get_torch_threads(mocker):
+    # given
+    mocker.patch("web_app.model.executor.os.cpu_count", return_value=8)
+
+    # when # then
+    assert get_torch_threads(workers=2) == 4
+    assert get_torch_threads(workers=16) == 1
+    assert get_torch_threads(workers=2, torch_threads=3) == 3
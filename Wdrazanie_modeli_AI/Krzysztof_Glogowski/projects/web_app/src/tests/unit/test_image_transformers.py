@@ -0,0 +1,57 @@
+from PIL import Image
+
+from common.image_transformers import cached_transform, transform
+
+
+def test_transform_does_not_mutate_config():
+    # given
+    config = {"image_size": {"height": 32, "width": 32}}
+
+    # when
+    image = transform(config)(Image.new("RGB", (64, 48)))
+
+    # then
+    assert config == {"image_size": {"height": 32, "width": 32}}
+    assert image.shape == (3, 32, 32)
+
+
+def test_cached_transform_reused_for_equal_configs():
+    # given
+    config = {"image_size": {"height": 32, "width": 32}, "to_gray_proba": 0}
+    equal_config = {"to_gray_proba": 0, "image_size": {"width": 32, "height": 32}}
+
+    # when
+    first = cached_transform(config)
+    second = cached_transform(equal_config)
+
+    # then
+    assert first is second
+
+
+def test_cached_transform_not_shared_for_augmenting_configs():
+    # given
+    config = {"image_size": {"height": 32, "width": 32}, "to_gray_proba": 0.5}
+
+    # when
+    first = cached_transform(config)
+    second = cached_transform(config)
+
+    # then
+    assert first is not second
+
+
+def test_cached_transform_keeps_bounded_number_of_pipelines():
+    # given
+    first = cached_transform({"image_size": {"height": 1, "width": 1}})
+
+    # when
+    for size in range(2, 64):
+        cached_transform({"image_size": {"height": size, "width": size}})
+
+    # then
+    assert cached_transform({"image_size": {"height": 1, "width": 1}}) is not first
+
+
+def test_cached_transform_with_defaults_for_missing_config():
+    # when # then
+    assert cached_transform(None) is cached_transform({})
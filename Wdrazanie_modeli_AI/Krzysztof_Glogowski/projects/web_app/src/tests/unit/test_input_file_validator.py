@@ -0,0 +1,61 @@
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from common.input_file_validator import InputFileValidator, MagicPool
+from tests.fixture import one_page_document_content
+
+# to prevent IDE from removing unused imports START
+one_page_document_content
+# to prevent IDE from removing unused imports END
+
+
+def test_pdf_header_detected_without_libmagic(one_page_document_content, mocker):
+    # given
+    magic_pool = MagicPool()
+    handle_spy = mocker.spy(magic_pool, "handle")
+    validator = InputFileValidator(magic_pool)
+
+    # when
+    errors = validator.validate(BytesIO(one_page_document_content))
+
+    # then
+    assert errors == []
+    assert handle_spy.call_count == 0
+
+
+def test_other_content_detected_with_libmagic():
+    # given
+    validator = InputFileValidator(MagicPool())
+
+    # when
+    errors = validator.validate(BytesIO(b"plain text " * 100))
+
+    # then
+    assert errors == ["Unsupported content type: text/plain"]
+
+
+def test_magic_handles_reused(mocker):
+    # given
+    magic_pool = MagicPool()
+    magic_spy = mocker.patch("common.input_file_validator.Magic", wraps=__import__("magic").Magic)
+    validator = InputFileValidator(magic_pool)
+
+    # when
+    for _ in range(5):
+        validator.detect_content_type(b"plain text")
+
+    # then
+    assert magic_spy.call_count == 1
+
+
+def test_concurrent_detection_uses_separate_handles():
+    # given
+    validator = InputFileValidator(MagicPool())
+    samples = [b"plain text", b"GIF89a" + bytes(32)] * 50
+
+    # when
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        content_types = list(executor.map(validator.detect_content_type, samples))
+
+    # then
+    assert content_types == ["text/plain", "image/gif"] * 50
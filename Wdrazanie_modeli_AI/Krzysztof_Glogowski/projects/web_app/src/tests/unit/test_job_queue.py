@@ -0,0 +1,112 @@
+import pytest
+
+from tests.fixture import fake_valkey
+from web_app.database.valkey.client import ValkeyClient
+from web_app.database.valkey.connector import ValkeyConnector
+from web_app.job.queue import JobQueue
+from web_app.model.prediction import PredictionRecord
+from web_app.service.validator.upload_file_validator import IngestedDocument
+
+# to prevent IDE from removing unused imports START
+fake_valkey
+# to prevent IDE from removing unused imports END
+
+
+@pytest.fixture(scope="function")
+async def job_queue(mocker, fake_valkey):
+    mocker.patch.object(ValkeyConnector, "_create_connection", return_value=fake_valkey)
+    job_queue = JobQueue(
+        ValkeyClient(ValkeyConnector("0.0.0.0", 0)), ttl=60, model_version="version"
+    )
+    await job_queue.ensure_group()
+    return job_queue
+
+
+@pytest.mark.anyio
+async def test_only_uncached_unique_documents_queued(job_queue, fake_valkey):
+    # given
+    record = PredictionRecord(probabilities=[0.1, 0.9], model_version="version")
+    await fake_valkey.set("prediction_version_cached", record.to_bytes())
+    documents = [
+        IngestedDocument(b"first", "first"),
+        IngestedDocument(b"cached", "cached"),
+        IngestedDocument(b"first", "first"),
+    ]
+
+    # when
+    job_id = await job_queue.submit("v1", documents)
+    tasks = await job_queue.read("consumer", count=10, block=10)
+
+    # then
+    assert [(task.job_id, task.digest) for task in tasks] == [(job_id, "first")]
+    assert await job_queue.load_documents(["first", "cached"]) == {
+        "first": b"first",
+        "cached": None,
+    }
+
+
+@pytest.mark.anyio
+async def test_status_follows_predictions_and_errors(job_queue, fake_valkey):
+    # given
+    record = PredictionRecord(probabilities=[0.1, 0.9], model_version="version")
+    documents = [IngestedDocument(b"first", "first"), IngestedDocument(b"second", "second")]
+    job_id = await job_queue.submit("v1", documents)
+    pending_status = await job_queue.status(job_id)
+
+    # when
+    await fake_valkey.set("prediction_version_first", record.to_bytes())
+    await job_queue.record_errors({job_id: {"second": "Virus detected: Eicar-Test-Signature"}})
+    completed_status = await job_queue.status(job_id)
+
+    # then
+    assert pending_status["status"] == "pending"
+    assert pending_status["predictions"] == [None, None]
+    assert completed_status == {
+        "job_id": job_id,
+        "status": "completed",
+        "total": 2,
+        "completed": 1,
+        "failed": [{"index": 1, "message": "Virus detected: Eicar-Test-Signature"}],
+        "predictions": [{"label": 1}, None],
+    }
+
+
+@pytest.mark.anyio
+async def test_status_of_unknown_job(job_queue):
+    # when
+    job_status = await job_queue.status("unknown")
+
+    # then
+    assert job_status is None
+
+
+@pytest.mark.anyio
+async def test_unacknowledged_tasks_claimed_by_other_consumer(job_queue):
+    # given
+    await job_queue.submit("v1", [IngestedDocument(b"first", "first")])
+    first_tasks = await job_queue.read("crashed", count=10, block=10)
+
+    # when
+    claimed_tasks = await job_queue.claim("consumer", count=10, min_idle_time=0)
+    await job_queue.ack(claimed_tasks)
+    claimed_after_ack = await job_queue.claim("consumer", count=10, min_idle_time=0)
+
+    # then
+    assert claimed_tasks == first_tasks
+    assert claimed_after_ack == []
+
+
+@pytest.mark.anyio
+async def test_acknowledged_tasks_deleted_from_stream(job_queue, fake_valkey):
+    # given
+    await job_queue.submit(
+        "v1", [IngestedDocument(b"first", "first"), IngestedDocument(b"second", "second")]
+    )
+    tasks = await job_queue.read("consumer", count=10, block=10)
+
+    # when
+    await job_queue.ack(tasks[:1])
+
+    # then
+    assert await fake_valkey.xlen("jobs") == 1
+    assert [task.digest for task in await job_queue.claim("other", 10, 0)] == ["second"]
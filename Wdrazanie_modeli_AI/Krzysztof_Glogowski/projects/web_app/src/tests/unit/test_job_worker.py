@@ -0,0 +1,151 @@
+import json
+
+import pytest
+
+from tests.fixture import (
+    ClamdSessionStub,
+    fake_script_model,
+    fake_valkey,
+    one_page_document_content,
+    two_pages_document_content,
+)
+from web_app.antivirus.clamav.connector import ClamavConnector
+from web_app.antivirus.clamav.scanner import AntivirusScanner
+from web_app.database.valkey.client import ValkeyClient
+from web_app.database.valkey.connector import ValkeyConnector
+from web_app.job.queue import JobQueue
+from web_app.job.worker import JobWorker
+from web_app.model.document_classifier import DocumentClassifier
+from web_app.service.validator.upload_file_validator import IngestedDocument
+
+# to prevent IDE from removing unused imports START
+fake_script_model
+fake_valkey
+one_page_document_content
+two_pages_document_content
+# to prevent IDE from removing unused imports END
+
+
+def create_worker(mocker, fake_valkey, fake_script_model, session: ClamdSessionStub) -> JobWorker:
+    mocker.patch.object(ValkeyConnector, "_create_connection", return_value=fake_valkey)
+    mocker.patch.object(ClamavConnector, "_open_session", return_value=session)
+    return JobWorker(
+        queue=JobQueue(ValkeyClient(ValkeyConnector("0.0.0.0", 0))),
+        classifier=DocumentClassifier(fake_script_model),
+        antivirus=AntivirusScanner(ClamavConnector()),
+        consumer="consumer",
+        block_time=10,
+    )
+
+
+@pytest.mark.anyio
+async def test_tasks_predicted_in_one_forward_pass(
+    mocker, fake_valkey, fake_script_model, one_page_document_content, two_pages_document_content
+):
+    # given
+    worker = create_worker(mocker, fake_valkey, fake_script_model, ClamdSessionStub())
+    await worker.queue.ensure_group()
+    first_job_id = await worker.queue.submit(
+        "v1",
+        [
+            IngestedDocument(one_page_document_content, "one_page"),
+            IngestedDocument(two_pages_document_content, "two_pages"),
+        ],
+    )
+    second_job_id = await worker.queue.submit(
+        "v2", [IngestedDocument(one_page_document_content, "one_page")]
+    )
+    predict_spy = mocker.spy(worker.classifier, "predict_proba_batch")
+
+    # when
+    processed_tasks = await worker.run_once()
+
+    # then
+    assert processed_tasks == 3
+    assert predict_spy.call_count == 1
+    assert predict_spy.call_args.args[1].tolist() == [2, 1]
+    first_job = await worker.queue.status(first_job_id)
+    second_job = await worker.queue.status(second_job_id)
+    assert first_job["status"] == second_job["status"] == "completed"
+    assert first_job["predictions"] == [{"label": 2}, {"label": 2}]
+    assert second_job["predictions"][0][0]["label"] == 2
+    assert json.loads(await fake_valkey.get("verified_one_page")) == "27541"
+    assert await worker.run_once() == 0
+
+
+@pytest.mark.anyio
+async def test_infected_document_recorded_as_failed(
+    mocker, fake_valkey, fake_script_model, one_page_document_content
+):
+    # given
+    worker = create_worker(
+        mocker, fake_valkey, fake_script_model, ClamdSessionStub(return_malformed=True)
+    )
+    await worker.queue.ensure_group()
+    job_id = await worker.queue.submit(
+        "v1", [IngestedDocument(one_page_document_content, "one_page")]
+    )
+    predict_spy = mocker.spy(worker.classifier, "predict_proba_batch")
+
+    # when
+    await worker.run_once()
+
+    # then
+    assert predict_spy.call_count == 0
+    job_status = await worker.queue.status(job_id)
+    assert job_status["status"] == "completed"
+    assert job_status["failed"] == [{"index": 0, "message": "Virus detected: Eicar-Test-Signature"}]
+
+
+@pytest.mark.anyio
+async def test_failed_forward_pass_recorded_for_every_task_of_the_batch(
+    mocker, fake_valkey, fake_script_model, one_page_document_content, two_pages_document_content
+):
+    # given
+    worker = create_worker(mocker, fake_valkey, fake_script_model, ClamdSessionStub())
+    await worker.queue.ensure_group()
+    job_id = await worker.queue.submit(
+        "v1",
+        [
+            IngestedDocument(one_page_document_content, "one_page"),
+            IngestedDocument(two_pages_document_content, "two_pages"),
+        ],
+    )
+    mocker.patch.object(
+        worker.classifier, "predict_proba_batch", side_effect=RuntimeError("Out of memory")
+    )
+
+    # when
+    await worker.run_once()
+
+    # then
+    job_status = await worker.queue.status(job_id)
+    assert job_status["status"] == "completed"
+    assert job_status["failed"] == [
+        {"index": 0, "message": "Out of memory"},
+        {"index": 1, "message": "Out of memory"},
+    ]
+    assert await worker.queue.claim("other_consumer", 16, 0) == []
+
+
+@pytest.mark.anyio
+async def test_worker_keeps_running_after_failed_iteration(mocker, fake_valkey, fake_script_model):
+    # given
+    worker = create_worker(mocker, fake_valkey, fake_script_model, ClamdSessionStub())
+    worker.retry_delay = 0.01
+
+    async def run_once():
+        if run_once_mock.call_count == 3:
+            worker.stop()
+            return 0
+        raise ConnectionError("Valkey is not available")
+
+    run_once_mock = mocker.patch.object(worker, "run_once", side_effect=run_once)
+    sleep_spy = mocker.spy(worker, "_wait_before_retry")
+
+    # when
+    await worker.run()
+
+    # then
+    assert run_once_mock.call_count == 3
+    assert [call.args[0] for call in sleep_spy.call_args_list] == [0.01, 0.02]
@@ -0,0 +1,74 @@
+from web_app.database.memory.cache import MemoryCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_get_counts_hits_and_misses():
+    # given
+    cache = MemoryCache(max_size=2, ttl=10)
+    value = {"label": 1}
+    cache.set("v1_key", value)
+
+    # when
+    hit = cache.get("v1_key")
+    miss = cache.get("v2_key")
+
+    # then
+    assert hit == value
+    assert miss is None
+    assert cache.stats.hits == 1
+    assert cache.stats.misses == 1
+    assert cache.stats.evictions == 0
+
+
+def test_least_recently_used_entry_evicted():
+    # given
+    cache = MemoryCache(max_size=2, ttl=10)
+    cache.set("first", 1)
+    cache.set("second", 2)
+    cache.get("first")
+
+    # when
+    cache.set("third", 3)
+
+    # then
+    assert len(cache) == 2
+    assert cache.get("second") is None
+    assert cache.get("first") == 1
+    assert cache.get("third") == 3
+    assert cache.stats.evictions == 1
+
+
+def test_expired_entry_evicted():
+    # given
+    clock = FakeClock()
+    cache = MemoryCache(max_size=2, ttl=10, clock=clock)
+    cache.set("key", 1)
+
+    # when
+    clock.now = 10.0
+    result = cache.get("key")
+
+    # then
+    assert result is None
+    assert len(cache) == 0
+    assert cache.stats.misses == 1
+    assert cache.stats.evictions == 1
+
+
+def test_zero_max_size_disables_cache():
+    # given
+    cache = MemoryCache(max_size=0, ttl=10)
+
+    # when
+    cache.set("key", 1)
+
+    # then
+    assert len(cache) == 0
+    assert cache.get("key") is None
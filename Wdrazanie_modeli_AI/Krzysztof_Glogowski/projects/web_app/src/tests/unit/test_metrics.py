@@ -0,0 +1,67 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from web_app.utils.metrics import (
+    REGISTRY,
+    collect_stage_durations,
+    record_cache_lookups,
+    render,
+    stage_timer,
+)
+
+
+def stage_count(stage: str) -> float:
+    return (
+        REGISTRY.get_sample_value(
+            "document_classification_stage_duration_seconds_count", {"stage": stage}
+        )
+        or 0
+    )
+
+
+def test_metrics_rendered_in_text_exposition_format():
+    # given
+    record_cache_lookups("memory", {"prediction_v1_digest": None, "verified_digest": b"1"})
+
+    # when
+    rendered = render().decode()
+
+    # then
+    assert "# TYPE document_classification_stage_duration_seconds histogram" in rendered
+    assert "# TYPE document_classification_cache_lookups_total counter" in rendered
+    assert (
+        'document_classification_cache_lookups_total{kind="prediction",result="miss",tier="memory"}'
+        in rendered
+    )
+    assert (
+        'document_classification_cache_lookups_total{kind="verified",result="hit",tier="memory"}'
+        in rendered
+    )
+    assert "# TYPE document_classification_inference_queue_depth gauge" in rendered
+
+
+def test_stage_durations_collected_in_executor_returned_to_caller():
+    # given
+    def timed_stage() -> str:
+        with stage_timer("unit_test_stage"):
+            return "result"
+
+    # when
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        result, durations = executor.submit(collect_stage_durations, timed_stage).result()
+
+    # then
+    assert result == "result"
+    assert [stage for stage, _ in durations] == ["unit_test_stage"]
+    assert stage_count("unit_test_stage") == 0
+
+
+def test_stage_duration_observed_outside_executor():
+    # given
+    count_before = stage_count("unit_test_direct_stage")
+
+    # when
+    with stage_timer("unit_test_direct_stage"):
+        pass
+
+    # then
+    assert stage_count("unit_test_direct_stage") == count_before + 1
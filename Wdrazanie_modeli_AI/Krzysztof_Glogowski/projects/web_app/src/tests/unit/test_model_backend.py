@@ -0,0 +1,91 @@
+import io
+
+import numpy as np
+import pytest
+import torch
+
+from tests.fixture import fake_script_model, model_prediction_v2
+from web_app.model.backend import OnnxRuntimeModel, load_model
+from web_app.model.document_classifier import DocumentClassifier, get_model_path
+
+# to prevent IDE from removing unused imports START
+fake_script_model
+model_prediction_v2
+# to prevent IDE from removing unused imports END
+
+
+class OnnxSessionStub:
+    def __init__(self, logits: np.ndarray):
+        self.logits = logits
+        self.inputs: list[dict[str, np.ndarray]] = []
+
+    def run(self, output_names, inputs):
+        self.inputs.append(inputs)
+        return [self.logits[: len(inputs["lengths"])]]
+
+
+def test_torchscript_model_loaded_from_bytes(fake_script_model):
+    # given
+    buffer = io.BytesIO()
+    torch.jit.save(fake_script_model, buffer)
+
+    # when
+    model = load_model(buffer.getvalue(), "torchscript")
+
+    # then
+    assert isinstance(model, torch.jit.ScriptModule)
+
+
+def test_unknown_model_backend_rejected():
+    # when
+    with pytest.raises(ValueError):
+        load_model(b"", "tensorrt")
+
+
+def test_onnx_model_path_resolved():
+    # when
+    path = get_model_path("gs://bucket/model.pt", "fp32", "onnxruntime")
+
+    # then
+    assert path == "gs://bucket/model.onnx"
+    with pytest.raises(ValueError):
+        get_model_path("gs://bucket/model.pt", "int8", "onnxruntime")
+
+
+def test_onnx_runtime_model_predicts_like_torchscript(model_prediction_v2):
+    # given
+    logits = np.array([[0.1, 0.6, 0.9, -0.01]] * 2, dtype=np.float32)
+    session = OnnxSessionStub(logits)
+    classifier = DocumentClassifier(OnnxRuntimeModel(session))
+    images = torch.ones((3, 3, 224, 224))
+    lengths = torch.tensor([2, 1], dtype=torch.int32)
+
+    # when
+    predicted_proba = classifier.predict_proba_batch(images, lengths)
+    prediction = classifier.classify_proba(images[:1], lengths[:1])
+
+    # then
+    assert predicted_proba.shape == (2, 4)
+    assert DocumentClassifier.to_label(predicted_proba[0]) == {"label": 2}
+    assert prediction == pytest.approx(model_prediction_v2)
+    assert session.inputs[0]["images"].shape == (3, 3, 224, 224)
+    assert session.inputs[0]["lengths"].dtype == np.int64
+
+
+def test_onnx_runtime_session_created_with_options(mocker):
+    # given
+    onnxruntime = pytest.importorskip("onnxruntime")
+    session_mock = mocker.patch.object(onnxruntime, "InferenceSession")
+
+    # when
+    OnnxRuntimeModel.from_bytes(
+        b"", intra_op_threads=2, inter_op_threads=1, graph_optimization_level="extended"
+    )
+
+    # then
+    options = session_mock.call_args.kwargs["sess_options"]
+    assert options.intra_op_num_threads == 2
+    assert (
+        options.graph_optimization_level == onnxruntime.GraphOptimizationLevel.ORT_ENABLE_EXTENDED
+    )
+    assert session_mock.call_args.kwargs["providers"] == ["CPUExecutionProvider"]
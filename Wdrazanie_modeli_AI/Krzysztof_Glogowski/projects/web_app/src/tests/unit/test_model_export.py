@@ -0,0 +1,106 @@
+import io
+
+import pytest
+import timm
+import torch
+from torch.nn.functional import cosine_similarity
+
+from ml_pipelines.model_export import MODEL_VARIANTS, export_model, load_exported_model
+from ml_pipelines.models import MLP, AvgImageEncoder, DocumentClassifier
+from web_app.model.backend import load_model
+
+
+def create_model() -> DocumentClassifier:
+    torch.manual_seed(0)
+    # the architecture of the deployed backbone, its patch embedding is a Conv2d
+    backbone = timm.create_model(
+        "vit_tiny_patch16_224", pretrained=False, num_classes=0, img_size=32, depth=2
+    )
+    encoder = AvgImageEncoder(backbone)
+    return DocumentClassifier(encoder, MLP(encoder.output_size, [16], 4)).eval()
+
+
+def create_images() -> torch.Tensor:
+    return torch.rand((3, 3, 32, 32), generator=torch.Generator().manual_seed(0))
+
+
+def export_to_bytes(model: DocumentClassifier, variant: str) -> bytes:
+    buffer = io.BytesIO()
+    torch.jit.save(export_model(model, variant), buffer)
+    return buffer.getvalue()
+
+
+def load_as_deployed(content: bytes, variant: str) -> torch.jit.ScriptModule:
+    return load_model(content, "torchscript", optimize_for_inference=variant != "fp32")
+
+
+@pytest.mark.parametrize("variant", MODEL_VARIANTS)
+def test_exported_model_loaded_by_web_app(variant):
+    # given
+    images = create_images()
+    lengths = torch.tensor([2, 1])
+    content = export_to_bytes(create_model(), variant)
+
+    # when
+    model = load_as_deployed(content, variant)
+    logits = model(images, lengths)
+    predicted_proba = model.predict_proba(images[:2], lengths[:1])
+    embeddings = model.embed_pages(images)
+    head_logits = model.classify_page_embeddings(embeddings, lengths)
+
+    # then
+    assert logits.shape == (2, 4)
+    assert predicted_proba.shape == (4,)
+    assert embeddings.shape == (3, 192)
+    assert torch.allclose(head_logits, logits, atol=1e-5)
+
+
+@pytest.mark.parametrize(
+    "variant, tolerance, min_similarity", [("frozen", 1e-5, 0.9999), ("int8", 5e-2, 0.99)]
+)
+def test_exported_model_predicts_like_fp32(variant, tolerance, min_similarity):
+    # given
+    images = create_images()
+    lengths = torch.tensor([2, 1])
+    fp32_model = load_as_deployed(export_to_bytes(create_model(), "fp32"), "fp32")
+    embeddings = fp32_model.embed_pages(images)
+    content = export_to_bytes(create_model(), variant)
+
+    # when
+    model = load_as_deployed(content, variant)
+
+    # then
+    assert torch.allclose(
+        model.predict_proba(images[:2], lengths[:1]),
+        fp32_model.predict_proba(images[:2], lengths[:1]),
+        atol=tolerance,
+    )
+    # quantized backbone features drift elementwise but keep their direction
+    similarity = cosine_similarity(model.embed_pages(images), embeddings)
+    assert bool((similarity >= min_similarity).all())
+    assert torch.allclose(
+        model.classify_page_embeddings(embeddings, lengths),
+        fp32_model.classify_page_embeddings(embeddings, lengths),
+        atol=tolerance,
+    )
+
+
+@pytest.mark.parametrize("variant", MODEL_VARIANTS)
+def test_exported_model_loaded_by_pipeline_like_web_app(variant):
+    # given
+    images = create_images()
+    lengths = torch.tensor([2, 1])
+    content = export_to_bytes(create_model(), variant)
+
+    # when
+    pipeline_model = load_exported_model(content, variant)
+    deployed_model = load_as_deployed(content, variant)
+
+    # then
+    assert torch.allclose(pipeline_model(images, lengths), deployed_model(images, lengths))
+
+
+def test_unknown_variant_rejected():
+    # when # then
+    with pytest.raises(ValueError, match="Unknown model variant"):
+        export_model(create_model(), "fp16")
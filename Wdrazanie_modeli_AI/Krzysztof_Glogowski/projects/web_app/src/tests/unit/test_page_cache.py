@@ -0,0 +1,143 @@
+import pytest
+import torch
+
+from tests.fixture import fake_paged_script_model, fake_script_model, fake_valkey
+from web_app.database.memory.cache import MemoryCache
+from web_app.database.valkey.client import ValkeyClient
+from web_app.database.valkey.connector import ValkeyConnector
+from web_app.model.batcher import MicroBatcher
+from web_app.model.document_classifier import DocumentClassifier
+from web_app.model.executor import InferenceExecutor
+from web_app.model.page_cache import PageEmbeddingCache, hash_pages, page_embedding_key
+
+# to prevent IDE from removing unused imports START
+fake_paged_script_model
+fake_script_model
+fake_valkey
+# to prevent IDE from removing unused imports END
+
+
+def create_pages(*values: float) -> torch.Tensor:
+    return torch.stack([torch.full((3, 8, 8), value) for value in values])
+
+
+@pytest.mark.anyio
+async def test_shared_pages_embedded_once(fake_paged_script_model, mocker):
+    # given
+    classifier = DocumentClassifier(fake_paged_script_model)
+    page_cache = PageEmbeddingCache(InferenceExecutor.with_threads(classifier), MemoryCache(), "v1")
+    embed_spy = mocker.spy(classifier, "embed_pages")
+    images = create_pages(1.0, 2.0, 1.0)
+    lengths = torch.tensor([2, 1])
+
+    # when
+    predicted_proba = await page_cache.predict_proba_batch(images, lengths)
+
+    # then
+    assert embed_spy.call_count == 1
+    assert embed_spy.call_args.args[0].shape == (2, 3, 8, 8)
+    assert torch.allclose(predicted_proba, classifier.predict_proba_batch(images, lengths))
+
+
+@pytest.mark.anyio
+async def test_cached_pages_not_embedded_again(fake_paged_script_model, mocker):
+    # given
+    classifier = DocumentClassifier(fake_paged_script_model)
+    page_cache = PageEmbeddingCache(InferenceExecutor.with_threads(classifier), MemoryCache(), "v1")
+    await page_cache.predict_proba_batch(create_pages(1.0, 2.0), torch.tensor([2]))
+    embed_spy = mocker.spy(classifier, "embed_pages")
+
+    # when
+    await page_cache.predict_proba_batch(create_pages(2.0, 3.0), torch.tensor([1, 1]))
+
+    # then
+    assert embed_spy.call_count == 1
+    assert embed_spy.call_args.args[0].equal(create_pages(3.0))
+    assert page_cache.memory_cache.stats.hits == 1
+
+
+@pytest.mark.anyio
+async def test_embeddings_shared_between_workers_through_valkey(
+    fake_paged_script_model, fake_valkey, mocker
+):
+    # given
+    mocker.patch.object(ValkeyConnector, "_create_connection", return_value=fake_valkey)
+    valkey_client = ValkeyClient(ValkeyConnector("0.0.0.0", 0))
+    classifier = DocumentClassifier(fake_paged_script_model)
+    executor = InferenceExecutor.with_threads(classifier)
+    images = create_pages(1.0, 2.0)
+    lengths = torch.tensor([2])
+    first_worker = PageEmbeddingCache(executor, MemoryCache(), "v1", valkey_client, valkey_ttl=60)
+    second_worker = PageEmbeddingCache(executor, MemoryCache(), "v1", valkey_client, valkey_ttl=60)
+    expected_proba = await first_worker.predict_proba_batch(images, lengths)
+    embed_spy = mocker.spy(classifier, "embed_pages")
+
+    # when
+    predicted_proba = await second_worker.predict_proba_batch(images, lengths)
+
+    # then
+    assert embed_spy.call_count == 0
+    assert torch.allclose(predicted_proba, expected_proba)
+    assert 0 < await fake_valkey.ttl(page_embedding_key("v1", hash_pages(images)[0])) <= 60
+
+
+@pytest.mark.anyio
+async def test_embeddings_of_another_model_version_not_reused(
+    fake_paged_script_model, fake_valkey, mocker
+):
+    # given
+    mocker.patch.object(ValkeyConnector, "_create_connection", return_value=fake_valkey)
+    valkey_client = ValkeyClient(ValkeyConnector("0.0.0.0", 0))
+    classifier = DocumentClassifier(fake_paged_script_model)
+    executor = InferenceExecutor.with_threads(classifier)
+    images = create_pages(1.0, 2.0)
+    lengths = torch.tensor([2])
+    previous_model = PageEmbeddingCache(executor, MemoryCache(), "v1", valkey_client)
+    new_model = PageEmbeddingCache(executor, MemoryCache(), "v2", valkey_client)
+    await previous_model.predict_proba_batch(images, lengths)
+    embed_spy = mocker.spy(classifier, "embed_pages")
+
+    # when
+    await new_model.predict_proba_batch(images, lengths)
+
+    # then
+    assert embed_spy.call_count == 1
+    assert await fake_valkey.exists(page_embedding_key("v2", hash_pages(images)[0])) == 1
+
+
+@pytest.mark.anyio
+async def test_batcher_uses_page_cache(fake_paged_script_model, mocker):
+    # given
+    classifier = DocumentClassifier(fake_paged_script_model)
+    executor = InferenceExecutor.with_threads(classifier)
+    page_cache = PageEmbeddingCache(executor, MemoryCache(), "v1")
+    batcher = MicroBatcher(executor, max_batch_size=8, max_wait_time=0.05, page_cache=page_cache)
+    forward_spy = mocker.spy(classifier, "predict_proba_batch")
+    cache_spy = mocker.spy(page_cache, "predict_proba_batch")
+
+    # when
+    batcher.start()
+    result = await batcher.predict_proba(create_pages(1.0), torch.tensor([1]))
+    await batcher.stop()
+
+    # then
+    assert result.shape == (4,)
+    assert cache_spy.call_count == 1
+    assert forward_spy.call_count == 0
+
+
+@pytest.mark.anyio
+async def test_page_embeddings_supported_only_by_models_exporting_them(
+    fake_paged_script_model, fake_script_model
+):
+    # given
+    paged_executor = InferenceExecutor.with_threads(DocumentClassifier(fake_paged_script_model))
+    executor = InferenceExecutor.with_threads(DocumentClassifier(fake_script_model))
+
+    # when
+    paged_supported = await paged_executor.supports_page_embeddings()
+    supported = await executor.supports_page_embeddings()
+
+    # then
+    assert paged_supported is True
+    assert supported is False
@@ -0,0 +1,102 @@
+import pytest
+
+from tests.fixture import fake_valkey
+from web_app.database.valkey.client import ValkeyClient
+from web_app.database.valkey.connector import ValkeyConnector
+from web_app.database.valkey.popular_documents import PopularDocuments
+from web_app.service.validator.upload_file_validator import IngestedDocument
+
+# to prevent IDE from removing unused imports START
+fake_valkey
+# to prevent IDE from removing unused imports END
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture(scope="function")
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture(scope="function")
+def popular_documents(mocker, fake_valkey, clock):
+    mocker.patch.object(ValkeyConnector, "_create_connection", return_value=fake_valkey)
+    return PopularDocuments(
+        ValkeyClient(ValkeyConnector("0.0.0.0", 0)),
+        min_hits=2,
+        window_days=2,
+        document_ttl=60,
+        max_documents=2,
+        clock=clock,
+    )
+
+
+@pytest.mark.anyio
+async def test_content_kept_once_document_is_popular(popular_documents, fake_valkey):
+    # given
+    first = IngestedDocument(b"first", "first")
+    second = IngestedDocument(b"second", "second")
+
+    # when
+    await popular_documents.record([first, second, first])
+    kept_after_one_request = await popular_documents.load(["first", "second"])
+    await popular_documents.record([first])
+    kept_after_two_requests = await popular_documents.load(["first", "second"])
+
+    # then
+    assert kept_after_one_request == {"first": None, "second": None}
+    assert kept_after_two_requests == {"first": b"first", "second": None}
+    assert 0 < await fake_valkey.ttl("popular_document_first") <= 60
+
+
+@pytest.mark.anyio
+async def test_content_kept_only_for_most_requested_documents(popular_documents, fake_valkey):
+    # given
+    first = IngestedDocument(b"first", "first")
+    second = IngestedDocument(b"second", "second")
+    third = IngestedDocument(b"third", "third")
+    for _ in range(3):
+        await popular_documents.record([first, second])
+    await popular_documents.record([first])
+
+    # when
+    for _ in range(3):
+        await popular_documents.record([third])
+
+    # then
+    assert await popular_documents.load(["first", "second", "third"]) == {
+        "first": b"first",
+        "second": None,
+        "third": b"third",
+    }
+    assert await fake_valkey.smembers("popular_document_digests") == {b"first", b"third"}
+
+
+@pytest.mark.anyio
+async def test_most_requested_counted_over_window(popular_documents, clock):
+    # given
+    first = IngestedDocument(b"first", "first")
+    second = IngestedDocument(b"second", "second")
+    third = IngestedDocument(b"third", "third")
+    rare = IngestedDocument(b"rare", "rare")
+    for _ in range(4):
+        await popular_documents.record([first])
+    clock.now += 86400
+    for _ in range(2):
+        await popular_documents.record([second, third])
+    await popular_documents.record([second, rare])
+    most_requested_in_window = await popular_documents.most_requested(2)
+
+    # when
+    clock.now += 86400
+    most_requested_after_a_day = await popular_documents.most_requested(10)
+
+    # then
+    assert most_requested_in_window == ["first", "second"]
+    assert most_requested_after_a_day == ["second", "third"]
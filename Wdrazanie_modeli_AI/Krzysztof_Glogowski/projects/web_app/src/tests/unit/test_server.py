@@ -0,0 +1,166 @@
+import signal
+import socket
+
+import torch
+from fastapi import FastAPI
+from torch import nn
+
+from web_app.model.document_classifier import DocumentClassifier
+from web_app.server import (
+    PreforkServer,
+    clear_metrics_directory,
+    create_socket,
+    share_model_memory,
+)
+
+
+def test_model_parameters_moved_to_shared_memory():
+    # given
+    model = torch.jit.script(nn.Sequential(nn.Linear(4, 4), nn.BatchNorm1d(4)))
+    classifier = DocumentClassifier(model)
+
+    # when
+    share_model_memory(classifier)
+
+    # then
+    assert all(parameter.is_shared() for parameter in classifier.model.parameters())
+    assert all(buffer.is_shared() for buffer in classifier.model.buffers())
+
+
+def test_socket_bound_and_inheritable():
+    # when
+    sock = create_socket("127.0.0.1", 0)
+
+    # then
+    assert sock.get_inheritable() is True
+    assert sock.getsockopt(socket.SOL_SOCKET, socket.SO_ACCEPTCONN) == 1
+    sock.close()
+
+
+def test_crashed_worker_restarted(mocker):
+    # given
+    server = PreforkServer(app=None, host="127.0.0.1", port=0, workers=2, load_classifier=None)
+    server.children = {101, 102}
+    mocker.patch("web_app.server.time.sleep")
+    mocker.patch("web_app.server.os.fork", return_value=103)
+
+    def wait():
+        if 103 not in server.children:
+            return 101, 1
+        server._stopping = True
+        return server.children.pop(), 0
+
+    mocker.patch("web_app.server.os.wait", side_effect=wait)
+
+    # when
+    server._supervise()
+
+    # then
+    assert server.children == set()
+
+
+def test_dead_worker_removed_from_aggregated_metrics(mocker, monkeypatch, tmp_path):
+    # given
+    monkeypatch.setenv("PROMETHEUS_MULTIPROC_DIR", str(tmp_path))
+    server = PreforkServer(app=None, host="127.0.0.1", port=0, workers=1, load_classifier=None)
+    server.children = {101}
+    server._stopping = True
+    mocker.patch("web_app.server.os.wait", return_value=(101, 0))
+    mark_process_dead_mock = mocker.patch("web_app.server.multiprocess.mark_process_dead")
+
+    # when
+    server._supervise()
+
+    # then
+    mark_process_dead_mock.assert_called_once_with(101)
+
+
+def test_metric_files_of_previous_run_removed(monkeypatch, tmp_path):
+    # given
+    monkeypatch.setenv("PROMETHEUS_MULTIPROC_DIR", str(tmp_path))
+    (tmp_path / "counter_101.db").write_bytes(b"")
+    (tmp_path / "notes.txt").write_text("kept")
+
+    # when
+    clear_metrics_directory()
+
+    # then
+    assert [path.name for path in tmp_path.iterdir()] == ["notes.txt"]
+
+
+def test_metric_files_kept_without_multiprocess_directory(monkeypatch, tmp_path):
+    # given
+    monkeypatch.delenv("PROMETHEUS_MULTIPROC_DIR", raising=False)
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "counter_101.db").write_bytes(b"")
+
+    # when
+    clear_metrics_directory()
+
+    # then
+    assert [path.name for path in tmp_path.iterdir()] == ["counter_101.db"]
+
+
+def test_stop_forwarded_to_workers(mocker):
+    # given
+    server = PreforkServer(app=None, host="127.0.0.1", port=0, workers=2, load_classifier=None)
+    server.children = {101, 102}
+    kill_mock = mocker.patch("web_app.server.os.kill")
+
+    # when
+    server._stop(signal.SIGTERM, None)
+
+    # then
+    assert server._stopping is True
+    assert sorted(call.args for call in kill_mock.call_args_list) == [
+        (101, signal.SIGTERM),
+        (102, signal.SIGTERM),
+    ]
+
+
+def test_stop_skips_already_exited_workers(mocker):
+    # given
+    server = PreforkServer(app=None, host="127.0.0.1", port=0, workers=2, load_classifier=None)
+    server.children = {101, 102}
+
+    def kill(pid: int, signum: int) -> None:
+        if pid == 101:
+            raise ProcessLookupError()
+
+    kill_mock = mocker.patch("web_app.server.os.kill", side_effect=kill)
+
+    # when
+    server._stop(signal.SIGTERM, None)
+
+    # then
+    assert server._stopping is True
+    assert sorted(call.args for call in kill_mock.call_args_list) == [
+        (101, signal.SIGTERM),
+        (102, signal.SIGTERM),
+    ]
+
+
+def test_classifier_not_preloaded_for_backend_that_is_not_fork_safe(mocker):
+    # given
+    app = FastAPI()
+    load_classifier = mocker.Mock()
+    server = PreforkServer(
+        app=app,
+        host="127.0.0.1",
+        port=0,
+        workers=2,
+        load_classifier=load_classifier,
+        preload_classifier=False,
+    )
+    mocker.patch("web_app.server.create_socket")
+    mocker.patch("web_app.server.signal.signal")
+    spawn_mock = mocker.patch.object(server, "_spawn")
+    mocker.patch.object(server, "_supervise")
+
+    # when
+    server.run()
+
+    # then
+    load_classifier.assert_not_called()
+    assert not hasattr(app.state, "preloaded_classifier")
+    assert spawn_mock.call_count == 2
@@ -0,0 +1,159 @@
+import asyncio
+import json
+
+import pytest
+
+from tests.fixture import fake_valkey
+from web_app.database.valkey.client import ValkeyClient
+from web_app.database.valkey.connector import ValkeyConnector
+from web_app.service.single_flight import SingleFlight, ValkeySingleFlight
+
+# to prevent IDE from removing unused imports START
+fake_valkey
+# to prevent IDE from removing unused imports END
+
+
+class SlowCall:
+    def __init__(self, result=None, error: Exception | None = None):
+        self.result = result
+        self.error = error
+        self.call_count = 0
+
+    async def __call__(self):
+        self.call_count += 1
+        await asyncio.sleep(0.05)
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+
+@pytest.fixture(scope="function")
+def valkey_client(mocker, fake_valkey):
+    mocker.patch.object(ValkeyConnector, "_create_connection", return_value=fake_valkey)
+    return ValkeyClient(ValkeyConnector("0.0.0.0", 0))
+
+
+@pytest.mark.anyio
+async def test_concurrent_calls_with_same_key_coalesced():
+    # given
+    single_flight = SingleFlight()
+    call = SlowCall(result={"label": 2})
+
+    # when
+    results = await asyncio.gather(*[single_flight.do("v1_key", call) for _ in range(3)])
+
+    # then
+    assert call.call_count == 1
+    assert results == [{"label": 2}] * 3
+    assert len(single_flight) == 0
+
+
+@pytest.mark.anyio
+async def test_calls_with_different_keys_not_coalesced():
+    # given
+    single_flight = SingleFlight()
+    call = SlowCall(result={"label": 2})
+
+    # when
+    await asyncio.gather(single_flight.do("v1_key", call), single_flight.do("v2_key", call))
+
+    # then
+    assert call.call_count == 2
+
+
+@pytest.mark.anyio
+async def test_error_propagated_to_all_waiters():
+    # given
+    single_flight = SingleFlight()
+    call = SlowCall(error=RuntimeError("failed"))
+
+    # when
+    results = await asyncio.gather(
+        single_flight.do("v1_key", call), single_flight.do("v1_key", call), return_exceptions=True
+    )
+
+    # then
+    assert call.call_count == 1
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert len(single_flight) == 0
+
+
+@pytest.mark.anyio
+async def test_cancelled_caller_does_not_cancel_call_for_other_waiters():
+    # given
+    single_flight = SingleFlight()
+    call = SlowCall(result={"label": 2})
+    first = asyncio.ensure_future(single_flight.do("v1_key", call))
+    second = asyncio.ensure_future(single_flight.do("v1_key", call))
+    await asyncio.sleep(0)
+
+    # when
+    first.cancel()
+    result = await second
+
+    # then
+    assert result == {"label": 2}
+    assert call.call_count == 1
+
+
+@pytest.mark.anyio
+async def test_lock_holder_publishes_result_and_releases_lock(valkey_client, fake_valkey):
+    # given
+    single_flight = ValkeySingleFlight(valkey_client, lock_ttl=1, poll_interval=0.01)
+    call = SlowCall(result={"label": 2})
+
+    # when
+    result = await single_flight.do("v1_key", call)
+
+    # then
+    assert result == {"label": 2}
+    assert call.call_count == 1
+    assert json.loads(await fake_valkey.get("v1_key")) == {"label": 2}
+    assert await fake_valkey.exists("lock_v1_key") == 0
+
+
+@pytest.mark.anyio
+async def test_result_of_other_worker_awaited(valkey_client, fake_valkey):
+    # given
+    single_flight = ValkeySingleFlight(valkey_client, lock_ttl=1, poll_interval=0.01)
+    call = SlowCall(result={"label": 2})
+    await fake_valkey.set("lock_v1_key", "other_worker", px=1000)
+
+    async def other_worker():
+        await asyncio.sleep(0.05)
+        await fake_valkey.set("v1_key", json.dumps({"label": 3}))
+        await fake_valkey.delete("lock_v1_key")
+
+    # when
+    result, _ = await asyncio.gather(single_flight.do("v1_key", call), other_worker())
+
+    # then
+    assert result == {"label": 3}
+    assert call.call_count == 0
+
+
+@pytest.mark.anyio
+async def test_call_run_when_other_worker_released_lock_without_result(valkey_client, fake_valkey):
+    # given
+    single_flight = ValkeySingleFlight(valkey_client, lock_ttl=1, poll_interval=0.01)
+    call = SlowCall(result={"label": 2})
+    await fake_valkey.set("lock_v1_key", "other_worker", px=30)
+
+    # when
+    result = await single_flight.do("v1_key", call)
+
+    # then
+    assert result == {"label": 2}
+    assert call.call_count == 1
+
+
+@pytest.mark.anyio
+async def test_lock_of_other_worker_not_released(valkey_client, fake_valkey):
+    # given
+    await fake_valkey.set("lock_v1_key", "other_worker")
+
+    # when
+    await valkey_client.release_lock("lock_v1_key", "token")
+
+    # then
+    assert await fake_valkey.get("lock_v1_key") == b"other_worker"
@@ -0,0 +1,83 @@
+import hashlib
+from io import BytesIO
+
+import pytest
+from fastapi import UploadFile
+from fastapi.exceptions import RequestValidationError
+
+from tests.fixture import one_page_document_content
+from web_app.service.validator.upload_file_validator import UploadFileValidator
+
+# to prevent IDE from removing unused imports START
+one_page_document_content
+# to prevent IDE from removing unused imports END
+
+
+@pytest.mark.anyio
+async def test_read_valid_document(one_page_document_content):
+    # given
+    validator = UploadFileValidator(chunk_size=1024)
+    upload_file = UploadFile(BytesIO(one_page_document_content))
+
+    # when
+    document = await validator.read(upload_file)
+
+    # then
+    assert document.content == one_page_document_content
+    assert document.digest == hashlib.sha256(one_page_document_content).hexdigest()
+
+
+@pytest.mark.anyio
+async def test_declared_size_rejected_before_reading(mocker):
+    # given
+    validator = UploadFileValidator()
+    upload_file = UploadFile(BytesIO(b"%PDF-"), size=validator.validator.max_file_size + 1)
+    read_spy = mocker.spy(upload_file, "read")
+
+    # when # then
+    with pytest.raises(RequestValidationError, match="exceeds the maximum limit"):
+        await validator.read(upload_file)
+
+    assert read_spy.call_count == 0
+
+
+@pytest.mark.anyio
+async def test_oversized_stream_rejected_as_soon_as_limit_exceeded(
+    one_page_document_content, mocker
+):
+    # given
+    validator = UploadFileValidator(chunk_size=1024 * 1024)
+    oversized_content = one_page_document_content + bytes(10 * 1024 * 1024)
+    upload_file = UploadFile(BytesIO(oversized_content))
+    read_spy = mocker.spy(upload_file, "read")
+
+    # when # then
+    with pytest.raises(RequestValidationError, match="exceeds the maximum limit"):
+        await validator.read(upload_file)
+
+    assert read_spy.call_count == 3
+
+
+@pytest.mark.anyio
+async def test_unsupported_content_type_rejected_after_first_chunk(mocker):
+    # given
+    validator = UploadFileValidator(chunk_size=4096)
+    upload_file = UploadFile(BytesIO(b"plain text " * 1024))
+    read_spy = mocker.spy(upload_file, "read")
+
+    # when # then
+    with pytest.raises(RequestValidationError, match="Unsupported content type: text/plain"):
+        await validator.read(upload_file)
+
+    assert read_spy.call_count == 1
+
+
+@pytest.mark.anyio
+async def test_empty_file_rejected():
+    # given
+    validator = UploadFileValidator()
+    upload_file = UploadFile(BytesIO(b""))
+
+    # when # then
+    with pytest.raises(RequestValidationError, match="File size must be greater than 0"):
+        await validator.read(upload_file)
@@ -1,27 +1,40 @@
 import json
 
+import pytest
+import valkey
+
 from tests.fixture import fake_valkey
 from web_app.database.valkey.client import ValkeyClient
 from web_app.database.valkey.connector import ValkeyConnector
+from web_app.model.prediction import PredictionRecord
+from web_app.utils.error import ValkeyConnectionNotAliveError
+
+# to prevent IDE from removing unused imports START
+fake_valkey
+# to prevent IDE from removing unused imports END
 
 
-def test_read_when_key_exists(mocker, fake_valkey):
+@pytest.mark.anyio
+async def test_read_when_key_exists(mocker, fake_valkey):
     # given
     mocker.patch.object(ValkeyConnector, "_create_connection", return_value=fake_valkey)
     connector = ValkeyConnector("0.0.0.0", 0)
     valkey_client = ValkeyClient(connector)
+    ping_spy = mocker.spy(fake_valkey, "ping")
     key = "test_key"
     value = [{"label": 0, "confidence": 0.96}]
-    fake_valkey.set(key, json.dumps(value))
+    await fake_valkey.set(key, json.dumps(value))
 
     # when
-    result = valkey_client.read(key)
+    result = await valkey_client.read(key)
 
     # then
     assert result == value
+    assert ping_spy.call_count == 0
 
 
-def test_read_when_key_not_exists(mocker, fake_valkey):
+@pytest.mark.anyio
+async def test_read_when_key_not_exists(mocker, fake_valkey):
     # given
     mocker.patch.object(ValkeyConnector, "_create_connection", return_value=fake_valkey)
     connector = ValkeyConnector("0.0.0.0", 0)
@@ -29,13 +42,27 @@ def test_read_when_key_not_exists(mocker, fake_valkey):
     key = "non_existent_key"
 
     # when
-    result = valkey_client.read(key)
+    result = await valkey_client.read(key)
 
     # then
     assert result is None
 
 
-def test_write(mocker, fake_valkey):
+@pytest.mark.anyio
+async def test_read_connection_error(mocker, fake_valkey):
+    # given
+    mocker.patch.object(ValkeyConnector, "_create_connection", return_value=fake_valkey)
+    mocker.patch.object(fake_valkey, "get", side_effect=valkey.exceptions.ConnectionError())
+    connector = ValkeyConnector("0.0.0.0", 0)
+    valkey_client = ValkeyClient(connector)
+
+    # when # then
+    with pytest.raises(ValkeyConnectionNotAliveError):
+        await valkey_client.read("test_key")
+
+
+@pytest.mark.anyio
+async def test_write(mocker, fake_valkey):
     # given
     mocker.patch.object(ValkeyConnector, "_create_connection", return_value=fake_valkey)
     connector = ValkeyConnector("0.0.0.0", 0)
@@ -44,10 +71,87 @@ def test_write(mocker, fake_valkey):
     value = [{"label": 0, "confidence": 0.96}]
 
     # when
-    before_write = valkey_client.read(key)
-    valkey_client.write(key, value)
-    after_write = valkey_client.read(key)
+    before_write = await valkey_client.read(key)
+    await valkey_client.write(key, value)
+    after_write = await valkey_client.read(key)
 
     # then
     assert before_write is None
     assert after_write == value
+
+
+@pytest.mark.anyio
+async def test_write_many_uses_single_pipeline(mocker, fake_valkey):
+    # given
+    mocker.patch.object(ValkeyConnector, "_create_connection", return_value=fake_valkey)
+    connector = ValkeyConnector("0.0.0.0", 0)
+    valkey_client = ValkeyClient(connector)
+    pipeline_spy = mocker.spy(fake_valkey, "pipeline")
+    values = {"v1_key": {"label": 1}, "v2_key": [{"label": 1, "confidence": 0.9}]}
+
+    # when
+    await valkey_client.write_many(values)
+
+    # then
+    assert pipeline_spy.call_count == 1
+    assert pipeline_spy.call_args.kwargs["transaction"] is False
+    assert await valkey_client.read("v1_key") == values["v1_key"]
+    assert await valkey_client.read("v2_key") == values["v2_key"]
+
+
+@pytest.mark.anyio
+async def test_read_many(mocker, fake_valkey):
+    # given
+    mocker.patch.object(ValkeyConnector, "_create_connection", return_value=fake_valkey)
+    connector = ValkeyConnector("0.0.0.0", 0)
+    valkey_client = ValkeyClient(connector)
+    await fake_valkey.set("verified_key", json.dumps("27541"))
+
+    # when
+    result = await valkey_client.read_many(["verified_key", "v1_key"])
+
+    # then
+    assert result == ["27541", None]
+
+
+@pytest.mark.anyio
+async def test_write_many_expires_keys_by_prefix(mocker, fake_valkey):
+    # given
+    mocker.patch.object(ValkeyConnector, "_create_connection", return_value=fake_valkey)
+    connector = ValkeyConnector("0.0.0.0", 0)
+    valkey_client = ValkeyClient(connector, ttls={"prediction": 600, "verified": 0})
+    record = PredictionRecord(probabilities=[0.25, 0.75], model_version="version")
+
+    # when
+    await valkey_client.write_many(
+        {"prediction_key": record, "verified_key": "27541", "other_key": [1]}
+    )
+
+    # then
+    assert 0 < await fake_valkey.ttl("prediction_key") <= 600
+    assert await fake_valkey.ttl("verified_key") == -1
+    assert await fake_valkey.ttl("other_key") == -1
+    assert await valkey_client.read_many(["prediction_key", "verified_key"]) == [record, "27541"]
+
+
+@pytest.mark.anyio
+async def test_write_rejected_by_valkey_skipped(mocker, fake_valkey):
+    # given
+    mocker.patch.object(ValkeyConnector, "_create_connection", return_value=fake_valkey)
+    pipeline = mocker.MagicMock()
+    pipeline.__aenter__.return_value = pipeline
+    pipeline.execute = mocker.AsyncMock(
+        side_effect=valkey.exceptions.ResponseError(
+            "OOM command not allowed when used memory > 'maxmemory'."
+        )
+    )
+    mocker.patch.object(fake_valkey, "pipeline", return_value=pipeline)
+    connector = ValkeyConnector("0.0.0.0", 0)
+    valkey_client = ValkeyClient(connector)
+
+    # when
+    await valkey_client.write_many({"prediction_key": [1]})
+    await valkey_client.write_many_raw({"page_embedding_key": b"embedding"}, ttl=60)
+
+    # then
+    assert pipeline.execute.call_count == 2
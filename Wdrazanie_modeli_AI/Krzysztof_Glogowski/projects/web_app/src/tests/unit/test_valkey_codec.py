@@ -0,0 +1,62 @@
+import pytest
+
+from web_app.database.valkey.codec import ValueCodec
+from web_app.model.prediction import PredictionRecord
+
+
+@pytest.fixture(scope="function")
+def record():
+    return PredictionRecord(
+        probabilities=[0.17330732941627502, 0.28573545813560486, 0.385702520608902],
+        model_version="0123456789abcdef",
+    )
+
+
+def test_float32_record_decoded_exactly(record):
+    # given
+    codec = ValueCodec("float32")
+
+    # when
+    raw_record = codec.encode(record)
+
+    # then
+    assert len(raw_record) == 5 + 16 + 3 * 4
+    assert codec.decode(raw_record) == record
+
+
+def test_float16_record_decoded_approximately(record):
+    # given
+    codec = ValueCodec("float16")
+
+    # when
+    raw_record = codec.encode(record)
+    decoded = codec.decode(raw_record)
+
+    # then
+    assert len(raw_record) == 5 + 16 + 3 * 2
+    assert decoded.model_version == record.model_version
+    assert decoded.probabilities == pytest.approx(record.probabilities, abs=1e-3)
+    assert decoded.render("v1") == record.render("v1")
+
+
+def test_other_values_stored_as_json():
+    # given
+    codec = ValueCodec()
+
+    # when
+    raw_value = codec.encode("27541")
+
+    # then
+    assert raw_value == '"27541"'
+    assert codec.decode(raw_value.encode()) == "27541"
+    assert codec.decode(None) is None
+
+
+def test_unsupported_record_format_rejected(record):
+    # given
+    raw_record = bytearray(record.to_bytes())
+    raw_record[2] = 99
+
+    # when # then
+    with pytest.raises(ValueError):
+        ValueCodec().decode(bytes(raw_record))
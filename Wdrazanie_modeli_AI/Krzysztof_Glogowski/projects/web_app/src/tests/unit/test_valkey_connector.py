@@ -6,68 +6,77 @@ from web_app.utils.error import ValkeyConnectionError, ValkeyConnectionNotAliveE
 from tests.fixture import fake_valkey
 
 
-def test_create_connection(mocker, fake_valkey):
+def test_create_connection():
+    # when
+    connection = ValkeyConnector._create_connection("0.0.0.0", 0, max_connections=4)
+
+    # then
+    assert isinstance(connection, valkey.asyncio.Valkey)
+    assert isinstance(connection.connection_pool, valkey.asyncio.BlockingConnectionPool)
+    assert connection.connection_pool.max_connections == 4
+
+
+@pytest.mark.anyio
+async def test_connect(mocker, fake_valkey):
     # given
-    mocker.patch("web_app.database.valkey.connector.valkey.Valkey", return_value=fake_valkey)
+    mocker.patch.object(ValkeyConnector, "_create_connection", return_value=fake_valkey)
     ping_spy = mocker.spy(fake_valkey, "ping")
+    connector = ValkeyConnector("0.0.0.0", 0)
 
     # when
-    connector = ValkeyConnector._create_connection("0.0.0.0", 0)
+    await connector.connect()
 
     # then
-    assert connector is not None
-    assert type(connector) is fake_valkey.__class__
     assert ping_spy.call_count == 1
 
 
-def test_create_connection_exception(mocker):
+@pytest.mark.anyio
+async def test_connect_exception(mocker, fake_valkey):
     # given
-    ping_spy = mocker.spy(valkey.Valkey, "ping")
+    mocker.patch.object(ValkeyConnector, "_create_connection", return_value=fake_valkey)
+    mocker.patch.object(fake_valkey, "ping", side_effect=valkey.exceptions.ConnectionError())
+    connector = ValkeyConnector("0.0.0.0", 0)
 
     # when # then
     with pytest.raises(ValkeyConnectionError):
-        ValkeyConnector._create_connection("0.0.0.0", 0)
-
-    assert ping_spy.call_count == 1
+        await connector.connect()
 
 
-def test_is_alive(fake_valkey, mocker):
+@pytest.mark.anyio
+async def test_is_alive(fake_valkey, mocker):
     # given
-    mocker.patch("web_app.database.valkey.connector.valkey.Valkey", return_value=fake_valkey)
+    mocker.patch.object(ValkeyConnector, "_create_connection", return_value=fake_valkey)
     ping_spy = mocker.spy(fake_valkey, "ping")
     connector = ValkeyConnector("0.0.0.0", 0)
 
     # when
-    connector.is_alive()
+    await connector.is_alive()
 
     # then
-    assert ping_spy.call_count == 2
+    assert ping_spy.call_count == 1
 
 
-def test_is_alive_exception(mocker):
+@pytest.mark.anyio
+async def test_is_alive_exception(fake_valkey, mocker):
     # given
-    mocker.patch(
-        "web_app.database.valkey.connector.valkey.Valkey.ping",
-        side_effect=[None, valkey.exceptions.ConnectionError()],
-    )
-    ping_spy = mocker.spy(valkey.Valkey, "ping")
+    mocker.patch.object(ValkeyConnector, "_create_connection", return_value=fake_valkey)
+    mocker.patch.object(fake_valkey, "ping", side_effect=valkey.exceptions.ConnectionError())
     connector = ValkeyConnector("0.0.0.0", 0)
 
     # when # then
     with pytest.raises(ValkeyConnectionNotAliveError):
-        connector.is_alive()
-
-    assert ping_spy.call_count == 2
+        await connector.is_alive()
 
 
-def test_close(fake_valkey, mocker):
+@pytest.mark.anyio
+async def test_close(fake_valkey, mocker):
     # given
-    mocker.patch("web_app.database.valkey.connector.valkey.Valkey", return_value=fake_valkey)
+    mocker.patch.object(ValkeyConnector, "_create_connection", return_value=fake_valkey)
     connector = ValkeyConnector("0.0.0.0", 0)
     disconnect_spy = mocker.spy(fake_valkey.connection_pool, "disconnect")
 
     # when
-    connector.close()
+    await connector.close()
 
     # then
     assert disconnect_spy.call_count == 1
@@ -1,32 +1,113 @@
+import asyncio
 import logging
+import time
+from typing import Awaitable, Callable, TypeVar
 
-import clamd
-
+from web_app.antivirus.clamav.session import ClamdSession
 from web_app.utils.error import ClamavConnectionNotAliveError, ClamavConnectionError
 
+CLAMD_CONNECTION_ERRORS = (OSError, ConnectionError, asyncio.IncompleteReadError, TimeoutError)
+
+T = TypeVar("T")
+
 
 class ClamavConnector:
-    def __init__(self, host: str = "127.0.0.1", port: int = 3310):
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 3310,
+        max_sessions: int = 4,
+        timeout: float = 30.0,
+        session_idle_timeout: float = 20.0,
+    ):
         self.host = host
         self.port = port
-        self.socket = self._create_socket(host, port)
+        self.max_sessions = max_sessions
+        self.timeout = timeout
+        # keep below clamd IdleTimeout so pooled sessions are dropped before clamd closes them
+        self.session_idle_timeout = session_idle_timeout
+        self._semaphore = asyncio.Semaphore(max_sessions)
+        self._idle_sessions: list[ClamdSession] = []
 
-    def is_alive(self):
+    async def connect(self):
+        logging.info(f"Creating connection to Clamav on {self.host=}, {self.port=}.")
+        try:
+            await self.command("PING")
+        except CLAMD_CONNECTION_ERRORS as e:
+            logging.exception("Unable to connect to Clamav.")
+            raise ClamavConnectionError(self.host, self.port) from e
+        logging.info("Successfully created connection to Clamav.")
+
+    async def close(self):
+        while self._idle_sessions:
+            await self._idle_sessions.pop().close()
+
+    async def is_alive(self):
         logging.debug(f"Checking if connection to Clamav on {self.host=}, {self.port=} is alive.")
         try:
-            self.socket.ping()
-        except clamd.ConnectionError as e:
+            await self.command("PING")
+        except CLAMD_CONNECTION_ERRORS as e:
             logging.exception("Connection to Clamav is not alive.")
             raise ClamavConnectionNotAliveError(self.host, self.port) from e
 
+    async def signature_version(self) -> str:
+        # clamd replies with e.g. "ClamAV 1.4.2/27541/Mon Jan  6 09:32:09 2025",
+        # the middle part is the version of the signature database
+        try:
+            version = await self.command("VERSION")
+        except CLAMD_CONNECTION_ERRORS as e:
+            logging.exception("Unable to read Clamav signature database version.")
+            raise ClamavConnectionNotAliveError(self.host, self.port) from e
+        parts = version.split("/")
+        return parts[1] if len(parts) > 1 else version
+
+    async def command(self, command: str) -> str:
+        return await self.run(lambda session: session.command(command))
+
+    async def run(self, operation: Callable[[ClamdSession], Awaitable[T]]) -> T:
+        """Runs operation on a pooled session, which is returned to the pool unless operation
+        raises. A pooled session may have been closed by clamd since its last use, so operation
+        is run once more on a new session when a reused one fails with a connection error before
+        any byte of the request is sent. Once sent clamd may have processed it, e.g. a read
+        timeout after the whole stream, so the error is raised instead."""
+        async with self._semaphore:
+            session, reused = await self._acquire_session()
+            try:
+                result = await operation(session)
+            except CLAMD_CONNECTION_ERRORS:
+                await session.close()
+                if not reused or session.bytes_sent > 0:
+                    raise
+                logging.warning("Pooled Clamav session failed, retrying on a new session.")
+                session = await self._open_session(self.host, self.port, self.timeout)
+                result = await self._run_on_new_session(session, operation)
+            except BaseException:
+                await session.close()
+                raise
+            self._idle_sessions.append(session)
+            return result
+
     @staticmethod
-    def _create_socket(host: str, port: int) -> clamd.ClamdNetworkSocket:
-        logging.info(f"Creating connection to Clamav on {host=}, {port=}.")
+    async def _run_on_new_session(
+        session: ClamdSession, operation: Callable[[ClamdSession], Awaitable[T]]
+    ) -> T:
         try:
-            socket = clamd.ClamdNetworkSocket(host=host, port=port)
-            socket.ping()
-        except clamd.ConnectionError as e:
-            logging.exception("Unable to connect to Clamav.")
-            raise ClamavConnectionError(host, port) from e
-        logging.info("Successfully created connection to Clamav.")
-        return socket
+            return await operation(session)
+        except BaseException:
+            await session.close()
+            raise
+
+    async def _acquire_session(self) -> tuple[ClamdSession, bool]:
+        """Returns a pooled session that is not idle for too long nor closed by clamd, or a new
+        one, and whether it was reused."""
+        while self._idle_sessions:
+            session = self._idle_sessions.pop()
+            is_idle = time.monotonic() - session.last_used_at >= self.session_idle_timeout
+            if not is_idle and not session.is_closed:
+                return session, True
+            await session.close()
+        return await self._open_session(self.host, self.port, self.timeout), False
+
+    @staticmethod
+    async def _open_session(host: str, port: int, timeout: float) -> ClamdSession:
+        return await ClamdSession.open(host, port, timeout)
@@ -1,19 +1,61 @@
-import io
 import logging
+import time
+from typing import Callable
 
-from web_app.antivirus.clamav.connector import ClamavConnector
+from web_app.antivirus.clamav.connector import CLAMD_CONNECTION_ERRORS, ClamavConnector
+from web_app.utils.error import ClamavConnectionNotAliveError, ClamavScanError
+from web_app.antivirus.clamav.session import ClamdSession
+from web_app.utils.metrics import stage_timer
+from web_app.utils.upload import iter_bytes
 
 
 class AntivirusScanner:
-    def __init__(self, connector: ClamavConnector):
+    def __init__(
+        self,
+        connector: ClamavConnector,
+        signature_version_ttl: float = 60.0,
+        max_chunk_size: int = 65536,
+        clock: Callable[[], float] = time.monotonic,
+    ):
         self.connector = connector
+        self.signature_version_ttl = signature_version_ttl
+        self.max_chunk_size = max_chunk_size
+        self._clock = clock
+        self._signature_version: str | None = None
+        self._signature_version_expires_at = 0.0
 
-    def scan(self, file: bytes) -> None:
+    async def scan(self, content: bytes) -> None:
         logging.info("Scanning file with Clamav")
-        input_stream = io.BytesIO(file)
-        result = self.connector.socket.instream(input_stream)
 
-        if result["stream"][0] != "OK":
-            raise ValueError(f"Virus detected: {result['stream'][1]}")
+        async def instream(session: ClamdSession) -> str:
+            # streamed from the start again when retried on a new session
+            result = await session.instream(
+                iter_bytes(content, self.max_chunk_size), self.max_chunk_size
+            )
+            # e.g. "stream: OK", "stream: Eicar-Test-Signature FOUND" or "... ERROR",
+            # clamd drops the session after an error so it mustn't return to the pool
+            status = result.partition(": ")[2]
+            if not (status == "OK" or status.endswith("FOUND")):
+                raise ClamavScanError(result)
+            return status
+
+        try:
+            # includes waiting for a free session of the pool
+            with stage_timer("scan"):
+                status = await self.connector.run(instream)
+        except CLAMD_CONNECTION_ERRORS as e:
+            logging.exception("Unable to scan file with Clamav.")
+            raise ClamavConnectionNotAliveError(self.connector.host, self.connector.port) from e
+
+        if status.endswith("FOUND"):
+            raise ValueError(f"Virus detected: {status.removesuffix('FOUND').strip()}")
 
         logging.info("Scanning file with Clamav")
+
+    async def signature_version(self) -> str:
+        now = self._clock()
+        if self._signature_version is None or now >= self._signature_version_expires_at:
+            self._signature_version = await self.connector.signature_version()
+            self._signature_version_expires_at = now + self.signature_version_ttl
+            logging.info(f"Clamav signature database version {self._signature_version=}.")
+        return self._signature_version
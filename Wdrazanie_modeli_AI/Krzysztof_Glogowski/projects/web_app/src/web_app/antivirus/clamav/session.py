@@ -0,0 +1,77 @@
+import asyncio
+import logging
+import struct
+import time
+from typing import AsyncIterable
+
+
+class ClamdSession:
+    """Persistent clamd connection in IDSESSION mode, replies are matched by request id."""
+
+    def __init__(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter, timeout: float = 30.0
+    ):
+        self.reader = reader
+        self.writer = writer
+        self.timeout = timeout
+        self.last_used_at = time.monotonic()
+        # bytes handed to the socket by the current request, none when it failed on the first write
+        self.bytes_sent = 0
+        self._request_id = 0
+
+    @classmethod
+    async def open(cls, host: str, port: int, timeout: float = 30.0) -> "ClamdSession":
+        logging.debug(f"Opening clamd session on {host=}, {port=}.")
+        reader, writer = await asyncio.wait_for(asyncio.open_connection(host, port), timeout)
+        writer.write(b"zIDSESSION\0")
+        await writer.drain()
+        return cls(reader, writer, timeout)
+
+    @property
+    def is_closed(self) -> bool:
+        """Whether clamd closed the session, e.g. after its IdleTimeout or a restart."""
+        return self.reader.at_eof() or self.writer.is_closing()
+
+    async def command(self, command: str) -> str:
+        self.bytes_sent = 0
+        await self._send(f"z{command}\0".encode())
+        return await self._read_reply()
+
+    async def instream(self, chunks: AsyncIterable[bytes], max_chunk_size: int = 65536) -> str:
+        self.bytes_sent = 0
+        command = b"zINSTREAM\0"
+        async for chunk in chunks:
+            view = memoryview(chunk)
+            for offset in range(0, len(view), max_chunk_size):
+                part = view[offset : offset + max_chunk_size]
+                await self._send(command, struct.pack("!L", len(part)), part)
+                command = b""
+        await self._send(command, struct.pack("!L", 0))
+        return await self._read_reply()
+
+    async def close(self) -> None:
+        try:
+            self.writer.write(b"zEND\0")
+            await self.writer.drain()
+        except OSError:
+            pass
+        self.writer.close()
+        try:
+            await self.writer.wait_closed()
+        except OSError:
+            pass
+
+    async def _send(self, *parts: bytes | memoryview) -> None:
+        for part in parts:
+            self.writer.write(part)
+        await self.writer.drain()
+        self.bytes_sent += sum(len(part) for part in parts)
+
+    async def _read_reply(self) -> str:
+        self._request_id += 1
+        raw_reply = await asyncio.wait_for(self.reader.readuntil(b"\0"), self.timeout)
+        self.last_used_at = time.monotonic()
+        request_id, _, reply = raw_reply[:-1].decode().partition(": ")
+        if request_id != str(self._request_id):
+            raise ConnectionError(f"Unexpected clamd reply {raw_reply=} to {self._request_id=}.")
+        return reply
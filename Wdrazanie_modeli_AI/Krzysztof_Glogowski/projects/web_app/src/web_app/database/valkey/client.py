@@ -1,28 +1,119 @@
-import json
 import logging
+from typing import Any
 
+import valkey
+
+from web_app.database.valkey.codec import ValueCodec
 from web_app.database.valkey.connector import ValkeyConnector
+from web_app.utils.error import ValkeyConnectionNotAliveError
+from web_app.utils.metrics import stage_timer
 
 
 class ValkeyClient:
-    def __init__(self, connector: ValkeyConnector):
+    def __init__(
+        self,
+        connector: ValkeyConnector,
+        codec: ValueCodec | None = None,
+        ttls: dict[str, int] | None = None,
+    ):
         self.connector = connector
+        self.codec = codec or ValueCodec()
+        # expiry in seconds per key prefix (the part before the first "_"), 0 never expires
+        self.ttls = ttls or {}
+
+    def ttl_for(self, key: str) -> int | None:
+        return self.ttls.get(key.split("_", 1)[0]) or None
 
-    def read(self, key: str) -> list[dict[str, int | float]] | None:
+    async def read(self, key: str) -> Any | None:
         logging.info("Getting response from Valkey")
-        self.connector.is_alive()
-        raw_value = self.connector.connection.get(key)
+        try:
+            with stage_timer("valkey_read"):
+                raw_value = await self.connector.connection.get(key)
+        except valkey.exceptions.ConnectionError as e:
+            raise ValkeyConnectionNotAliveError(self.connector.host, self.connector.port) from e
         if raw_value is not None:
-            value = json.loads(raw_value)  # type: ignore
+            value = self.codec.decode(raw_value)
             logging.info("Returning response from Valkey")
             return value
         else:
             logging.info("Response not available in Valkey")
             return None
 
-    def write(self, key: str, value: list[dict[str, int | float]]) -> None:
+    async def read_many(self, keys: list[str]) -> list[Any | None]:
+        logging.info(f"Getting {len(keys)} responses from Valkey")
+        try:
+            with stage_timer("valkey_read"):
+                raw_values = await self.connector.connection.mget(keys)
+        except valkey.exceptions.ConnectionError as e:
+            raise ValkeyConnectionNotAliveError(self.connector.host, self.connector.port) from e
+        return [self.codec.decode(raw_value) for raw_value in raw_values]
+
+    async def write(self, key: str, value: Any) -> None:
+        await self.write_many({key: value})
+
+    async def write_many(self, values: dict[str, Any]) -> None:
         logging.info("Saving data to Valkey")
-        self.connector.is_alive()
-        value_to_save = json.dumps(value)
-        self.connector.connection.set(key, value_to_save)
+        try:
+            async with self.connector.connection.pipeline(transaction=False) as pipeline:
+                for key, value in values.items():
+                    pipeline.set(key, self.codec.encode(value), ex=self.ttl_for(key))
+                with stage_timer("valkey_write"):
+                    await pipeline.execute()
+        except valkey.exceptions.ConnectionError as e:
+            raise ValkeyConnectionNotAliveError(self.connector.host, self.connector.port) from e
+        except valkey.exceptions.ResponseError:
+            # e.g. OOM when keys without a TTL fill maxmemory, the values stay uncached
+            logging.exception(f"Unable to save {len(values)} values in Valkey.")
+            return
         logging.info("Successfully saved data in Valkey")
+
+    async def read_many_raw(self, keys: list[str]) -> list[bytes | None]:
+        try:
+            with stage_timer("valkey_read"):
+                return await self.connector.connection.mget(keys)
+        except valkey.exceptions.ConnectionError as e:
+            raise ValkeyConnectionNotAliveError(self.connector.host, self.connector.port) from e
+
+    async def write_many_raw(self, values: dict[str, bytes], ttl: int | None = None) -> None:
+        try:
+            async with self.connector.connection.pipeline(transaction=False) as pipeline:
+                for key, value in values.items():
+                    pipeline.set(key, value, ex=ttl)
+                with stage_timer("valkey_write"):
+                    await pipeline.execute()
+        except valkey.exceptions.ConnectionError as e:
+            raise ValkeyConnectionNotAliveError(self.connector.host, self.connector.port) from e
+        except valkey.exceptions.ResponseError:
+            logging.exception(f"Unable to save {len(values)} values in Valkey.")
+
+    async def read_with_lock(self, key: str, lock_key: str) -> tuple[Any | None, bool]:
+        try:
+            async with self.connector.connection.pipeline(transaction=False) as pipeline:
+                pipeline.get(key)
+                pipeline.exists(lock_key)
+                with stage_timer("valkey_read"):
+                    raw_value, locked = await pipeline.execute()
+        except valkey.exceptions.ConnectionError as e:
+            raise ValkeyConnectionNotAliveError(self.connector.host, self.connector.port) from e
+        return self.codec.decode(raw_value), bool(locked)
+
+    async def acquire_lock(self, lock_key: str, token: str, ttl_ms: int) -> bool:
+        try:
+            acquired = await self.connector.connection.set(lock_key, token, nx=True, px=ttl_ms)
+        except valkey.exceptions.ConnectionError as e:
+            raise ValkeyConnectionNotAliveError(self.connector.host, self.connector.port) from e
+        return bool(acquired)
+
+    async def release_lock(self, lock_key: str, token: str) -> None:
+        # compare and delete, the lock may have expired and been taken by another worker
+        try:
+            async with self.connector.connection.pipeline(transaction=True) as pipeline:
+                await pipeline.watch(lock_key)
+                if await pipeline.get(lock_key) == token.encode():
+                    pipeline.multi()
+                    pipeline.delete(lock_key)
+                    await pipeline.execute()
+        except valkey.exceptions.WatchError:
+            logging.warning(f"Lock {lock_key=} changed before it was released.")
+        except valkey.exceptions.ConnectionError as e:
+            raise ValkeyConnectionNotAliveError(self.connector.host, self.connector.port) from e
@@ -0,0 +1,24 @@
+import json
+from typing import Any
+
+from web_app.model.prediction import RECORD_MAGIC, PredictionRecord
+
+
+class ValueCodec:
+    """Stores prediction records in their packed binary form and everything else as JSON,
+    JSON text never starts with the record magic so both are told apart when read."""
+
+    def __init__(self, probability_dtype: str = "float32"):
+        self.probability_dtype = probability_dtype
+
+    def encode(self, value: Any) -> bytes | str:
+        if isinstance(value, PredictionRecord):
+            return value.to_bytes(self.probability_dtype)
+        return json.dumps(value)
+
+    def decode(self, raw_value: bytes | str | None) -> Any | None:
+        if raw_value is None:
+            return None
+        if isinstance(raw_value, bytes) and raw_value.startswith(RECORD_MAGIC):
+            return PredictionRecord.from_bytes(raw_value)
+        return json.loads(raw_value)
@@ -1,38 +1,56 @@
 import logging
 
 import valkey
+import valkey.asyncio
+from valkey.asyncio.retry import Retry
+from valkey.backoff import ExponentialBackoff
 
 from web_app.utils.error import ValkeyConnectionNotAliveError, ValkeyConnectionError
 
 
 class ValkeyConnector:
-    def __init__(self, host: str = "127.0.0.1", port: int = 6379):
+    def __init__(self, host: str = "127.0.0.1", port: int = 6379, max_connections: int = 32):
         self.host = host
         self.port = port
-        self.connection: valkey.Valkey = self._create_connection(host, port)
+        self.connection: valkey.asyncio.Valkey = self._create_connection(
+            host, port, max_connections
+        )
+
+    async def connect(self):
+        logging.info(f"Connecting to Valkey database on {self.host=}, {self.port=}.")
+        try:
+            await self.connection.ping()
+        except valkey.exceptions.ConnectionError as e:
+            logging.exception("Unable to connect to Valkey database.")
+            raise ValkeyConnectionError(self.host, self.port) from e
+        logging.info("Successfully created connection to Valkey database.")
 
-    def close(self):
-        self.connection.connection_pool.disconnect(inuse_connections=True)
+    async def close(self):
+        await self.connection.aclose()
+        await self.connection.connection_pool.disconnect(inuse_connections=True)
 
-    def is_alive(self):
+    async def is_alive(self):
         logging.debug(
             f"Checking if connection to Valkey database on {self.host=}, {self.port=} is alive."
         )
         try:
-            self.connection.ping()
+            await self.connection.ping()
         except valkey.exceptions.ConnectionError as e:
             logging.exception("Connection to Valkey database is not alive.")
             raise ValkeyConnectionNotAliveError(self.host, self.port) from e
         logging.debug("Connection to Valkey database is alive.")
 
     @staticmethod
-    def _create_connection(host: str, port: int) -> valkey.Valkey:
-        logging.info(f"Creating connection to Valkey database on {host=}, {port=}.")
-        try:
-            connection = valkey.Valkey(host=host, port=port, protocol=3)
-            connection.ping()
-        except valkey.exceptions.ConnectionError as e:
-            logging.exception("Unable to connect to Valkey database.")
-            raise ValkeyConnectionError(host, port) from e
-        logging.info("Successfully created connection to Valkey database.")
-        return connection
+    def _create_connection(host: str, port: int, max_connections: int) -> valkey.asyncio.Valkey:
+        logging.info(f"Creating Valkey connection pool for {host=}, {port=}, {max_connections=}.")
+        # broken or idle connections are re-established by the pool instead of pinging per call
+        connection_pool = valkey.asyncio.BlockingConnectionPool(
+            host=host,
+            port=port,
+            max_connections=max_connections,
+            protocol=3,
+            health_check_interval=30,
+            retry=Retry(ExponentialBackoff(cap=0.5), retries=2),
+            retry_on_error=[valkey.exceptions.ConnectionError, valkey.exceptions.TimeoutError],
+        )
+        return valkey.asyncio.Valkey(connection_pool=connection_pool)
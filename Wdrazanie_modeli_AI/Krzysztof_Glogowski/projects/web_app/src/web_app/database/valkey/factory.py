@@ -0,0 +1,15 @@
+from web_app.config.config import settings
+from web_app.database.valkey.client import ValkeyClient
+from web_app.database.valkey.codec import ValueCodec
+from web_app.database.valkey.connector import ValkeyConnector
+
+
+def create_valkey_client(valkey_connector: ValkeyConnector) -> ValkeyClient:
+    return ValkeyClient(
+        valkey_connector,
+        codec=ValueCodec(probability_dtype=settings.VALKEY_PROBABILITY_DTYPE),
+        ttls={
+            "prediction": settings.VALKEY_PREDICTION_TTL,
+            "verified": settings.VALKEY_VERIFIED_TTL,
+        },
+    )
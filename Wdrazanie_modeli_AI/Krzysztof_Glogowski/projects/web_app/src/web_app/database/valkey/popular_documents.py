@@ -0,0 +1,127 @@
+import logging
+import time
+from typing import Callable
+
+import valkey
+
+from web_app.database.valkey.client import ValkeyClient
+from web_app.service.validator.upload_file_validator import IngestedDocument
+from web_app.utils.error import ValkeyConnectionNotAliveError
+
+SECONDS_PER_DAY = 86400
+# digests of the documents whose content is kept
+STORED_DIGESTS_KEY = "popular_document_digests"
+
+
+class PopularDocuments:
+    """Counts requests per document in daily Valkey sorted sets. Documents requested at least
+    min_hits times a day are also ranked in small daily sets, and the content of the max_documents
+    most requested of them is kept, so a new model version can score them again."""
+
+    def __init__(
+        self,
+        valkey_client: ValkeyClient,
+        min_hits: int = 3,
+        window_days: int = 7,
+        document_ttl: int = 604800,
+        max_documents: int = 100,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.valkey_client = valkey_client
+        self.min_hits = min_hits
+        self.window_days = window_days
+        self.document_ttl = document_ttl
+        self.max_documents = max_documents
+        self._clock = clock
+
+    @property
+    def connection(self):
+        return self.valkey_client.connector.connection
+
+    def _day(self, days_ago: int = 0) -> int:
+        return int(self._clock() // SECONDS_PER_DAY) - days_ago
+
+    def _hits_key(self, days_ago: int = 0) -> str:
+        return f"document_hits_{self._day(days_ago)}"
+
+    def _popular_hits_key(self, days_ago: int = 0) -> str:
+        return f"popular_document_hits_{self._day(days_ago)}"
+
+    async def record(self, documents: list[IngestedDocument]) -> None:
+        unique_documents = {document.digest: document for document in documents}
+        hits_key = self._hits_key()
+        popular_hits_key = self._popular_hits_key()
+        window = self.window_days * SECONDS_PER_DAY
+        try:
+            async with self.connection.pipeline(transaction=False) as pipeline:
+                for digest in unique_documents:
+                    pipeline.zincrby(hits_key, 1, digest)
+                pipeline.expire(hits_key, window)
+                *hits, _ = await pipeline.execute()
+
+                popular_hits = {
+                    digest: document_hits
+                    for digest, document_hits in zip(unique_documents, hits)
+                    if document_hits >= self.min_hits
+                }
+                if not popular_hits:
+                    return
+                pipeline.zadd(popular_hits_key, popular_hits)
+                pipeline.expire(popular_hits_key, window)
+                await pipeline.execute()
+
+            await self._store([unique_documents[digest] for digest in popular_hits])
+        except valkey.exceptions.ConnectionError as e:
+            raise ValkeyConnectionNotAliveError(
+                self.valkey_client.connector.host, self.valkey_client.connector.port
+            ) from e
+        except valkey.exceptions.ResponseError:
+            # e.g. OOM, requests are counted for warming only
+            logging.exception(f"Unable to record requests of {len(unique_documents)} documents.")
+
+    async def _store(self, popular_documents: list[IngestedDocument]) -> None:
+        """Keeps the content of the requested popular documents that are among the max_documents
+        most requested, and deletes the content of documents that dropped out of them."""
+        most_requested = set(await self.most_requested(self.max_documents))
+        stored_digests = {
+            digest.decode() for digest in await self.connection.smembers(STORED_DIGESTS_KEY)
+        }
+        async with self.connection.pipeline(transaction=False) as pipeline:
+            for document in popular_documents:
+                if document.digest not in most_requested:
+                    continue
+                content_key = f"popular_document_{document.digest}"
+                # content is uploaded once, later requests only extend its expiry
+                if document.digest in stored_digests:
+                    pipeline.expire(content_key, self.document_ttl)
+                else:
+                    pipeline.set(content_key, document.content, ex=self.document_ttl)
+                    pipeline.sadd(STORED_DIGESTS_KEY, document.digest)
+            dropped_digests = stored_digests - most_requested
+            if dropped_digests:
+                pipeline.delete(*[f"popular_document_{digest}" for digest in dropped_digests])
+                pipeline.srem(STORED_DIGESTS_KEY, *dropped_digests)
+            pipeline.expire(STORED_DIGESTS_KEY, self.document_ttl)
+            await pipeline.execute()
+
+    async def most_requested(self, count: int) -> list[str]:
+        """Documents requested at least min_hits times a day, by their requests over the window."""
+        if count <= 0:
+            return []
+        popular_hits_keys = [
+            self._popular_hits_key(days_ago) for days_ago in range(self.window_days)
+        ]
+        try:
+            hits = await self.connection.zunion(popular_hits_keys, withscores=True)
+        except valkey.exceptions.ConnectionError as e:
+            raise ValkeyConnectionNotAliveError(
+                self.valkey_client.connector.host, self.valkey_client.connector.port
+            ) from e
+        # ascending by score
+        return [digest.decode() for digest, _ in reversed(hits[-count:])]
+
+    async def load(self, digests: list[str]) -> dict[str, bytes | None]:
+        contents = await self.valkey_client.read_many_raw(
+            [f"popular_document_{digest}" for digest in digests]
+        )
+        return dict(zip(digests, contents))
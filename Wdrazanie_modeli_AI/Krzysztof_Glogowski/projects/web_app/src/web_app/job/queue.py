@@ -0,0 +1,176 @@
+import logging
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Any
+
+import valkey
+
+from web_app.database.valkey.client import ValkeyClient
+from web_app.model.prediction import prediction_key
+from web_app.service.validator.upload_file_validator import IngestedDocument
+from web_app.utils.error import ValkeyConnectionNotAliveError
+
+
+@dataclass
+class JobTask:
+    entry_id: str
+    job_id: str
+    digest: str
+
+
+class JobQueue:
+    """Queues documents of a job on a Valkey stream, workers put results into the prediction cache."""
+
+    def __init__(
+        self,
+        valkey_client: ValkeyClient,
+        stream: str = "jobs",
+        group: str = "workers",
+        ttl: int = 86400,
+        model_version: str = "unknown",
+    ):
+        self.valkey_client = valkey_client
+        self.stream = stream
+        self.group = group
+        self.ttl = ttl
+        # predictions are looked up for this model, workers have to serve the same one
+        self.model_version = model_version
+
+    @property
+    def connection(self):
+        return self.valkey_client.connector.connection
+
+    async def ensure_group(self) -> None:
+        try:
+            await self.connection.xgroup_create(self.stream, self.group, id="0", mkstream=True)
+        except valkey.exceptions.ResponseError as e:
+            if "BUSYGROUP" not in str(e):
+                raise
+
+    async def submit(self, prefix: str, documents: list[IngestedDocument]) -> str:
+        job_id = uuid.uuid4().hex
+        unique_documents = {document.digest: document for document in documents}
+        cached = await self.valkey_client.read_many(
+            [prediction_key(self.model_version, digest) for digest in unique_documents]
+        )
+        pending_documents = [
+            document
+            for document, prediction in zip(unique_documents.values(), cached)
+            if prediction is None
+        ]
+        logging.info(f"Submitting job {job_id=}, {len(documents)=}, {len(pending_documents)=}.")
+        # the stream has no TTL and is never evicted, entries of expired jobs are trimmed
+        min_entry_id = f"{int((time.time() - self.ttl) * 1000)}-0"
+
+        try:
+            async with self.connection.pipeline(transaction=False) as pipeline:
+                pipeline.hset(
+                    f"job_{job_id}",
+                    mapping={"prefix": prefix, "total": len(documents), "created_at": time.time()},
+                )
+                pipeline.expire(f"job_{job_id}", self.ttl)
+                if documents:
+                    pipeline.rpush(
+                        f"job_documents_{job_id}", *[document.digest for document in documents]
+                    )
+                    pipeline.expire(f"job_documents_{job_id}", self.ttl)
+                for document in pending_documents:
+                    pipeline.set(f"document_{document.digest}", document.content, ex=self.ttl)
+                    pipeline.xadd(
+                        self.stream,
+                        {"job_id": job_id, "digest": document.digest},
+                        minid=min_entry_id,
+                        approximate=True,
+                    )
+                await pipeline.execute()
+        except valkey.exceptions.ConnectionError as e:
+            raise ValkeyConnectionNotAliveError(
+                self.valkey_client.connector.host, self.valkey_client.connector.port
+            ) from e
+        return job_id
+
+    async def status(self, job_id: str) -> dict[str, Any] | None:
+        async with self.connection.pipeline(transaction=False) as pipeline:
+            pipeline.hgetall(f"job_{job_id}")
+            pipeline.lrange(f"job_documents_{job_id}", 0, -1)
+            pipeline.hgetall(f"job_errors_{job_id}")
+            job, digests, errors = await pipeline.execute()
+        if not job:
+            return None
+
+        prefix = job[b"prefix"].decode()
+        digests = [digest.decode() for digest in digests]
+        errors = {digest.decode(): message.decode() for digest, message in errors.items()}
+        records = (
+            await self.valkey_client.read_many(
+                [prediction_key(self.model_version, digest) for digest in digests]
+            )
+            if digests
+            else []
+        )
+        # rendered for the API version the job was submitted with
+        predictions = [record.render(prefix) if record is not None else None for record in records]
+        completed = sum(prediction is not None for prediction in predictions)
+        failed = [
+            {"index": index, "message": errors[digest]}
+            for index, (digest, prediction) in enumerate(zip(digests, predictions))
+            if prediction is None and digest in errors
+        ]
+        return {
+            "job_id": job_id,
+            "status": "completed" if completed + len(failed) == len(digests) else "pending",
+            "total": len(digests),
+            "completed": completed,
+            "failed": failed,
+            "predictions": predictions,
+        }
+
+    async def read(self, consumer: str, count: int, block: int) -> list[JobTask]:
+        response = await self.connection.xreadgroup(
+            self.group, consumer, {self.stream: ">"}, count=count, block=block
+        )
+        if isinstance(response, dict):
+            # RESP3 replies map each stream name to a list wrapping its entries
+            entry_lists = [entries for (entries,) in response.values()]
+        else:
+            entry_lists = [entries for _, entries in response]
+        return [self._to_task(*entry) for entries in entry_lists for entry in entries]
+
+    async def claim(self, consumer: str, count: int, min_idle_time: int) -> list[JobTask]:
+        # tasks left pending by a worker that died before acknowledging them
+        _, entries, *_ = await self.connection.xautoclaim(
+            self.stream, self.group, consumer, min_idle_time=min_idle_time, count=count
+        )
+        return [self._to_task(*entry) for entry in entries if entry[0] is not None]
+
+    async def ack(self, tasks: list[JobTask]) -> None:
+        if not tasks:
+            return
+        entry_ids = [task.entry_id for task in tasks]
+        # processed entries are deleted, the stream only holds pending documents
+        async with self.connection.pipeline(transaction=False) as pipeline:
+            pipeline.xack(self.stream, self.group, *entry_ids)
+            pipeline.xdel(self.stream, *entry_ids)
+            await pipeline.execute()
+
+    async def load_documents(self, digests: list[str]) -> dict[str, bytes | None]:
+        if not digests:
+            return {}
+        contents = await self.connection.mget([f"document_{digest}" for digest in digests])
+        return dict(zip(digests, contents))
+
+    async def record_errors(self, errors: dict[str, dict[str, str]]) -> None:
+        async with self.connection.pipeline(transaction=False) as pipeline:
+            for job_id, job_errors in errors.items():
+                pipeline.hset(f"job_errors_{job_id}", mapping=job_errors)
+                pipeline.expire(f"job_errors_{job_id}", self.ttl)
+            await pipeline.execute()
+
+    @staticmethod
+    def _to_task(entry_id: bytes, fields: dict[bytes, bytes]) -> JobTask:
+        return JobTask(
+            entry_id=entry_id.decode(),
+            job_id=fields[b"job_id"].decode(),
+            digest=fields[b"digest"].decode(),
+        )
@@ -0,0 +1,205 @@
+import asyncio
+import logging
+import os
+import signal
+import socket
+
+import torch
+
+from common.collators import predict_collate_with_indices_fn
+from web_app.antivirus.clamav.connector import ClamavConnector
+from web_app.antivirus.clamav.scanner import AntivirusScanner
+from web_app.config.config import settings
+from web_app.database.valkey.connector import ValkeyConnector
+from web_app.database.valkey.factory import create_valkey_client
+from web_app.job.queue import JobQueue, JobTask
+from web_app.model.document_classifier import DocumentClassifier
+from web_app.model.loader import load_classifier
+from web_app.model.executor import get_torch_threads
+from web_app.model.prediction import PredictionRecord, prediction_key
+from web_app.service.mapper.document_mapper import to_model_input
+from web_app.utils.log import setup_logging_with_correlation_id
+
+
+class JobWorker:
+    """Consumes job tasks in batches, running one forward pass per batch."""
+
+    def __init__(
+        self,
+        queue: JobQueue,
+        classifier: DocumentClassifier,
+        antivirus: AntivirusScanner,
+        consumer: str,
+        batch_size: int = 16,
+        block_time: int = 5000,
+        claim_idle_time: int = 300000,
+        render_at_model_size: bool = False,
+        grayscale: bool = False,
+        retry_delay: float = 1.0,
+        max_retry_delay: float = 60.0,
+    ):
+        self.queue = queue
+        self.classifier = classifier
+        self.antivirus = antivirus
+        self.consumer = consumer
+        self.batch_size = batch_size
+        self.block_time = block_time
+        self.claim_idle_time = claim_idle_time
+        self.render_at_model_size = render_at_model_size
+        self.grayscale = grayscale
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+        self._stopping = asyncio.Event()
+
+    def stop(self) -> None:
+        logging.info("Stopping job worker.")
+        self._stopping.set()
+
+    async def run(self) -> None:
+        await self.queue.ensure_group()
+        logging.info(f"Job worker {self.consumer=} started.")
+        retry_delay = self.retry_delay
+        while not self._stopping.is_set():
+            try:
+                await self.run_once()
+                retry_delay = self.retry_delay
+            except Exception:
+                # unacknowledged tasks are claimed again after claim_idle_time
+                logging.exception(f"Job worker failed, retrying in {retry_delay=} seconds.")
+                await self._wait_before_retry(retry_delay)
+                retry_delay = min(2 * retry_delay, self.max_retry_delay)
+
+    async def _wait_before_retry(self, delay: float) -> None:
+        try:
+            await asyncio.wait_for(self._stopping.wait(), timeout=delay)
+        except asyncio.TimeoutError:
+            pass
+
+    async def run_once(self) -> int:
+        tasks = await self.queue.claim(self.consumer, self.batch_size, self.claim_idle_time)
+        if not tasks:
+            tasks = await self.queue.read(self.consumer, self.batch_size, self.block_time)
+        if tasks:
+            await self.process(tasks)
+        return len(tasks)
+
+    async def process(self, tasks: list[JobTask]) -> None:
+        logging.info(f"Processing {len(tasks)} job tasks.")
+        valkey_client = self.queue.valkey_client
+        digests = list(dict.fromkeys(task.digest for task in tasks))
+        prediction_keys = {
+            digest: prediction_key(self.classifier.version, digest) for digest in digests
+        }
+        keys = [f"verified_{digest}" for digest in digests] + list(prediction_keys.values())
+        cached = dict(zip(keys, await valkey_client.read_many(keys)))
+        pending_tasks = [task for task in tasks if cached[prediction_keys[task.digest]] is None]
+        pending_digests = list(dict.fromkeys(task.digest for task in pending_tasks))
+        documents = await self.queue.load_documents(pending_digests)
+        signature_version = await self.antivirus.signature_version()
+
+        new_values = {}
+        errors: dict[str, str] = {}
+        model_inputs: dict[str, tuple[torch.Tensor, torch.Tensor]] = {}
+        for digest in pending_digests:
+            document = documents[digest]
+            if document is None:
+                errors[digest] = "Document expired before it was processed"
+                continue
+            try:
+                if cached[f"verified_{digest}"] != signature_version:
+                    await self.antivirus.scan(document)
+                    new_values[f"verified_{digest}"] = signature_version
+                model_inputs[digest] = to_model_input(
+                    document, self.render_at_model_size, self.grayscale
+                )
+            except Exception as e:
+                logging.exception(f"Unable to process document {digest=}.")
+                errors[digest] = str(e)
+
+        if model_inputs:
+            try:
+                new_values.update(self._predict(model_inputs, prediction_keys))
+            except Exception as e:
+                # the whole batch is acknowledged as failed, so it is not claimed again forever
+                logging.exception(f"Unable to predict batch of {len(model_inputs)} documents.")
+                errors.update({digest: str(e) for digest in model_inputs})
+
+        if new_values:
+            await valkey_client.write_many(new_values)
+        job_errors: dict[str, dict[str, str]] = {}
+        for task in pending_tasks:
+            if task.digest in errors:
+                job_errors.setdefault(task.job_id, {})[task.digest] = errors[task.digest]
+        if job_errors:
+            await self.queue.record_errors(job_errors)
+        await self.queue.ack(tasks)
+
+    def _predict(
+        self,
+        model_inputs: dict[str, tuple[torch.Tensor, torch.Tensor]],
+        prediction_keys: dict[str, str],
+    ) -> dict[str, PredictionRecord]:
+        images, lengths, sorted_indices = predict_collate_with_indices_fn(
+            [list(images) for images, _ in model_inputs.values()]
+        )
+        predicted_proba = self.classifier.predict_proba_batch(images, lengths)
+        input_digests = list(model_inputs)
+        return {
+            prediction_keys[input_digests[idx]]: PredictionRecord.from_proba(
+                predicted_proba[position], self.classifier.version
+            )
+            for position, idx in enumerate(sorted_indices)
+        }
+
+
+async def run_worker() -> None:
+    valkey_connector = ValkeyConnector(
+        host=settings.VALKEY_HOST,
+        port=settings.VALKEY_PORT,
+        max_connections=settings.VALKEY_MAX_CONNECTIONS,
+    )
+    await valkey_connector.connect()
+    clamav_connector = ClamavConnector(
+        host=settings.CLAMAV_HOST,
+        port=settings.CLAMAV_PORT,
+        max_sessions=settings.CLAMAV_MAX_SESSIONS,
+        timeout=settings.CLAMAV_TIMEOUT,
+        session_idle_timeout=settings.CLAMAV_SESSION_IDLE_TIMEOUT,
+    )
+    await clamav_connector.connect()
+    classifier = load_classifier()
+    worker = JobWorker(
+        queue=JobQueue(
+            create_valkey_client(valkey_connector),
+            stream=settings.JOB_STREAM,
+            group=settings.JOB_CONSUMER_GROUP,
+            ttl=settings.JOB_TTL,
+            model_version=classifier.version,
+        ),
+        classifier=classifier,
+        antivirus=AntivirusScanner(
+            clamav_connector,
+            signature_version_ttl=settings.CLAMAV_SIGNATURE_VERSION_TTL,
+            max_chunk_size=settings.CLAMAV_CHUNK_SIZE,
+        ),
+        consumer=f"{socket.gethostname()}-{os.getpid()}",
+        batch_size=settings.JOB_WORKER_BATCH_SIZE,
+        block_time=settings.JOB_WORKER_BLOCK_TIME,
+        claim_idle_time=settings.JOB_WORKER_CLAIM_IDLE_TIME,
+        render_at_model_size=settings.RENDER_AT_MODEL_SIZE,
+        grayscale=settings.RENDER_GRAYSCALE,
+        retry_delay=settings.JOB_WORKER_RETRY_DELAY,
+        max_retry_delay=settings.JOB_WORKER_MAX_RETRY_DELAY,
+    )
+    asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, worker.stop)
+    try:
+        await worker.run()
+    finally:
+        await valkey_connector.close()
+        await clamav_connector.close()
+
+
+if __name__ == "__main__":
+    setup_logging_with_correlation_id()
+    torch.set_num_threads(get_torch_threads(1, settings.JOB_WORKER_TORCH_THREADS))
+    asyncio.run(run_worker())
@@ -1,50 +1,194 @@
-import io
+import asyncio
 import logging
 from contextlib import asynccontextmanager
-from typing import Annotated, Callable
+from functools import partial
+from typing import Annotated, Any
 
 import uvicorn
 from fastapi import BackgroundTasks, FastAPI, File, UploadFile, APIRouter
 from fastapi.exception_handlers import request_validation_exception_handler
 from fastapi.exceptions import RequestValidationError
 from fastapi_versionizer.versionizer import Versionizer, api_version
+from prometheus_client import CONTENT_TYPE_LATEST
 from starlette.requests import Request
-from starlette.responses import JSONResponse
+from starlette.responses import JSONResponse, Response
 from starlette.templating import Jinja2Templates
 
 from web_app.antivirus.clamav.connector import ClamavConnector
 from web_app.antivirus.clamav.scanner import AntivirusScanner
+from web_app.database.memory.cache import MemoryCache
 from web_app.database.valkey.client import ValkeyClient
 from web_app.database.valkey.connector import ValkeyConnector
+from web_app.database.valkey.factory import create_valkey_client
+from web_app.database.valkey.popular_documents import PopularDocuments
+from web_app.job.queue import JobQueue
+from web_app.model.backend import FORK_SAFE_MODEL_BACKENDS
+from web_app.model.batcher import MicroBatcher
+from web_app.model.executor import InferenceExecutor, get_torch_threads
+from web_app.model.loader import load_classifier
+from web_app.model.page_cache import PageEmbeddingCache
+from web_app.model.prediction import PredictionRecord, prediction_key
+from web_app.server import PreforkServer, clear_metrics_directory
 from web_app.service.mapper.document_mapper import to_model_input
+from web_app.service.single_flight import SingleFlight, ValkeySingleFlight
+from web_app.service.middleware.body_size_limit import BodySizeLimitMiddleware
 from web_app.service.middleware.correlation import CorrelationIdMiddleware
 from web_app.service.middleware.request_time import RequestProcessingTimeMiddleware
-from web_app.service.validator.upload_file_validator import UploadFileValidator
-from web_app.task.valkey import write_to_valkey
-from web_app.utils.error import APIError
-from web_app.utils.hash import calculate_hash
+from web_app.service.middleware.server_timing import ServerTimingMiddleware
+from web_app.service.validator.upload_file_validator import IngestedDocument, UploadFileValidator
+from web_app.task.valkey import record_popular_documents, write_to_valkey
+from web_app.utils.error import APIError, InferenceQueueFullError
 from web_app.utils.log import setup_logging_with_correlation_id
-from web_app.model.document_classifier import DocumentClassifier
+from web_app.utils.metrics import DOCUMENT_PAGES, record_cache_lookups, render, stage_timer
 from web_app.config.config import settings
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     print("Starting up...")
-    valkey_connector = ValkeyConnector(host=settings.VALKEY_HOST, port=settings.VALKEY_PORT)
-    clamav_connector = ClamavConnector(host=settings.CLAMAV_HOST, port=settings.CLAMAV_PORT)
+    valkey_connector = ValkeyConnector(
+        host=settings.VALKEY_HOST,
+        port=settings.VALKEY_PORT,
+        max_connections=settings.VALKEY_MAX_CONNECTIONS,
+    )
+    await valkey_connector.connect()
+    clamav_connector = ClamavConnector(
+        host=settings.CLAMAV_HOST,
+        port=settings.CLAMAV_PORT,
+        max_sessions=settings.CLAMAV_MAX_SESSIONS,
+        timeout=settings.CLAMAV_TIMEOUT,
+        session_idle_timeout=settings.CLAMAV_SESSION_IDLE_TIMEOUT,
+    )
+    await clamav_connector.connect()
     app.state.settings = settings
-    app.state.validator = UploadFileValidator()
+    app.state.server_timing = settings.SERVER_TIMING
+    app.state.validator = UploadFileValidator(chunk_size=settings.UPLOAD_CHUNK_SIZE)
+    app.state.max_body_sizes = get_max_body_sizes(app.state.validator.validator.max_file_size)
     app.state.clamav_connector = clamav_connector
-    app.state.antivirus = AntivirusScanner(clamav_connector)
+    app.state.antivirus = AntivirusScanner(
+        clamav_connector,
+        signature_version_ttl=settings.CLAMAV_SIGNATURE_VERSION_TTL,
+        max_chunk_size=settings.CLAMAV_CHUNK_SIZE,
+    )
     app.state.valkey_connector = valkey_connector
-    app.state.valkey_client = ValkeyClient(valkey_connector)
-    app.state.model = DocumentClassifier.from_path(settings.MODEL_PATH)
+    app.state.valkey_client = create_valkey_client(valkey_connector)
+    app.state.single_flight = create_single_flight(app.state.valkey_client)
+    app.state.memory_cache = MemoryCache(
+        max_size=settings.MEMORY_CACHE_MAX_SIZE, ttl=settings.MEMORY_CACHE_TTL
+    )
+    app.state.inference_executor = create_inference_executor()
+    app.state.model_version = await app.state.inference_executor.model_version()
+    logging.info(f"Serving predictions of model version {app.state.model_version}.")
+    app.state.job_queue = JobQueue(
+        app.state.valkey_client,
+        stream=settings.JOB_STREAM,
+        group=settings.JOB_CONSUMER_GROUP,
+        ttl=settings.JOB_TTL,
+        model_version=app.state.model_version,
+    )
+    app.state.popular_documents = create_popular_documents(app.state.valkey_client)
+    app.state.page_embedding_cache = await create_page_embedding_cache(
+        app.state.inference_executor, app.state.valkey_client, app.state.model_version
+    )
+    app.state.batcher = MicroBatcher(
+        app.state.inference_executor,
+        max_batch_size=settings.BATCH_MAX_SIZE,
+        max_wait_time=settings.BATCH_MAX_WAIT_TIME,
+        page_cache=app.state.page_embedding_cache,
+    )
+    app.state.batcher.start()
+    # the application reports ready once the most requested documents are scored by this model
+    app.state.cache_warming = asyncio.create_task(warm_cache())
 
     yield
 
     print("Shutting down...")
-    app.state.valkey_connector.close()
+    app.state.cache_warming.cancel()
+    app.state.memory_cache.log_stats()
+    if app.state.page_embedding_cache is not None:
+        app.state.page_embedding_cache.memory_cache.log_stats()
+    await app.state.batcher.stop()
+    app.state.inference_executor.shutdown()
+    await app.state.valkey_connector.close()
+    await app.state.clamav_connector.close()
+
+
+def create_single_flight(valkey_client: ValkeyClient) -> SingleFlight:
+    if settings.SINGLE_FLIGHT_VALKEY_LOCK:
+        return ValkeySingleFlight(
+            valkey_client,
+            lock_ttl=settings.SINGLE_FLIGHT_LOCK_TTL,
+            poll_interval=settings.SINGLE_FLIGHT_POLL_INTERVAL,
+        )
+    return SingleFlight()
+
+
+def create_popular_documents(valkey_client: ValkeyClient) -> PopularDocuments | None:
+    if settings.CACHE_WARM_TOP_DOCUMENTS <= 0:
+        return None
+    return PopularDocuments(
+        valkey_client,
+        min_hits=settings.CACHE_WARM_MIN_HITS,
+        window_days=settings.CACHE_WARM_WINDOW_DAYS,
+        document_ttl=settings.CACHE_WARM_DOCUMENT_TTL,
+        max_documents=settings.CACHE_WARM_TOP_DOCUMENTS,
+    )
+
+
+async def create_page_embedding_cache(
+    executor: InferenceExecutor, valkey_client: ValkeyClient, model_version: str
+) -> PageEmbeddingCache | None:
+    if settings.PAGE_EMBEDDING_CACHE_MAX_SIZE <= 0:
+        return None
+    if not await executor.supports_page_embeddings():
+        logging.warning("Model does not export page embeddings, page embedding cache disabled.")
+        return None
+    return PageEmbeddingCache(
+        executor,
+        MemoryCache(
+            max_size=settings.PAGE_EMBEDDING_CACHE_MAX_SIZE,
+            ttl=settings.PAGE_EMBEDDING_CACHE_TTL,
+            name="page embedding",
+        ),
+        model_version,
+        valkey_client=valkey_client if settings.PAGE_EMBEDDING_CACHE_VALKEY else None,
+        valkey_ttl=settings.PAGE_EMBEDDING_CACHE_VALKEY_TTL,
+    )
+
+
+def get_max_body_sizes(max_file_size: int) -> dict[str, int]:
+    # every document part also carries its multipart boundary and headers
+    part_size = max_file_size + 4096
+    return {
+        "/predict": part_size,
+        "/predict/batch": settings.PREDICT_BATCH_MAX_DOCUMENTS * part_size,
+        "/jobs": settings.JOB_MAX_DOCUMENTS * part_size,
+    }
+
+
+def create_inference_executor() -> InferenceExecutor:
+    if settings.INFERENCE_EXECUTOR == "process":
+        return InferenceExecutor.with_processes(
+            load_classifier,
+            workers=settings.INFERENCE_WORKERS,
+            torch_threads=get_torch_threads(
+                settings.SERVER_WORKERS * settings.INFERENCE_WORKERS,
+                settings.INFERENCE_TORCH_THREADS,
+            ),
+            max_queue_size=settings.INFERENCE_MAX_QUEUE_SIZE,
+        )
+    # loaded once by the pre-fork server and shared by its workers
+    classifier = getattr(app.state, "preloaded_classifier", None)
+    if classifier is None:
+        classifier = load_classifier()
+    return InferenceExecutor.with_threads(
+        classifier,
+        workers=settings.INFERENCE_WORKERS,
+        torch_threads=get_torch_threads(
+            settings.SERVER_WORKERS * settings.INFERENCE_WORKERS, settings.INFERENCE_TORCH_THREADS
+        ),
+        max_queue_size=settings.INFERENCE_MAX_QUEUE_SIZE,
+    )
 
 
 setup_logging_with_correlation_id()
@@ -53,10 +197,13 @@ app = FastAPI(lifespan=lifespan)
 
 app.add_middleware(CorrelationIdMiddleware)
 app.add_middleware(RequestProcessingTimeMiddleware)
+app.add_middleware(ServerTimingMiddleware)
+app.add_middleware(BodySizeLimitMiddleware)
 
 templates = Jinja2Templates(directory="resources/templates")
 
 predict_router = APIRouter(prefix="", tags=["Prediction"])
+job_router = APIRouter(prefix="", tags=["Jobs"])
 
 
 @app.exception_handler(APIError)
@@ -67,6 +214,15 @@ async def api_error_exception_handler(request: Request, exc: APIError):
     )
 
 
+@app.exception_handler(InferenceQueueFullError)
+async def inference_queue_full_exception_handler(request: Request, exc: InferenceQueueFullError):
+    return JSONResponse(
+        status_code=503,
+        content={"message": "Service temporarily unavailable"},
+        headers={"Retry-After": "1"},
+    )
+
+
 @app.exception_handler(Exception)
 async def unknown_exception_handler(request: Request, exc: Exception):
     logging.critical("Unhandled error occurred in the API.", exc_info=True)
@@ -82,41 +238,224 @@ async def validation_exception_handler(request: Request, exc: RequestValidationE
     return await request_validation_exception_handler(request, exc)
 
 
+async def read_from_cache(keys: list[str]) -> dict[str, Any]:
+    # the in-memory and Valkey lookups together, valkey_read is timed on its own as well
+    with stage_timer("cache"):
+        values = {key: app.state.memory_cache.get(key) for key in keys}
+        record_cache_lookups("memory", values)
+        missing_keys = [key for key, value in values.items() if value is None]
+        if missing_keys:
+            valkey_values = await app.state.valkey_client.read_many(missing_keys)
+            record_cache_lookups("valkey", dict(zip(missing_keys, valkey_values)))
+            for key, value in zip(missing_keys, valkey_values):
+                if value is not None:
+                    app.state.memory_cache.set(key, value)
+                    values[key] = value
+    return values
+
+
+def write_to_cache(values: dict[str, Any], background_tasks: BackgroundTasks) -> None:
+    if not values:
+        return
+    for key, value in values.items():
+        app.state.memory_cache.set(key, value)
+    background_tasks.add_task(
+        func=write_to_valkey,
+        valkey_client=app.state.valkey_client,
+        values=values,
+    )
+
+
+def record_requests(documents: list[IngestedDocument], background_tasks: BackgroundTasks) -> None:
+    if app.state.popular_documents is None:
+        return
+    background_tasks.add_task(
+        func=record_popular_documents,
+        popular_documents=app.state.popular_documents,
+        documents=documents,
+    )
+
+
+async def warm_cache() -> None:
+    if app.state.popular_documents is None:
+        return
+    try:
+        digests = await app.state.popular_documents.most_requested(
+            settings.CACHE_WARM_TOP_DOCUMENTS
+        )
+        logging.info(f"Warming cache of model {app.state.model_version} with {len(digests)=}.")
+        warmed = 0
+        for start in range(0, len(digests), settings.PREDICT_BATCH_MAX_DOCUMENTS):
+            batch = digests[start : start + settings.PREDICT_BATCH_MAX_DOCUMENTS]
+            keys = {digest: prediction_key(app.state.model_version, digest) for digest in batch}
+            # other replicas starting with the same model may have scored them already
+            cached = await read_from_cache(list(keys.values()))
+            contents = await app.state.popular_documents.load(
+                [digest for digest in batch if cached[keys[digest]] is None]
+            )
+            contents = {
+                digest: content for digest, content in contents.items() if content is not None
+            }
+            if not contents:
+                continue
+            records = await predict_many(list(contents.values()))
+            new_values = {keys[digest]: record for digest, record in zip(contents, records)}
+            for key, record in new_values.items():
+                app.state.memory_cache.set(key, record)
+            await app.state.valkey_client.write_many(new_values)
+            warmed += len(new_values)
+        logging.info(f"Cache of model {app.state.model_version} warmed, {warmed=}.")
+    except Exception:
+        # a cold cache is slower, not broken
+        logging.exception("Unable to warm cache, serving with a cold cache.")
+
+
+async def predict_many(documents_bytes: list[bytes]) -> list[PredictionRecord]:
+    # submitted together so the micro batcher collates them into full forward passes
+    with app.state.inference_executor.reserve(len(documents_bytes)):
+        model_inputs = await asyncio.gather(
+            *[
+                app.state.inference_executor.run(
+                    to_model_input,
+                    document_bytes,
+                    settings.RENDER_AT_MODEL_SIZE,
+                    settings.RENDER_GRAYSCALE,
+                )
+                for document_bytes in documents_bytes
+            ]
+        )
+        for _, lengths in model_inputs:
+            DOCUMENT_PAGES.observe(int(lengths.sum()))
+        # waiting for a batch included, the forward pass runs outside of the request
+        with stage_timer("inference"):
+            predicted_probas = await asyncio.gather(
+                *[app.state.batcher.predict_proba(*model_input) for model_input in model_inputs]
+            )
+    return [
+        PredictionRecord.from_proba(predicted_proba, app.state.model_version)
+        for predicted_proba in predicted_probas
+    ]
+
+
+async def predict(document_bytes: bytes) -> PredictionRecord:
+    with app.state.inference_executor.reserve():
+        model_input = await app.state.inference_executor.run(
+            to_model_input,
+            document_bytes,
+            settings.RENDER_AT_MODEL_SIZE,
+            settings.RENDER_GRAYSCALE,
+        )
+        DOCUMENT_PAGES.observe(int(model_input[1].sum()))
+        with stage_timer("inference"):
+            predicted_proba = await app.state.batcher.predict_proba(*model_input)
+    return PredictionRecord.from_proba(predicted_proba, app.state.model_version)
+
+
 async def predict_template(
-    document: UploadFile, background_tasks: BackgroundTasks, predict_fn: Callable, has_prefix: str
+    document: UploadFile, background_tasks: BackgroundTasks, has_prefix: str
 ) -> JSONResponse:
-    document_bytes = await document.read()
-    app.state.antivirus.scan(document_bytes)
-    app.state.validator.validate(io.BytesIO(document_bytes))
-    document_hash = f"{has_prefix}_{calculate_hash(document_bytes)}"
-    prediction = app.state.valkey_client.read(document_hash)
-
-    if prediction is None:
-        model_input = to_model_input(document_bytes)
-        prediction = predict_fn(*model_input)
-        background_tasks.add_task(
-            func=write_to_valkey,
-            valkey_client=app.state.valkey_client,
-            key=document_hash,
-            value=prediction,
-        )
+    # size and content type are validated while the upload is read and hashed
+    ingested_document = await app.state.validator.read(document)
+    document_bytes = ingested_document.content
+    document_digest = ingested_document.digest
+    verified_key = f"verified_{document_digest}"
+    # one record per document, rendered for the requested API version
+    document_hash = prediction_key(app.state.model_version, document_digest)
+    signature_version = await app.state.antivirus.signature_version()
+    cached = await read_from_cache([verified_key, document_hash])
+    new_values = {}
+
+    # digest already scanned clean against the current signature database
+    if cached[verified_key] != signature_version:
+        await app.state.antivirus.scan(document_bytes)
+        new_values[verified_key] = signature_version
+    else:
+        logging.info("Document already verified, skipping antivirus scan.")
+
+    record = cached[document_hash]
+    if record is None:
+        record = await app.state.single_flight.do(document_hash, partial(predict, document_bytes))
+        new_values[document_hash] = record
         from_cache = "false"
     else:
         from_cache = "true"
 
+    write_to_cache(new_values, background_tasks)
+    record_requests([ingested_document], background_tasks)
+
     return JSONResponse(
-        content={"prediction": prediction},
+        content={"prediction": record.render(has_prefix)},
         headers={"X-Readed-From-Cache": from_cache},
     )
 
 
+async def predict_batch_template(
+    documents: list[UploadFile],
+    background_tasks: BackgroundTasks,
+    has_prefix: str,
+) -> JSONResponse:
+    if len(documents) > settings.PREDICT_BATCH_MAX_DOCUMENTS:
+        raise RequestValidationError(
+            [f"Number of documents exceeds the limit of {settings.PREDICT_BATCH_MAX_DOCUMENTS}"]
+        )
+
+    ingested_documents = [await app.state.validator.read(document) for document in documents]
+    unique_documents = {document.digest: document for document in ingested_documents}
+    prediction_keys = {
+        digest: prediction_key(app.state.model_version, digest) for digest in unique_documents
+    }
+    signature_version = await app.state.antivirus.signature_version()
+    cached = await read_from_cache(
+        [f"verified_{digest}" for digest in unique_documents] + list(prediction_keys.values())
+    )
+    new_values = {}
+
+    unverified_documents = [
+        document
+        for digest, document in unique_documents.items()
+        if cached[f"verified_{digest}"] != signature_version
+    ]
+    await asyncio.gather(
+        *[app.state.antivirus.scan(document.content) for document in unverified_documents]
+    )
+    for document in unverified_documents:
+        new_values[f"verified_{document.digest}"] = signature_version
+
+    missed_documents = [
+        document
+        for digest, document in unique_documents.items()
+        if cached[prediction_keys[digest]] is None
+    ]
+    logging.info(
+        f"Predicting batch of {len(documents)} documents, "
+        f"{len(unique_documents)=}, {len(missed_documents)=}."
+    )
+    if missed_documents:
+        records = await predict_many([document.content for document in missed_documents])
+        for document, record in zip(missed_documents, records):
+            cached[prediction_keys[document.digest]] = record
+            new_values[prediction_keys[document.digest]] = record
+
+    write_to_cache(new_values, background_tasks)
+    record_requests(ingested_documents, background_tasks)
+
+    return JSONResponse(
+        content={
+            "predictions": [
+                cached[prediction_keys[document.digest]].render(has_prefix)
+                for document in ingested_documents
+            ]
+        },
+    )
+
+
 @api_version(1)
 @predict_router.post("/predict")
 async def predict_v1(
     document: Annotated[UploadFile, File(description="File as UploadFile")],
     background_tasks: BackgroundTasks,
 ) -> JSONResponse:
-    return await predict_template(document, background_tasks, app.state.model.classify, "v1")
+    return await predict_template(document, background_tasks, "v1")
 
 
 @api_version(2)
@@ -125,10 +464,74 @@ async def predict_v2(
     document: Annotated[UploadFile, File(description="File as UploadFile")],
     background_tasks: BackgroundTasks,
 ) -> JSONResponse:
-    return await predict_template(document, background_tasks, app.state.model.classify_proba, "v2")
+    return await predict_template(document, background_tasks, "v2")
+
+
+@api_version(1)
+@predict_router.post("/predict/batch")
+async def predict_batch_v1(
+    documents: Annotated[list[UploadFile], File(description="Files as list of UploadFile")],
+    background_tasks: BackgroundTasks,
+) -> JSONResponse:
+    return await predict_batch_template(documents, background_tasks, "v1")
+
+
+@api_version(2)
+@predict_router.post("/predict/batch")
+async def predict_batch_v2(
+    documents: Annotated[list[UploadFile], File(description="Files as list of UploadFile")],
+    background_tasks: BackgroundTasks,
+) -> JSONResponse:
+    return await predict_batch_template(documents, background_tasks, "v2")
+
+
+async def submit_job_template(documents: list[UploadFile], has_prefix: str) -> JSONResponse:
+    if len(documents) > settings.JOB_MAX_DOCUMENTS:
+        raise RequestValidationError(
+            [f"Number of documents exceeds the limit of {settings.JOB_MAX_DOCUMENTS}"]
+        )
+    ingested_documents = [await app.state.validator.read(document) for document in documents]
+    job_id = await app.state.job_queue.submit(has_prefix, ingested_documents)
+    return JSONResponse(status_code=202, content={"job_id": job_id})
+
+
+async def get_job_template(job_id: str) -> JSONResponse:
+    job_status = await app.state.job_queue.status(job_id)
+    if job_status is None:
+        return JSONResponse(status_code=404, content={"message": "Job not found"})
+    return JSONResponse(content=job_status)
+
+
+@api_version(1)
+@job_router.post("/jobs")
+async def submit_job_v1(
+    documents: Annotated[list[UploadFile], File(description="Files as list of UploadFile")],
+) -> JSONResponse:
+    return await submit_job_template(documents, "v1")
+
+
+@api_version(1)
+@job_router.get("/jobs/{job_id}")
+async def get_job_v1(job_id: str) -> JSONResponse:
+    return await get_job_template(job_id)
+
+
+@api_version(2)
+@job_router.post("/jobs")
+async def submit_job_v2(
+    documents: Annotated[list[UploadFile], File(description="Files as list of UploadFile")],
+) -> JSONResponse:
+    return await submit_job_template(documents, "v2")
+
+
+@api_version(2)
+@job_router.get("/jobs/{job_id}")
+async def get_job_v2(job_id: str) -> JSONResponse:
+    return await get_job_template(job_id)
 
 
 app.include_router(predict_router)
+app.include_router(job_router)
 
 versions = Versionizer(
     app=app,
@@ -150,22 +553,43 @@ async def main(request: Request):
 
 
 @app.get("/readiness")
-def ready_check() -> JSONResponse:
-    app.state.valkey_connector.is_alive()
-    app.state.clamav_connector.is_alive()
+async def ready_check() -> JSONResponse:
+    await app.state.valkey_connector.is_alive()
+    await app.state.clamav_connector.is_alive()
+    if not app.state.cache_warming.done():
+        return JSONResponse(status_code=503, content={"status": "warming cache"})
     return JSONResponse(content={"status": "ready"})
 
 
+@app.get("/metrics")
+def metrics() -> Response:
+    return Response(content=render(), media_type=CONTENT_TYPE_LATEST)
+
+
 @app.get("/health")
 def health_check() -> JSONResponse:
     return JSONResponse(content={"status": "healthy"})
 
 
 if __name__ == "__main__":
-    uvicorn.run(
-        app=app,
-        host="0.0.0.0",
-        port=8080,
-        workers=1,
-        reload=False,
-    )
+    if settings.SERVER_WORKERS > 1:
+        PreforkServer(
+            app=app,
+            host="0.0.0.0",
+            port=8080,
+            workers=settings.SERVER_WORKERS,
+            load_classifier=load_classifier,
+            # a process executor loads the model in its own processes, a preloaded one is unused
+            preload_classifier=settings.MODEL_BACKEND in FORK_SAFE_MODEL_BACKENDS
+            and settings.INFERENCE_EXECUTOR == "thread",
+        ).run()
+    else:
+        # the multiprocess metric files of a previous run would be aggregated with this one
+        clear_metrics_directory()
+        uvicorn.run(
+            app=app,
+            host="0.0.0.0",
+            port=8080,
+            workers=1,
+            reload=False,
+        )
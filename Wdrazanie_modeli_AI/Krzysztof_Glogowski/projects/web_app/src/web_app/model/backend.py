@@ -0,0 +1,107 @@
+import io
+import logging
+from typing import Any, Callable, Protocol
+
+import torch
+from torch.nn.functional import softmax
+
+from web_app.utils.device import get_device
+
+
+class InferenceModel(Protocol):
+    def __call__(self, x: torch.Tensor, lengths: torch.Tensor) -> torch.Tensor: ...
+
+    def predict_proba(self, x: torch.Tensor, lengths: torch.Tensor) -> torch.Tensor: ...
+
+    def eval(self) -> "InferenceModel": ...
+
+
+# methods used besides forward, kept when a frozen model is optimized
+PRESERVED_METHODS = ("predict_proba", "embed_pages", "classify_page_embeddings")
+
+
+def load_torchscript_model(
+    content: bytes, optimize_for_inference: bool = False
+) -> torch.jit.ScriptModule:
+    # constants of a frozen model are moved by map_location only
+    model = torch.jit.load(io.BytesIO(content), map_location=get_device())
+    if optimize_for_inference:
+        # after loading, a saved optimized graph of a ViT can't be loaded, see ml_pipelines.model_export
+        model = torch.jit.optimize_for_inference(
+            model, other_methods=[method for method in PRESERVED_METHODS if hasattr(model, method)]
+        )
+    return model
+
+
+class OnnxRuntimeModel:
+    """Runs a model exported by ml_pipelines.model_export.export_onnx on the ONNX Runtime CPU provider."""
+
+    GRAPH_OPTIMIZATION_LEVELS = {
+        "disable": "ORT_DISABLE_ALL",
+        "basic": "ORT_ENABLE_BASIC",
+        "extended": "ORT_ENABLE_EXTENDED",
+        "all": "ORT_ENABLE_ALL",
+    }
+
+    def __init__(self, session: Any):
+        self.session = session
+
+    @classmethod
+    def from_bytes(
+        cls,
+        content: bytes,
+        intra_op_threads: int = 0,
+        inter_op_threads: int = 0,
+        graph_optimization_level: str = "all",
+    ) -> "OnnxRuntimeModel":
+        # optional web-app-onnx dependency group, only needed when serving with this backend
+        import onnxruntime
+
+        logging.info(
+            f"Creating ONNX Runtime session with {intra_op_threads=}, {inter_op_threads=}, "
+            f"{graph_optimization_level=}."
+        )
+        options = onnxruntime.SessionOptions()
+        options.graph_optimization_level = getattr(
+            onnxruntime.GraphOptimizationLevel,
+            cls.GRAPH_OPTIMIZATION_LEVELS[graph_optimization_level],
+        )
+        # 0 lets ONNX Runtime pick the number of threads
+        options.intra_op_num_threads = intra_op_threads
+        options.inter_op_num_threads = inter_op_threads
+        if inter_op_threads > 1:
+            options.execution_mode = onnxruntime.ExecutionMode.ORT_PARALLEL
+        session = onnxruntime.InferenceSession(
+            content, sess_options=options, providers=["CPUExecutionProvider"]
+        )
+        return cls(session)
+
+    def __call__(self, x: torch.Tensor, lengths: torch.Tensor) -> torch.Tensor:
+        (logits,) = self.session.run(
+            ["logits"],
+            {"images": x.cpu().numpy(), "lengths": lengths.cpu().to(torch.int64).numpy()},
+        )
+        return torch.from_numpy(logits)
+
+    def predict_proba(self, x: torch.Tensor, lengths: torch.Tensor) -> torch.Tensor:
+        return softmax(self(x, lengths).squeeze(0), dim=0)
+
+    def eval(self) -> "OnnxRuntimeModel":
+        return self
+
+
+MODEL_BACKENDS: dict[str, Callable[..., InferenceModel]] = {
+    "torchscript": load_torchscript_model,
+    "onnxruntime": OnnxRuntimeModel.from_bytes,
+}
+# backends whose loaded model a forked process can keep using, ONNX Runtime sessions lose the
+# threads of their pools in the child
+FORK_SAFE_MODEL_BACKENDS = ("torchscript",)
+
+
+def load_model(content: bytes, backend: str = "torchscript", **options: Any) -> InferenceModel:
+    if backend not in MODEL_BACKENDS:
+        raise ValueError(
+            f"Unknown model backend {backend}, expected one of {list(MODEL_BACKENDS)}."
+        )
+    return MODEL_BACKENDS[backend](content, **options)
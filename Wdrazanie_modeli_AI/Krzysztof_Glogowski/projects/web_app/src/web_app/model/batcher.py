@@ -0,0 +1,114 @@
+import asyncio
+import logging
+from dataclasses import dataclass
+
+import torch
+
+from common.collators import predict_collate_with_indices_fn
+from web_app.model.executor import InferenceExecutor
+from web_app.model.page_cache import PageEmbeddingCache
+from web_app.utils.metrics import BATCHER_QUEUE_DEPTH
+
+
+@dataclass
+class PendingDocument:
+    images: torch.Tensor
+    lengths: torch.Tensor
+    future: asyncio.Future
+
+
+class MicroBatcher:
+    """Merges concurrently submitted documents into a single forward pass."""
+
+    def __init__(
+        self,
+        executor: InferenceExecutor,
+        max_batch_size: int = 8,
+        max_wait_time: float = 0.005,
+        page_cache: PageEmbeddingCache | None = None,
+    ):
+        self.executor = executor
+        self.page_cache = page_cache
+        self.max_batch_size = max_batch_size
+        self.max_wait_time = max_wait_time
+        self._queue: asyncio.Queue[PendingDocument] = asyncio.Queue()
+        self._worker: asyncio.Task | None = None
+
+    def start(self) -> None:
+        logging.info(f"Starting micro batcher with {self.max_batch_size=}, {self.max_wait_time=}.")
+        self._worker = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._worker is None:
+            return
+        self._worker.cancel()
+        try:
+            await self._worker
+        except asyncio.CancelledError:
+            pass
+        self._worker = None
+        while not self._queue.empty():
+            document = self._queue.get_nowait()
+            if not document.future.done():
+                document.future.cancel()
+        BATCHER_QUEUE_DEPTH.set(0)
+        logging.info("Micro batcher stopped.")
+
+    @property
+    def queue_size(self) -> int:
+        return self._queue.qsize()
+
+    async def predict_proba(self, images: torch.Tensor, lengths: torch.Tensor) -> torch.Tensor:
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait(PendingDocument(images, lengths, future))
+        BATCHER_QUEUE_DEPTH.set(self.queue_size)
+        return await future
+
+    async def _run(self) -> None:
+        while True:
+            batch = await self._collect_batch()
+            BATCHER_QUEUE_DEPTH.set(self.queue_size)
+            await self._process_batch(batch)
+
+    async def _collect_batch(self) -> list[PendingDocument]:
+        batch = [await self._queue.get()]
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.max_wait_time
+
+        while len(batch) < self.max_batch_size:
+            if not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                continue
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+
+        return batch
+
+    async def _process_batch(self, batch: list[PendingDocument]) -> None:
+        batch = [document for document in batch if not document.future.done()]
+        if len(batch) == 0:
+            return
+
+        logging.debug(f"Running forward pass for a batch of {len(batch)} documents.")
+        images, lengths, sorted_indices = predict_collate_with_indices_fn(
+            [list(document.images) for document in batch]
+        )
+        try:
+            if self.page_cache is not None:
+                predicted_proba = await self.page_cache.predict_proba_batch(images, lengths)
+            else:
+                predicted_proba = await self.executor.predict_proba_batch(images, lengths)
+        except Exception as e:
+            for document in batch:
+                if not document.future.done():
+                    document.future.set_exception(e)
+            return
+
+        for position, idx in enumerate(sorted_indices):
+            if not batch[idx].future.done():
+                batch[idx].future.set_result(predicted_proba[position])
@@ -1,25 +1,49 @@
-import io
+import hashlib
 import logging
+import os
+from typing import Any
 
 import fsspec
 import torch
-from torch.jit import ScriptModule
+from torch.nn.functional import softmax
 
-from web_app.utils.device import get_device
+from web_app.model.backend import InferenceModel, load_model
+from web_app.utils.metrics import stage_timer
+
+# exported by the training pipeline next to the plain fp32 model, see ml_pipelines.model_export
+MODEL_VARIANTS = ("fp32", "frozen", "int8")
+
+
+def get_model_path(path: str, variant: str = "fp32", backend: str = "torchscript") -> str:
+    if variant not in MODEL_VARIANTS:
+        raise ValueError(f"Unknown model variant {variant}, expected one of {MODEL_VARIANTS}.")
+    root, extension = os.path.splitext(path)
+    if backend == "onnxruntime":
+        if variant != "fp32":
+            raise ValueError(f"Model variant {variant} is not exported to ONNX.")
+        return f"{root}.onnx"
+    if variant == "fp32":
+        return path
+    return f"{root}_{variant}{extension}"
 
 
 class DocumentClassifier:
-    def __init__(self, model: ScriptModule):
+    def __init__(self, model: InferenceModel, version: str = "unknown"):
         self.model = model
+        self.version = version
         self.model.eval()
 
     @classmethod
-    def from_path(cls, path: str) -> "DocumentClassifier":
-        logging.info("Creating DocumentClusteringModel from model state path.")
+    def from_path(
+        cls, path: str, backend: str = "torchscript", **backend_options: Any
+    ) -> "DocumentClassifier":
+        logging.info(f"Creating DocumentClusteringModel from model state path with {backend=}.")
         with fsspec.open(path) as f:
-            buffer = io.BytesIO(f.read())
-        model = torch.jit.load(buffer).to(get_device())
-        return cls(model)
+            content = f.read()
+        # fingerprint of the artifact, stored with every prediction made by it
+        version = hashlib.sha256(content).hexdigest()[:16]
+        logging.info(f"Loaded model {version=}.")
+        return cls(load_model(content, backend, **backend_options), version)
 
     def classify(self, document_as_images: torch.Tensor, lengths: torch.Tensor) -> dict[str, int]:
         with torch.no_grad():
@@ -29,6 +53,39 @@ class DocumentClassifier:
     def classify_proba(self, document_as_images: torch.Tensor, lengths: torch.Tensor):
         with torch.no_grad():
             predicted_proba = self.model.predict_proba(document_as_images, lengths)
+        return self.to_ranking(predicted_proba)
+
+    def predict_proba_batch(
+        self, documents_as_images: torch.Tensor, lengths: torch.Tensor
+    ) -> torch.Tensor:
+        """Returns one row of class probabilities per document in the collated batch."""
+        with stage_timer("forward"), torch.no_grad():
+            output: torch.Tensor = self.model(documents_as_images, lengths)
+        return softmax(output, dim=1).cpu()
+
+    @property
+    def supports_page_embeddings(self) -> bool:
+        return hasattr(self.model, "embed_pages") and hasattr(
+            self.model, "classify_page_embeddings"
+        )
+
+    def embed_pages(self, images: torch.Tensor) -> torch.Tensor:
+        with stage_timer("embed_pages"), torch.no_grad():
+            return self.model.embed_pages(images).cpu()
+
+    def predict_proba_from_page_embeddings(
+        self, embeddings: torch.Tensor, lengths: torch.Tensor
+    ) -> torch.Tensor:
+        with stage_timer("classification_head"), torch.no_grad():
+            output: torch.Tensor = self.model.classify_page_embeddings(embeddings, lengths)
+        return softmax(output, dim=1).cpu()
+
+    @staticmethod
+    def to_label(predicted_proba: torch.Tensor) -> dict[str, int]:
+        return {"label": int(predicted_proba.argmax().item())}
+
+    @staticmethod
+    def to_ranking(predicted_proba: torch.Tensor) -> list[dict[str, int | float]]:
         labels_sorted_by_proba = torch.argsort(predicted_proba, descending=True)
         classification_result = [
             {"label": int(label), "confidence": float(predicted_proba[label])}
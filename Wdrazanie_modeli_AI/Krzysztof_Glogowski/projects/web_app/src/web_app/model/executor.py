@@ -0,0 +1,172 @@
+import asyncio
+import logging
+import multiprocessing
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator
+
+import torch
+
+from web_app.model.document_classifier import DocumentClassifier
+from web_app.utils.error import InferenceQueueFullError
+from web_app.utils.metrics import (
+    INFERENCE_QUEUE_DEPTH,
+    collect_stage_durations,
+    observe_stage_durations,
+)
+
+_process_worker_classifier: DocumentClassifier | None = None
+
+
+def _init_process_worker(
+    load_classifier: Callable[[], DocumentClassifier], torch_threads: int
+) -> None:
+    global _process_worker_classifier
+    torch.set_num_threads(torch_threads)
+    _process_worker_classifier = load_classifier()
+
+
+def _predict_proba_batch_in_process_worker(
+    documents_as_images: torch.Tensor, lengths: torch.Tensor
+) -> torch.Tensor:
+    return _process_worker_classifier.predict_proba_batch(documents_as_images, lengths)
+
+
+def _embed_pages_in_process_worker(images: torch.Tensor) -> torch.Tensor:
+    return _process_worker_classifier.embed_pages(images)
+
+
+def _predict_proba_from_page_embeddings_in_process_worker(
+    embeddings: torch.Tensor, lengths: torch.Tensor
+) -> torch.Tensor:
+    return _process_worker_classifier.predict_proba_from_page_embeddings(embeddings, lengths)
+
+
+def _supports_page_embeddings_in_process_worker() -> bool:
+    return _process_worker_classifier.supports_page_embeddings
+
+
+def _model_version_in_process_worker() -> str:
+    return _process_worker_classifier.version
+
+
+def get_torch_threads(workers: int, torch_threads: int = 0) -> int:
+    if torch_threads > 0:
+        return torch_threads
+    return max(1, (os.cpu_count() or 1) // workers)
+
+
+class InferenceExecutor:
+    """Runs CPU bound preprocessing and forward passes outside of the event loop."""
+
+    def __init__(
+        self,
+        executor: Executor,
+        max_queue_size: int,
+        classifier: DocumentClassifier | None = None,
+    ):
+        self.executor = executor
+        self.max_queue_size = max_queue_size
+        self.classifier = classifier
+        self._pending_requests = 0
+
+    @classmethod
+    def with_threads(
+        cls,
+        classifier: DocumentClassifier,
+        workers: int = 1,
+        torch_threads: int = 0,
+        max_queue_size: int = 32,
+    ) -> "InferenceExecutor":
+        threads = get_torch_threads(workers, torch_threads)
+        logging.info(f"Creating thread inference executor with {workers=}, {threads=}.")
+        torch.set_num_threads(threads)
+        executor = ThreadPoolExecutor(
+            max_workers=workers,
+            thread_name_prefix="inference",
+            initializer=torch.set_num_threads,
+            initargs=(threads,),
+        )
+        return cls(executor, max_queue_size, classifier)
+
+    @classmethod
+    def with_processes(
+        cls,
+        load_classifier: Callable[[], DocumentClassifier],
+        workers: int = 1,
+        torch_threads: int = 0,
+        max_queue_size: int = 32,
+    ) -> "InferenceExecutor":
+        threads = get_torch_threads(workers, torch_threads)
+        logging.info(f"Creating process inference executor with {workers=}, {threads=}.")
+        executor = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_process_worker,
+            initargs=(load_classifier, threads),
+        )
+        return cls(executor, max_queue_size)
+
+    @contextmanager
+    def reserve(self, documents: int = 1) -> Iterator[None]:
+        """Reserves a slot of the queue for each document, a batch larger than the whole queue is
+        admitted only when the queue is empty and fills it."""
+        slots = min(documents, self.max_queue_size)
+        if self._pending_requests + slots > self.max_queue_size:
+            logging.warning(f"Inference queue is full, {self._pending_requests=}, {documents=}.")
+            raise InferenceQueueFullError(self.max_queue_size)
+        self._pending_requests += slots
+        INFERENCE_QUEUE_DEPTH.set(self._pending_requests)
+        try:
+            yield
+        finally:
+            self._pending_requests -= slots
+            INFERENCE_QUEUE_DEPTH.set(self._pending_requests)
+
+    @property
+    def pending_requests(self) -> int:
+        return self._pending_requests
+
+    async def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        result, durations = await asyncio.get_running_loop().run_in_executor(
+            self.executor, collect_stage_durations, fn, *args
+        )
+        observe_stage_durations(durations)
+        return result
+
+    async def predict_proba_batch(
+        self, documents_as_images: torch.Tensor, lengths: torch.Tensor
+    ) -> torch.Tensor:
+        if self.classifier is not None:
+            return await self.run(self.classifier.predict_proba_batch, documents_as_images, lengths)
+        return await self.run(_predict_proba_batch_in_process_worker, documents_as_images, lengths)
+
+    async def embed_pages(self, images: torch.Tensor) -> torch.Tensor:
+        if self.classifier is not None:
+            return await self.run(self.classifier.embed_pages, images)
+        return await self.run(_embed_pages_in_process_worker, images)
+
+    async def predict_proba_from_page_embeddings(
+        self, embeddings: torch.Tensor, lengths: torch.Tensor
+    ) -> torch.Tensor:
+        if self.classifier is not None:
+            return await self.run(
+                self.classifier.predict_proba_from_page_embeddings, embeddings, lengths
+            )
+        return await self.run(
+            _predict_proba_from_page_embeddings_in_process_worker, embeddings, lengths
+        )
+
+    async def supports_page_embeddings(self) -> bool:
+        if self.classifier is not None:
+            return self.classifier.supports_page_embeddings
+        return await self.run(_supports_page_embeddings_in_process_worker)
+
+    async def model_version(self) -> str:
+        if self.classifier is not None:
+            return self.classifier.version
+        return await self.run(_model_version_in_process_worker)
+
+    def shutdown(self) -> None:
+        self.executor.shutdown(wait=True, cancel_futures=True)
@@ -0,0 +1,20 @@
+from web_app.config.config import settings
+from web_app.model.document_classifier import DocumentClassifier, get_model_path
+
+
+def load_classifier() -> DocumentClassifier:
+    backend_options = {}
+    if settings.MODEL_BACKEND == "torchscript":
+        # frozen and int8 variants are saved frozen and optimized for inference once loaded
+        backend_options = {"optimize_for_inference": settings.MODEL_VARIANT != "fp32"}
+    if settings.MODEL_BACKEND == "onnxruntime":
+        backend_options = {
+            "intra_op_threads": settings.ONNX_INTRA_OP_THREADS,
+            "inter_op_threads": settings.ONNX_INTER_OP_THREADS,
+            "graph_optimization_level": settings.ONNX_GRAPH_OPTIMIZATION_LEVEL,
+        }
+    return DocumentClassifier.from_path(
+        get_model_path(settings.MODEL_PATH, settings.MODEL_VARIANT, settings.MODEL_BACKEND),
+        settings.MODEL_BACKEND,
+        **backend_options,
+    )
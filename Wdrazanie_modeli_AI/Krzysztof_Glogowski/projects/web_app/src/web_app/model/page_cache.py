@@ -0,0 +1,102 @@
+import hashlib
+import logging
+
+import numpy as np
+import torch
+
+from web_app.database.memory.cache import MemoryCache
+from web_app.database.valkey.client import ValkeyClient
+from web_app.model.executor import InferenceExecutor
+from web_app.utils.error import ValkeyConnectionNotAliveError
+from web_app.utils.metrics import record_cache_lookups
+
+
+def hash_pages(images: torch.Tensor) -> list[str]:
+    return [hashlib.sha256(page.contiguous().numpy()).hexdigest() for page in images]
+
+
+def encode_embedding(embedding: torch.Tensor) -> bytes:
+    return embedding.to(torch.float32).numpy().tobytes()
+
+
+def page_embedding_key(model_version: str, page_hash: str) -> str:
+    # embeddings of another backbone are never reused, they expire with their TTL
+    return f"page_embedding_{model_version}_{page_hash}"
+
+
+def decode_embedding(raw_embedding: bytes) -> torch.Tensor:
+    return torch.from_numpy(np.frombuffer(raw_embedding, dtype=np.float32).copy())
+
+
+class PageEmbeddingCache:
+    """Runs the backbone only on pages whose embeddings are not cached yet, then pools the
+    embeddings of every page and applies the classification head."""
+
+    def __init__(
+        self,
+        executor: InferenceExecutor,
+        memory_cache: MemoryCache,
+        model_version: str,
+        valkey_client: ValkeyClient | None = None,
+        valkey_ttl: int = 86400,
+    ):
+        self.executor = executor
+        self.memory_cache = memory_cache
+        self.model_version = model_version
+        self.valkey_client = valkey_client
+        self.valkey_ttl = valkey_ttl
+
+    async def predict_proba_batch(
+        self, images: torch.Tensor, lengths: torch.Tensor
+    ) -> torch.Tensor:
+        page_hashes = await self.executor.run(hash_pages, images)
+        keys = [page_embedding_key(self.model_version, page_hash) for page_hash in page_hashes]
+        # identical pages within the batch are embedded once
+        first_pages: dict[str, int] = {}
+        for page, key in enumerate(keys):
+            first_pages.setdefault(key, page)
+
+        embeddings = {key: self.memory_cache.get(key) for key in first_pages}
+        record_cache_lookups("memory", embeddings, kind="page_embedding")
+        missing_keys = [key for key, embedding in embeddings.items() if embedding is None]
+        if len(missing_keys) > 0 and self.valkey_client is not None:
+            embeddings.update(await self._read_from_valkey(missing_keys))
+            missing_keys = [key for key in missing_keys if embeddings[key] is None]
+
+        logging.debug(f"Embedding {len(missing_keys)} of {len(keys)} pages.")
+        if len(missing_keys) > 0:
+            new_embeddings = await self.executor.embed_pages(
+                images[[first_pages[key] for key in missing_keys]]
+            )
+            for key, embedding in zip(missing_keys, new_embeddings):
+                # cloned so a cached row does not keep the whole batch alive
+                embeddings[key] = embedding.clone()
+                self.memory_cache.set(key, embeddings[key])
+            if self.valkey_client is not None:
+                await self._write_to_valkey({key: embeddings[key] for key in missing_keys})
+
+        page_embeddings = torch.stack([embeddings[key] for key in keys])
+        return await self.executor.predict_proba_from_page_embeddings(page_embeddings, lengths)
+
+    async def _read_from_valkey(self, keys: list[str]) -> dict[str, torch.Tensor | None]:
+        try:
+            raw_embeddings = await self.valkey_client.read_many_raw(keys)
+        except ValkeyConnectionNotAliveError:
+            logging.warning("Page embeddings not available in Valkey, embedding pages again.")
+            return {}
+        embeddings = {}
+        for key, raw_embedding in zip(keys, raw_embeddings):
+            embeddings[key] = None if raw_embedding is None else decode_embedding(raw_embedding)
+            if embeddings[key] is not None:
+                self.memory_cache.set(key, embeddings[key])
+        record_cache_lookups("valkey", embeddings, kind="page_embedding")
+        return embeddings
+
+    async def _write_to_valkey(self, embeddings: dict[str, torch.Tensor]) -> None:
+        try:
+            await self.valkey_client.write_many_raw(
+                {key: encode_embedding(embedding) for key, embedding in embeddings.items()},
+                ttl=self.valkey_ttl,
+            )
+        except ValkeyConnectionNotAliveError:
+            logging.warning("Page embeddings not saved in Valkey.")
@@ -0,0 +1,70 @@
+import struct
+from dataclasses import dataclass
+from typing import Any
+
+import numpy as np
+import torch
+
+from web_app.model.document_classifier import DocumentClassifier
+
+RENDERERS = {"v1": DocumentClassifier.to_label, "v2": DocumentClassifier.to_ranking}
+
+# binary record layout: magic, format version, probability dtype, model version length,
+# model version, little endian probabilities
+RECORD_MAGIC = b"PR"
+RECORD_FORMAT_VERSION = 1
+RECORD_HEADER = struct.Struct("<2sBBB")
+# position in the tuple is the dtype code stored in the header
+PROBABILITY_DTYPES = ("float32", "float16")
+
+
+def prediction_key(model_version: str, digest: str) -> str:
+    # predictions of a previous model are never served, they expire with their TTL
+    return f"prediction_{model_version}_{digest}"
+
+
+@dataclass
+class PredictionRecord:
+    """Class probabilities of a document, every API version renders its response from them."""
+
+    probabilities: list[float]
+    model_version: str
+
+    @classmethod
+    def from_proba(cls, predicted_proba: torch.Tensor, model_version: str) -> "PredictionRecord":
+        return cls(probabilities=predicted_proba.tolist(), model_version=model_version)
+
+    @classmethod
+    def from_bytes(cls, raw_record: bytes) -> "PredictionRecord":
+        magic, format_version, dtype_code, version_length = RECORD_HEADER.unpack_from(raw_record)
+        if (
+            magic != RECORD_MAGIC
+            or format_version != RECORD_FORMAT_VERSION
+            or dtype_code >= len(PROBABILITY_DTYPES)
+        ):
+            raise ValueError(f"Unsupported prediction record {magic=}, {format_version=}.")
+        dtype = np.dtype(PROBABILITY_DTYPES[dtype_code]).newbyteorder("<")
+        version_end = RECORD_HEADER.size + version_length
+        return cls(
+            probabilities=np.frombuffer(raw_record, dtype=dtype, offset=version_end)
+            .astype(np.float64)
+            .tolist(),
+            model_version=raw_record[RECORD_HEADER.size : version_end].decode(),
+        )
+
+    def to_bytes(self, dtype: str = "float32") -> bytes:
+        model_version = self.model_version.encode()
+        header = RECORD_HEADER.pack(
+            RECORD_MAGIC,
+            RECORD_FORMAT_VERSION,
+            PROBABILITY_DTYPES.index(dtype),
+            len(model_version),
+        )
+        return (
+            header
+            + model_version
+            + np.asarray(self.probabilities, dtype=np.dtype(dtype).newbyteorder("<")).tobytes()
+        )
+
+    def render(self, api_version: str) -> Any:
+        return RENDERERS[api_version](torch.tensor(self.probabilities))
@@ -0,0 +1,132 @@
+import logging
+import os
+import signal
+import socket
+import time
+from typing import Callable
+
+import torch
+import uvicorn
+from fastapi import FastAPI
+from prometheus_client import multiprocess
+
+from web_app.model.document_classifier import DocumentClassifier
+
+
+def share_model_memory(classifier: DocumentClassifier) -> None:
+    if not isinstance(classifier.model, torch.nn.Module):
+        logging.info("Model backend keeps its own memory, it is not moved to shared memory.")
+        return
+    # parameters and buffers move to shared memory, forked workers map them instead of copying
+    classifier.model.share_memory()
+
+
+def clear_metrics_directory() -> None:
+    """Removes the metric files of a previous run, workers aggregate metrics through them."""
+    metrics_directory = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+    if metrics_directory is None:
+        return
+    os.makedirs(metrics_directory, exist_ok=True)
+    for file_name in os.listdir(metrics_directory):
+        if file_name.endswith(".db"):
+            os.remove(os.path.join(metrics_directory, file_name))
+
+
+def create_socket(host: str, port: int, backlog: int = 2048) -> socket.socket:
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+class PreforkServer:
+    """Loads the model once and serves the app from forked workers sharing its weights.
+
+    Models of backends that are not fork-safe, e.g. an ONNX Runtime session with its thread
+    pools, are not preloaded, every worker loads its own in the lifespan after the fork. Neither
+    are models served by an inference process pool, its processes load their own."""
+
+    def __init__(
+        self,
+        app: FastAPI,
+        host: str,
+        port: int,
+        workers: int,
+        load_classifier: Callable[[], DocumentClassifier],
+        preload_classifier: bool = True,
+    ):
+        self.app = app
+        self.host = host
+        self.port = port
+        self.workers = workers
+        self.load_classifier = load_classifier
+        self.preload_classifier = preload_classifier
+        self.children: set[int] = set()
+        self._stopping = False
+        self._socket: socket.socket | None = None
+
+    def run(self) -> None:
+        logging.info(
+            f"Starting pre-fork server with {self.workers=} on {self.host=}, {self.port=}."
+        )
+        if self.preload_classifier:
+            classifier = self.load_classifier()
+            share_model_memory(classifier)
+            # picked up by the lifespan of every worker instead of loading the model again
+            self.app.state.preloaded_classifier = classifier
+        else:
+            logging.info("Model is not preloaded, every worker loads its own model.")
+        if "PROMETHEUS_MULTIPROC_DIR" not in os.environ:
+            logging.warning(
+                "PROMETHEUS_MULTIPROC_DIR is not set, every worker exposes its own metrics."
+            )
+        clear_metrics_directory()
+        self._socket = create_socket(self.host, self.port)
+
+        signal.signal(signal.SIGTERM, self._stop)
+        signal.signal(signal.SIGINT, self._stop)
+        for _ in range(self.workers):
+            self._spawn()
+        self._supervise()
+        self._socket.close()
+        logging.info("Pre-fork server stopped.")
+
+    def _spawn(self) -> None:
+        pid = os.fork()
+        if pid == 0:
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            exit_code = 0
+            try:
+                uvicorn.Server(uvicorn.Config(app=self.app)).run(sockets=[self._socket])
+            except BaseException:
+                logging.exception("Worker failed.")
+                exit_code = 1
+            finally:
+                os._exit(exit_code)
+        logging.info(f"Started worker {pid=}.")
+        self.children.add(pid)
+
+    def _supervise(self) -> None:
+        while self.children:
+            pid, status = os.wait()
+            self.children.discard(pid)
+            if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+                # gauges of a dead worker are dropped from the aggregate
+                multiprocess.mark_process_dead(pid)
+            if not self._stopping:
+                logging.warning(f"Worker {pid=} exited with {status=}, restarting it.")
+                time.sleep(1)
+                self._spawn()
+
+    def _stop(self, signum: int, frame) -> None:
+        logging.info(f"Received {signum=}, stopping workers.")
+        self._stopping = True
+        for pid in self.children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                # exited already, it is reaped by the supervisor
+                logging.info(f"Worker {pid=} already exited.")
@@ -1,12 +1,15 @@
-import tempfile
-
 import torch
 
-from common.converters import pdf_to_model_input
+from common.converters import pixmaps_to_model_input, render_pages
+from web_app.utils.metrics import stage_timer
 
 
-def to_model_input(document: bytes) -> tuple[torch.Tensor, torch.Tensor]:
-    with tempfile.NamedTemporaryFile(mode="w+b", suffix=".pdf", delete=False) as tmp:
-        tmp.write(document)
-    model_input = pdf_to_model_input(tmp.name)
-    return model_input
+def to_model_input(
+    document: bytes, render_at_model_size: bool = False, grayscale: bool = False
+) -> tuple[torch.Tensor, torch.Tensor]:
+    with stage_timer("rasterize"):
+        pixmaps = render_pages(
+            document, render_at_model_size=render_at_model_size, grayscale=grayscale
+        )
+    with stage_timer("preprocess"):
+        return pixmaps_to_model_input(pixmaps)
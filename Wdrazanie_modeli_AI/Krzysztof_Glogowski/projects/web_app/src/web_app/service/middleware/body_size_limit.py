@@ -0,0 +1,55 @@
+import re
+
+from fastapi import HTTPException
+from starlette.datastructures import Headers
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# /v1/predict, /latest/predict -> /predict
+VERSION_PREFIX = re.compile(r"^/(v\d+|latest)(?=/)")
+TOO_LARGE_DETAIL = "Request body too large"
+
+
+class BodySizeLimitMiddleware:
+    """Rejects a request with 413 when its body exceeds the limit of its path, from the
+    Content-Length header before any of the body is received, otherwise as soon as the received
+    body passes the limit, so an oversized upload is never spooled by the multipart parser.
+
+    Limits are read from the max_body_sizes mapping set on the application state, keyed by the
+    path without its API version prefix. Paths without a limit are passed through."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        max_body_size = self._max_body_size(scope)
+        if max_body_size is None:
+            await self.app(scope, receive, send)
+            return
+
+        content_length = Headers(scope=scope).get("content-length", "")
+        if content_length.isdigit() and int(content_length) > max_body_size:
+            response = JSONResponse(status_code=413, content={"detail": TOO_LARGE_DETAIL})
+            await response(scope, receive, send)
+            return
+
+        received = 0
+
+        async def receive_with_limit() -> Message:
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > max_body_size:
+                    # raised inside the body parsing of the endpoint, FastAPI passes it through
+                    raise HTTPException(status_code=413, detail=TOO_LARGE_DETAIL)
+            return message
+
+        await self.app(scope, receive_with_limit, send)
+
+    @staticmethod
+    def _max_body_size(scope: Scope) -> int | None:
+        if scope["type"] != "http":
+            return None
+        max_body_sizes = getattr(scope["app"].state, "max_body_sizes", {})
+        return max_body_sizes.get(VERSION_PREFIX.sub("", scope["path"]))
@@ -0,0 +1,43 @@
+import time
+from contextvars import ContextVar
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# seconds spent in each stage of the current request, None outside of a timed request
+STAGE_TIMINGS: ContextVar[dict[str, float] | None] = ContextVar("stage_timings", default=None)
+
+
+class ServerTimingMiddleware:
+    """Lists the durations of the stages timed while handling a request in a Server-Timing header,
+    enabled with the server_timing flag set on the application state."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not getattr(scope["app"].state, "server_timing", False):
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        stage_timings: dict[str, float] = {}
+        token = STAGE_TIMINGS.set(stage_timings)
+
+        async def send_with_server_timing(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                stage_timings["total"] = time.perf_counter() - start
+                headers = MutableHeaders(scope=message)
+                headers.append(
+                    "Server-Timing",
+                    ", ".join(
+                        f"{stage};dur={duration * 1000:.3f}"
+                        for stage, duration in stage_timings.items()
+                    ),
+                )
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_server_timing)
+        finally:
+            STAGE_TIMINGS.reset(token)
@@ -0,0 +1,80 @@
+import asyncio
+import logging
+import uuid
+from functools import partial
+from typing import Any, Awaitable, Callable
+
+from web_app.database.valkey.client import ValkeyClient
+
+
+class SingleFlight:
+    """Coalesces concurrent calls with the same key into a single execution."""
+
+    def __init__(self):
+        self._calls: dict[str, asyncio.Task] = {}
+
+    def __len__(self) -> int:
+        return len(self._calls)
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._calls.get(key)
+        if task is None:
+            # the call runs as its own task so a disconnected caller doesn't cancel it for others
+            task = asyncio.ensure_future(fn())
+            self._calls[key] = task
+            task.add_done_callback(partial(self._forget, key))
+        else:
+            logging.info(f"Joining in-flight call for {key=}.")
+        return await asyncio.shield(task)
+
+    def _forget(self, key: str, task: asyncio.Task) -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        if not task.cancelled():
+            task.exception()
+
+
+class ValkeySingleFlight(SingleFlight):
+    """Extends coalescing to other workers with a Valkey lock stored next to the cached result."""
+
+    def __init__(
+        self, valkey_client: ValkeyClient, lock_ttl: float = 30.0, poll_interval: float = 0.05
+    ):
+        super().__init__()
+        self.valkey_client = valkey_client
+        self.lock_ttl = lock_ttl
+        self.poll_interval = poll_interval
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        return await super().do(key, partial(self._do_with_lock, key, fn))
+
+    async def _do_with_lock(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        lock_key = f"lock_{key}"
+        token = uuid.uuid4().hex
+        if await self.valkey_client.acquire_lock(lock_key, token, int(self.lock_ttl * 1000)):
+            try:
+                result = await fn()
+                # published before unlocking so waiting workers find it
+                await self.valkey_client.write(key, result)
+                return result
+            finally:
+                await self.valkey_client.release_lock(lock_key, token)
+
+        logging.info(f"Waiting for another worker to finish call for {key=}.")
+        result = await self._wait_for_result(key, lock_key)
+        if result is None:
+            logging.warning(f"Another worker didn't publish result for {key=}, running call.")
+            result = await fn()
+        return result
+
+    async def _wait_for_result(self, key: str, lock_key: str) -> Any | None:
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.lock_ttl
+        while loop.time() < deadline:
+            await asyncio.sleep(self.poll_interval)
+            result, locked = await self.valkey_client.read_with_lock(key, lock_key)
+            if result is not None:
+                return result
+            if not locked:
+                break
+        return None
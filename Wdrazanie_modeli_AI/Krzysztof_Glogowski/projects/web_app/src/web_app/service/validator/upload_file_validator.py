@@ -1,17 +1,67 @@
+import hashlib
 import logging
-from io import BufferedIOBase
+import time
+from dataclasses import dataclass
 
+from fastapi import UploadFile
 from fastapi.exceptions import RequestValidationError
 
 from common.input_file_validator import InputFileValidator
+from web_app.utils.metrics import observe_stage, stage_timer
+from web_app.utils.upload import iter_chunks
+
+
+@dataclass
+class IngestedDocument:
+    content: bytes
+    digest: str
 
 
 class UploadFileValidator:
-    def __init__(self):
+    def __init__(self, chunk_size: int = 65536):
         self.validator = InputFileValidator()
+        self.chunk_size = chunk_size
+
+    async def read(self, upload_file: UploadFile) -> IngestedDocument:
+        """Reads the received upload in chunks, stopping as soon as its size or content type is
+        invalid, before the rest is copied and hashed. The request body itself is limited while it
+        is received by BodySizeLimitMiddleware."""
+        with stage_timer("upload"):
+            return await self._read(upload_file)
+
+    async def _read(self, upload_file: UploadFile) -> IngestedDocument:
+        if upload_file.size is not None:
+            self._raise_on_errors(self.validator.validate_size(upload_file.size))
 
-    def validate(self, upload_file: BufferedIOBase) -> None:
-        errors = self.validator.validate(upload_file)
+        content = bytearray()
+        digest = hashlib.sha256()
+        content_type_validated = False
+        # chunks are hashed as they arrive, their hashing time is observed once per upload
+        hashing_time = 0.0
+        async for chunk in iter_chunks(upload_file, self.chunk_size):
+            content += chunk
+            hashing_start = time.perf_counter()
+            digest.update(chunk)
+            hashing_time += time.perf_counter() - hashing_start
+            if len(content) > self.validator.max_file_size:
+                self._raise_on_errors(self.validator.validate_size(len(content)))
+            if not content_type_validated and len(content) >= self.validator.sample_size:
+                sample = bytes(content[: self.validator.sample_size])
+                with stage_timer("content_type"):
+                    errors = self.validator.validate_content_type(sample)
+                self._raise_on_errors(errors)
+                content_type_validated = True
+        observe_stage("hashing", hashing_time)
+
+        errors = []
+        if not content_type_validated:
+            with stage_timer("content_type"):
+                errors = self.validator.validate_content_type(bytes(content))
+        self._raise_on_errors(errors + self.validator.validate_size(len(content)))
+        logging.info("Upload file validation completed successfully.")
+        return IngestedDocument(bytes(content), digest.hexdigest())
+
+    @staticmethod
+    def _raise_on_errors(errors: list[str]) -> None:
         if len(errors) > 0:
             raise RequestValidationError(errors)
-        logging.info("Upload file validation completed successfully.")
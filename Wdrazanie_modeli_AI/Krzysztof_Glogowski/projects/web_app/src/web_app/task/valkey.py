@@ -1,9 +1,19 @@
 import logging
+from typing import Any
 
 from web_app.database.valkey.client import ValkeyClient
+from web_app.database.valkey.popular_documents import PopularDocuments
+from web_app.service.validator.upload_file_validator import IngestedDocument
 
 
-def write_to_valkey(valkey_client: ValkeyClient, key: str, value: int):
-    logging.info(f"Started background task to write to Valkey for {key=} and {value=}")
-    valkey_client.write(key, value)
+async def write_to_valkey(valkey_client: ValkeyClient, values: dict[str, Any]):
+    logging.info(f"Started background task to write to Valkey for keys={list(values)}")
+    await valkey_client.write_many(values)
     logging.info("Successfully ended background task to write to Valkey.")
+
+
+async def record_popular_documents(
+    popular_documents: PopularDocuments, documents: list[IngestedDocument]
+):
+    await popular_documents.record(documents)
+    logging.info(f"Recorded requests of {len(documents)} documents.")
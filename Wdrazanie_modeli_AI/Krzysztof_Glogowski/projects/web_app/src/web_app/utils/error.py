@@ -39,3 +39,15 @@ class ClamavConnectionNotAliveError(APIError):
     def __init__(self, socket_host: str, socket_port: int):
         self._msg = f"Connection to ClamAV is not alive on {socket_host=}, {socket_port=}."
         super().__init__(self._msg)
+
+
+class ClamavScanError(APIError):
+    def __init__(self, reply: str):
+        self._msg = f"ClamAV was unable to scan file, {reply=}."
+        super().__init__(self._msg)
+
+
+class InferenceQueueFullError(APIError):
+    def __init__(self, max_queue_size: int):
+        self._msg = f"Inference queue is full, {max_queue_size=} reached."
+        super().__init__(self._msg)
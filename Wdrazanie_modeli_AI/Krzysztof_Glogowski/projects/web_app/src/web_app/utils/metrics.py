@@ -0,0 +1,124 @@
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator
+
+from prometheus_client import CollectorRegistry, Counter, Gauge, Histogram, generate_latest
+from prometheus_client import multiprocess
+
+from web_app.service.middleware.server_timing import STAGE_TIMINGS
+
+# Prometheus defaults extended below 5 ms for hashing, libmagic and Valkey
+DEFAULT_BUCKETS = (
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+REGISTRY = CollectorRegistry()
+
+STAGE_DURATION = Histogram(
+    "document_classification_stage_duration_seconds",
+    "Duration of a stage of the document classification.",
+    ("stage",),
+    buckets=DEFAULT_BUCKETS,
+    registry=REGISTRY,
+)
+CACHE_LOOKUPS = Counter(
+    "document_classification_cache_lookups_total",
+    "Cache lookups by cache tier, kind of the cached value and result.",
+    ("tier", "kind", "result"),
+    registry=REGISTRY,
+)
+DOCUMENT_PAGES = Histogram(
+    "document_classification_document_pages",
+    "Number of pages of the classified documents.",
+    buckets=(1, 2, 3, 5, 10, 20, 50, 100),
+    registry=REGISTRY,
+)
+# set where the queues change, function gauges are not read from the files of other workers
+INFERENCE_QUEUE_DEPTH = Gauge(
+    "document_classification_inference_queue_depth",
+    "Documents holding a place in the inference queue.",
+    registry=REGISTRY,
+    multiprocess_mode="livesum",
+)
+BATCHER_QUEUE_DEPTH = Gauge(
+    "document_classification_batcher_queue_depth",
+    "Documents waiting to be collated into a forward pass.",
+    registry=REGISTRY,
+    multiprocess_mode="livesum",
+)
+
+
+def render() -> bytes:
+    """Text exposition format read by Prometheus. With PROMETHEUS_MULTIPROC_DIR set, e.g. for the
+    pre-fork server, metrics of all the workers are aggregated from the files they write."""
+    if "PROMETHEUS_MULTIPROC_DIR" not in os.environ:
+        return generate_latest(REGISTRY)
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return generate_latest(registry)
+
+
+# durations of stages timed inside InferenceExecutor.run, returned to the server process
+_collected = threading.local()
+
+
+def observe_stage(stage: str, duration: float) -> None:
+    STAGE_DURATION.labels(stage=stage).observe(duration)
+    stage_timings = STAGE_TIMINGS.get()
+    if stage_timings is not None:
+        stage_timings[stage] = stage_timings.get(stage, 0.0) + duration
+
+
+@contextmanager
+def stage_timer(stage: str) -> Iterator[None]:
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        duration = time.perf_counter() - start
+        durations = getattr(_collected, "durations", None)
+        if durations is None:
+            observe_stage(stage, duration)
+        else:
+            durations.append((stage, duration))
+
+
+def collect_stage_durations(fn: Callable[..., Any], *args: Any) -> tuple[Any, list]:
+    """Calls fn keeping the durations of the stages it times instead of observing them,
+    so stages run in an executor process can be observed in the server process."""
+    _collected.durations = []
+    try:
+        result = fn(*args)
+        return result, _collected.durations
+    finally:
+        _collected.durations = None
+
+
+def record_cache_lookups(tier: str, values: dict[str, Any], kind: str | None = None) -> None:
+    for key, value in values.items():
+        CACHE_LOOKUPS.labels(
+            tier=tier,
+            # key prefix, e.g. "prediction" or "verified"
+            kind=kind or key.split("_", 1)[0],
+            result="miss" if value is None else "hit",
+        ).inc()
+
+
+def observe_stage_durations(durations: list[tuple[str, float]]) -> None:
+    for stage, duration in durations:
+        observe_stage(stage, duration)
@@ -0,0 +1,15 @@
+from typing import AsyncIterator
+
+from fastapi import UploadFile
+
+
+async def iter_chunks(file: UploadFile, chunk_size: int = 65536) -> AsyncIterator[bytes]:
+    await file.seek(0)
+    while chunk := await file.read(chunk_size):
+        yield chunk
+
+
+async def iter_bytes(content: bytes, chunk_size: int = 65536) -> AsyncIterator[bytes]:
+    view = memoryview(content)
+    for offset in range(0, len(view), chunk_size):
+        yield view[offset : offset + chunk_size]